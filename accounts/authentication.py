@@ -0,0 +1,117 @@
+"""JWT authentication that does not load the user row on every request.
+
+The access token already carries the user id and ``email``. The only
+per-request state that has to come from the server is whether the account
+may still act and with which role; that lives in a short-TTL cache which
+``accounts.signals`` drops whenever a user is saved or deleted and writes
+again once the change commits, so a deactivation or role change applies to
+live tokens straight away.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+_STATE_KEY = 'accounts:principal:{}'
+# Cached for deactivated or deleted accounts; no role is ever empty.
+_INACTIVE = ''
+
+
+def _state_timeout():
+    return getattr(settings, 'AUTH_PRINCIPAL_CACHE_TIMEOUT', 30)
+
+
+def remember_user(user):
+    """Record ``user``'s current role, or that it is locked out."""
+    cache.set(_STATE_KEY.format(user.pk), user.role if user.is_active else _INACTIVE, _state_timeout())
+
+
+def forget_user(user_id):
+    cache.set(_STATE_KEY.format(user_id), _INACTIVE, _state_timeout())
+
+
+def invalidate_user(user_id):
+    """Drop the cached state, so the next request reads the committed row."""
+    cache.delete(_STATE_KEY.format(user_id))
+
+
+def current_role(user_id):
+    """The user's role, or ``None`` when the account is inactive or gone."""
+    key = _STATE_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values_list('is_active', 'role').first()
+        state = row[1] if row and row[0] else _INACTIVE
+        cache.set(key, state, _state_timeout())
+    return state or None
+
+
+class TokenPrincipal:
+    """The authenticated user as described by a validated access token.
+
+    ``id``, ``email`` and ``role`` answer without a query. Any other attribute
+    loads the real ``User`` once and is read from it, so code that needs the
+    full row (``full_name``, ``password``, ...) still works unchanged. Use
+    ``pk`` rather than the object itself when assigning or filtering foreign
+    keys.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, role, token):
+        self.id = self.pk = user_id
+        self.role = role
+        self.token = token
+        if 'email' in token:
+            self.email = token['email']
+
+    @property
+    def roles(self):
+        return [self.role]
+
+    @property
+    def permissions(self):
+        return []
+
+    @cached_property
+    def user(self):
+        try:
+            return User.objects.get(pk=self.pk)
+        except User.DoesNotExist as exc:
+            raise AuthenticationFailed('User not found', code='user_not_found') from exc
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __eq__(self, other):
+        return isinstance(other, (TokenPrincipal, User)) and other.pk == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return getattr(self, 'email', str(self.pk))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that returns a ``TokenPrincipal`` instead of querying ``User``."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError) as exc:
+            raise InvalidToken('Token contained no recognizable user identification') from exc
+
+        role = current_role(user_id)
+        if role is None:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return TokenPrincipal(user_id, role, validated_token)
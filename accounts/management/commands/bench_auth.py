@@ -0,0 +1,89 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth.hashers import get_hasher
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from bookings.synthetic import EMAIL_DOMAIN
+
+PASSWORD = 'Bench-Pass-123!'
+
+
+@contextmanager
+def count_hashes():
+    """Count calls into the default password hasher (verify goes through encode)."""
+    hasher = type(get_hasher('default'))
+    original = hasher.encode
+    lock = threading.Lock()
+    counter = {'hashes': 0}
+
+    def encode(self, *args, **kwargs):
+        with lock:
+            counter['hashes'] += 1
+        return original(self, *args, **kwargs)
+
+    with mock.patch.object(hasher, 'encode', encode):
+        yield counter
+
+
+class Command(BaseCommand):
+    help = 'Measure /api/auth/login and /api/auth/register throughput under concurrent requests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        total, concurrency = options['requests'], options['concurrency']
+        self.clear()
+        try:
+            User.objects.create_user(f'login@{EMAIL_DOMAIN}', PASSWORD, full_name='Bench Login')
+            self.stdout.write(f'Backend: {connection.vendor}, hasher: {get_hasher("default").algorithm}')
+            self.run('login', total, concurrency, lambda index: ('/api/auth/login', {
+                'email': f'login@{EMAIL_DOMAIN}',
+                'password': PASSWORD,
+            }))
+            self.run('register', total, concurrency, lambda index: ('/api/auth/register', {
+                'email': f'register{index}@{EMAIL_DOMAIN}',
+                'password': PASSWORD,
+                'full_name': f'Bench Register {index}',
+            }))
+        finally:
+            self.clear()
+
+    def clear(self):
+        User.objects.filter(email__regex=rf'^(login|register\d+)@{EMAIL_DOMAIN}$').delete()
+
+    def run(self, label, total, concurrency, build):
+        host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost')
+
+        def call(index):
+            try:
+                url, payload = build(index)
+                started = time.perf_counter()
+                response = APIClient(HTTP_HOST=host).post(url, payload, format='json')
+                return response.status_code, (time.perf_counter() - started) * 1000
+            finally:
+                connection.close()
+
+        with count_hashes() as counter, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(call, range(total)))
+            elapsed = time.perf_counter() - started
+
+        failed = sum(1 for status, _ in results if status != 200)
+        timings = sorted(ms for _, ms in results)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+        self.stdout.write(
+            f'{total} requests x{concurrency}: {total / elapsed:.1f} req/s, '
+            f'p50 {statistics.median(timings):.1f} ms, p99 {timings[int(len(timings) * 0.99) - 1]:.1f} ms, '
+            f'{counter["hashes"] / total:.2f} hashes/request, {failed} failed'
+        )
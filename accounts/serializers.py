@@ -1,6 +1,8 @@
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
 
 from .models import User, UserRole
 
@@ -48,16 +50,25 @@ class LoginTokenSerializer(TokenObtainPairSerializer):
         return token
 
     def validate(self, attrs):
-        credentials = {
-            'email': attrs.get('email'),
-            'password': attrs.get('password'),
-        }
-        user = authenticate(**credentials)
-        if not user:
+        # Verify the password exactly once; TokenObtainPairSerializer.validate
+        # would authenticate (and run the password hasher) a second time.
+        self.user = authenticate(
+            self.context.get('request'),
+            email=attrs.get('email'),
+            password=attrs.get('password'),
+        )
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
             raise serializers.ValidationError('Invalid email or password')
+        return self.token_response(self.user)
 
-        data = super().validate(attrs)
-        data['token'] = data.pop('access')
-        data['refresh'] = data.get('refresh')
-        data['user'] = UserSerializer(user).data
-        return data
+    @classmethod
+    def token_response(cls, user):
+        """Login response for an already-authenticated ``user``."""
+        refresh = cls.get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        return {
+            'refresh': str(refresh),
+            'token': str(refresh.access_token),
+            'user': UserSerializer(user).data,
+        }
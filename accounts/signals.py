@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user, invalidate_user, remember_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def refresh_principal_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Only committed state is cached: drop the entry now, so the change is
+    # not hidden behind it, and write the new state once it commits. A
+    # rollback leaves nothing behind.
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: remember_user(instance))
+
+
+@receiver(post_delete, sender=User)
+def drop_principal_state(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: forget_user(instance.pk))
@@ -1,3 +1,115 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
-# Create your tests here.
+from .authentication import StatelessJWTAuthentication, current_role
+from .management.commands.bench_auth import count_hashes
+from .models import User, UserRole
+from .serializers import LoginTokenSerializer
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('admin@example.com', 'pw', full_name='Ada Admin', role=UserRole.ADMIN)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.token = LoginTokenSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_authentication_is_query_free_once_warm(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        StatelessJWTAuthentication().authenticate(request)
+
+        with self.assertNumQueries(0):
+            principal, _token = StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual((principal.pk, principal.role, principal.email), (self.user.pk, 'ADMIN', 'admin@example.com'))
+        with self.assertNumQueries(1):
+            JWTAuthentication().authenticate(request)
+
+    def test_authenticated_lists_skip_the_user_query(self):
+        for url in ('/api/bookings/me', '/api/admin/bookings'):
+            with self.subTest(url=url):
+                self.client.get(url)
+                # Conditional-GET validators and the page; nothing from accounts_user.
+                with self.assertNumQueries(2):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_other_attributes_load_the_user_lazily(self):
+        response = self.client.get('/api/auth/me')
+        self.assertEqual(response.json()['full_name'], 'Ada Admin')
+        self.assertEqual(response.json()['roles'], ['ADMIN'])
+
+    def test_deactivated_user_is_locked_out_immediately(self):
+        self.assertEqual(self.client.get('/api/admin/bookings').status_code, 200)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get('/api/admin/bookings').status_code, 401)
+
+    def test_role_change_applies_to_live_tokens(self):
+        self.assertEqual(self.client.get('/api/admin/bookings').status_code, 200)
+
+        self.user.role = UserRole.CUSTOMER
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get('/api/admin/bookings').status_code, 403)
+
+    def test_rolled_back_changes_are_not_cached(self):
+        self.assertEqual(self.client.get('/api/admin/bookings').status_code, 200)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.user.role = UserRole.CUSTOMER
+            self.user.save()
+            raise RuntimeError
+        self.assertEqual(current_role(self.user.pk), UserRole.ADMIN)
+        self.assertEqual(self.client.get('/api/admin/bookings').status_code, 200)
+
+    def test_deleted_user_is_locked_out(self):
+        self.client.get('/api/admin/bookings')
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.client.get('/api/admin/bookings').status_code, 401)
+
+
+class PasswordHashCountTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('guest@example.com', 'Secret-Pass-1', full_name='Gail Guest')
+
+    def post_counting_hashes(self, url, payload):
+        with count_hashes() as counter:
+            response = APIClient().post(url, payload, format='json')
+        return response, counter['hashes']
+
+    def test_login_hashes_the_password_once(self):
+        response, hashes = self.post_counting_hashes(
+            '/api/auth/login', {'email': 'guest@example.com', 'password': 'Secret-Pass-1'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()), ['refresh', 'token', 'user'])
+        self.assertEqual(response.json()['user']['email'], 'guest@example.com')
+        self.assertEqual(hashes, 1)
+
+    def test_wrong_password_is_rejected(self):
+        response, hashes = self.post_counting_hashes(
+            '/api/auth/login', {'email': 'guest@example.com', 'password': 'wrong'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(hashes, 1)
+
+    def test_register_hashes_the_password_once(self):
+        response, hashes = self.post_counting_hashes(
+            '/api/auth/register', {'email': 'new@example.com', 'password': 'Secret-Pass-2', 'full_name': 'Nia New'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()), ['refresh', 'token', 'user'])
+        self.assertEqual(hashes, 1)
+
+        token = response.json()['token']
+        me = APIClient(HTTP_AUTHORIZATION=f'Bearer {token}').get('/api/auth/me')
+        self.assertEqual(me.json()['email'], 'new@example.com')
@@ -18,10 +18,9 @@ class RegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        # Use the same response shape as login
-        token_serializer = LoginTokenSerializer(data={'email': user.email, 'password': request.data.get('password')})
-        token_serializer.is_valid(raise_exception=True)
-        return Response(token_serializer.validated_data)
+        # Same response shape as login; create_user already hashed the
+        # password, so mint the tokens without authenticating again.
+        return Response(LoginTokenSerializer.token_response(user))
 
 
 class MeView(generics.RetrieveAPIView):
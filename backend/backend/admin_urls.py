@@ -1,5 +1,8 @@
 from django.urls import include, path
 
+from .profiling import ProfilingSummaryView
+
 urlpatterns = [
     path('', include('bookings.admin_urls')),
+    path('profiling', ProfilingSummaryView.as_view(), name='admin-profiling'),
 ]
@@ -0,0 +1,69 @@
+"""Native async JSON views.
+
+DRF views are synchronous, so under ASGI each one occupies a worker thread
+for its whole run. The hottest public endpoints are plain Django async views
+built on ``AsyncAPIView`` instead, which keeps DRF's conventions for them:
+CSRF exempt (the API authenticates with bearer tokens), JSON or form bodies,
+and responses rendered by the same ``FastJSONRenderer``.
+"""
+
+import io
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import ParseError
+
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+
+
+class AsyncAPIView(View):
+    parser = FastJSONParser()
+    renderer = FastJSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except ParseError as exc:
+            return self.respond({'detail': exc.detail}, status=exc.status_code)
+
+    def parse(self, request):
+        """The request body as a dict (JSON) or ``QueryDict`` (form data)."""
+        if request.content_type != 'application/json':
+            return request.POST
+        if not request.body:
+            return {}
+        data = self.parser.parse(io.BytesIO(request.body), request.META.get('CONTENT_TYPE'), {'request': request})
+        if not isinstance(data, dict):
+            raise ParseError('JSON body must be an object')
+        return data
+
+    def respond(self, data, status=200):
+        return HttpResponse(self.renderer.render(data), status=status, content_type='application/json')
+
+
+def dispatch_by_method(default, **views):
+    """One URL served by a view per HTTP method: ``views['GET']`` and so on, else ``default``.
+
+    Lets the reads of a resource come from an async view while its writes stay
+    on a DRF view, without either view calling the other. Sync views run in a
+    thread, as Django itself runs them under ASGI. CSRF is left to the views.
+    """
+    handlers = {method: _as_async(view) for method, view in views.items()}
+    default = _as_async(default)
+
+    async def view(request, *args, **kwargs):
+        return await handlers.get(request.method, default)(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+def _as_async(view):
+    return view if iscoroutinefunction(view) else sync_to_async(view, thread_sensitive=True)
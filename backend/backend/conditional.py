@@ -0,0 +1,74 @@
+"""Conditional GET (``ETag`` / ``Last-Modified``) for DRF views."""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class _ConditionalResponse(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Answer GET/HEAD with ``304 Not Modified`` while the client's copy is current.
+
+    Views implement ``get_validators()`` and return ``(parts, last_modified)``,
+    or ``None`` when the request should not be conditional. ``parts`` is
+    anything with a stable ``repr`` (row counts, timestamps, versions) that
+    changes whenever the response body would; it is hashed into a weak ETag
+    together with the URL and negotiated format. Validators are checked after
+    authentication and permissions and before the handler runs, so unchanged
+    resources cost only what ``get_validators()`` costs.
+    """
+
+    def get_validators(self):
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+
+        validators = self.get_validators()
+        if validators is None:
+            return
+        parts, last_modified = validators
+        self._validators = etag, timestamp = response_validators(
+            request, parts, last_modified, request.accepted_renderer.format
+        )
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            set_validator_headers(response, etag, timestamp)
+            raise _ConditionalResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _ConditionalResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == 200:
+            self._set_validator_headers(response)
+        return response
+
+    def _set_validator_headers(self, response):
+        set_validator_headers(response, *(getattr(self, '_validators', None) or (None, None)))
+
+
+def response_validators(request, parts, last_modified, format):
+    """Weak ETag and ``Last-Modified`` timestamp for a view's validators."""
+    digest = hashlib.blake2b(repr((parts, request.get_full_path(), format)).encode(), digest_size=12).hexdigest()
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return 'W/' + quote_etag(digest), timestamp
+
+
+def set_validator_headers(response, etag, timestamp):
+    if etag and not response.has_header('ETag'):
+        response.headers['ETag'] = etag
+    if timestamp is not None and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(timestamp)
@@ -0,0 +1,404 @@
+"""Prometheus metrics at ``/metrics``, summed over every worker process.
+
+``MetricsMiddleware`` records per-view (URL name) request latency, status codes and
+queries per request; a database execute wrapper records every query's
+duration, counts slow queries (``METRICS_SLOW_QUERY_MS``) by fingerprint and
+flags statements a single request repeats ``METRICS_REPEATED_QUERY_THRESHOLD``
+times or more, the usual sign of an N+1.
+
+Each process keeps its values in its own memory-mapped file under
+``METRICS_DIR`` (``<pid>.metrics``: a used-length header, then entries of a
+length-prefixed key and a float). Updates are a dict lookup and an 8-byte
+write under a process-local lock; a scrape reads every file in the
+directory and adds them up, so whichever worker answers reports for all of
+them and nothing outside the host is needed. Files of exited workers are
+kept, which keeps counters monotonic; ``reset()`` clears the directory when
+the server starts.
+
+Fingerprints are the SQL with literals and ``IN`` lists collapsed, so the
+same query with different arguments is counted once.
+"""
+
+import contextvars
+import hashlib
+import hmac
+import mmap
+import os
+import re
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.views import View
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_HEADER = struct.Struct('<Q')
+_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_SIZE = 1 << 16
+
+
+class FileStore:
+    """One process's metric values in a memory-mapped file other processes can read."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < _HEADER.size:
+            self._file.truncate(_INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        self._offsets = {key: offset for key, offset in _entries(self._map, self._used)}
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._add(key)
+            _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _add(self, key):
+        encoded = key.encode()
+        # Pad the key so the value is 8-byte aligned and written in one go.
+        padding = -(_LENGTH.size + len(encoded)) % 8
+        size = _LENGTH.size + len(encoded) + padding + _VALUE.size
+        if self._used + size > len(self._map):
+            self._grow(self._used + size)
+        entry = self._used
+        _LENGTH.pack_into(self._map, entry, len(encoded))
+        self._map[entry + _LENGTH.size:entry + _LENGTH.size + len(encoded)] = encoded
+        offset = entry + size - _VALUE.size
+        _VALUE.pack_into(self._map, offset, 0.0)
+        # Publish the entry only once it is complete, for readers mid-scrape.
+        self._used += size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+
+def _entries(buffer, used):
+    position = _HEADER.size
+    while position < used:
+        length = _LENGTH.unpack_from(buffer, position)[0]
+        key = bytes(buffer[position + _LENGTH.size:position + _LENGTH.size + length]).decode()
+        size = _LENGTH.size + length + (-(_LENGTH.size + length) % 8) + _VALUE.size
+        yield key, position + size - _VALUE.size
+        position += size
+
+
+def collect(directory=None):
+    """``{key: value}`` summed over every process's file in ``directory``."""
+    totals = defaultdict(float)
+    directory = Path(directory or settings.METRICS_DIR)
+    for path in directory.glob('*.metrics'):
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            continue
+        if len(data) < _HEADER.size:
+            continue
+        for key, offset in _entries(data, _HEADER.unpack_from(data, 0)[0]):
+            totals[key] += _VALUE.unpack_from(data, offset)[0]
+    return totals
+
+
+def reset(directory=None):
+    """Delete every process's values, e.g. from the server's master process at startup."""
+    global _store
+    directory = Path(directory or settings.METRICS_DIR)
+    with _store_lock:
+        if _store is not None:
+            _store[2].close()
+            _store = None
+        for path in directory.glob('*.metrics'):
+            path.unlink(missing_ok=True)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """This process's ``FileStore``, reopened after a fork or a change of ``METRICS_DIR``."""
+    global _store
+    pid, directory = os.getpid(), settings.METRICS_DIR
+    current = _store
+    if current is None or current[0] != pid or current[1] != directory:
+        with _store_lock:
+            current = _store
+            if current is None or current[0] != pid or current[1] != directory:
+                os.makedirs(directory, exist_ok=True)
+                current = _store = (pid, directory, FileStore(os.path.join(directory, f'{pid}.metrics')))
+    return current[2]
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name, self.documentation, self.labels = name, documentation, tuple(labels)
+        self._keys = {}
+
+    def inc(self, *values, amount=1.0):
+        key = self._keys.get(values)
+        if key is None:
+            key = self._keys.setdefault(values, f'{self.name}{_labels(zip(self.labels, values))}')
+        store().inc(key, amount)
+
+    def samples(self, values):
+        prefix = self.name + '{'
+        for key in sorted(key for key in values if key.startswith(prefix) or key == self.name):
+            yield key, values[key]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.documentation, self.labels = name, documentation, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._keys = {}
+
+    def observe(self, value, *values):
+        # Only the bucket the value falls in is stored; exposition makes them cumulative.
+        keys = self._keys.get(values)
+        if keys is None:
+            pairs = list(zip(self.labels, values))
+            keys = self._keys.setdefault(values, (
+                [f'{self.name}_bucket{_labels(pairs + [("le", _bound(bound))])}' for bound in (*self.buckets, float('inf'))],
+                f'{self.name}_sum{_labels(pairs)}',
+            ))
+        target = store()
+        target.inc(keys[0][bisect_left(self.buckets, value)])
+        target.inc(keys[1], value)
+
+    def samples(self, values):
+        bounds = [_bound(bound) for bound in (*self.buckets, float('inf'))]
+        series = defaultdict(dict)
+        sums = {}
+        for key, value in values.items():
+            if key.startswith(f'{self.name}_bucket{{'):
+                labels, _sep, bound = key[len(self.name) + len('_bucket{'):-1].rpartition('le="')
+                series[labels.rstrip(',')][bound[:-1]] = value
+            elif key == f'{self.name}_sum' or key.startswith(f'{self.name}_sum{{'):
+                sums[key[len(self.name) + len('_sum{'):-1] if key.endswith('}') else ''] = value
+        for labels in sorted(series):
+            running = 0.0
+            for bound in bounds:
+                running += series[labels].get(bound, 0.0)
+                yield f'{self.name}_bucket{{{labels + "," if labels else ""}le="{bound}"}}', running
+            wrapped = f'{{{labels}}}' if labels else ''
+            yield f'{self.name}_sum{wrapped}', sums.get(labels, 0.0)
+            yield f'{self.name}_count{wrapped}', running
+
+
+REQUESTS = Counter('http_requests_total', 'Requests served, by view, method and status code.', ('view', 'method', 'status'))
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by view and method.', ('view', 'method')
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request, by view and method.', ('view', 'method'), QUERY_COUNT_BUCKETS
+)
+QUERY_SECONDS = Histogram('db_query_duration_seconds', 'Time per database query.', (), QUERY_BUCKETS)
+SLOW_QUERIES = Counter('db_slow_queries_total', 'Queries slower than METRICS_SLOW_QUERY_MS, by fingerprint.', ('fingerprint', 'query'))
+SLOW_QUERY_SECONDS = Counter(
+    'db_slow_query_seconds_total', 'Time spent in queries slower than METRICS_SLOW_QUERY_MS, by fingerprint.', ('fingerprint', 'query')
+)
+REPEATED_QUERIES = Counter(
+    'db_repeated_queries_total',
+    'Executions of a statement one request ran METRICS_REPEATED_QUERY_THRESHOLD times or more (likely N+1).',
+    ('view', 'fingerprint', 'query'),
+)
+
+METRICS = (REQUESTS, REQUEST_SECONDS, REQUEST_QUERIES, QUERY_SECONDS, SLOW_QUERIES, SLOW_QUERY_SECONDS, REPEATED_QUERIES)
+
+
+def exposition(values=None):
+    """Every metric in the Prometheus text format."""
+    values = collect() if values is None else values
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(f'{key} {_number(value)}' for key, value in metric.samples(values))
+    return '\n'.join(lines) + '\n'
+
+
+_MAX_QUERY_LABEL = 300
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_VALUE_ROWS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_SPACES = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """``(id, normalized SQL)`` for ``sql``, the same for every argument list."""
+    normalized = _STRINGS.sub('?', sql)
+    normalized = _NUMBERS.sub('?', normalized)
+    normalized = _PLACEHOLDER_LISTS.sub('(...)', normalized)
+    normalized = _VALUE_ROWS.sub(r'\1', normalized)
+    normalized = _SPACES.sub(' ', normalized).strip()
+    return hashlib.blake2b(normalized.encode(), digest_size=6).hexdigest(), normalized[:_MAX_QUERY_LABEL]
+
+
+class _RequestQueries:
+    __slots__ = ('count', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.statements = defaultdict(int)
+
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_install_lock = threading.Lock()
+_installed = False
+
+
+class MetricsMiddleware:
+    """Record request latency, status and queries per view; see the module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries = _RequestQueries()
+        token = _current.set(queries)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, perf_counter() - started, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = _RequestQueries()
+        token = _current.set(queries)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, perf_counter() - started, queries)
+        return response
+
+    def record(self, request, response, elapsed, queries):
+        match = request.resolver_match
+        view = match.view_name if match is not None else '<unmatched>'
+        method = request.method if request.method in _METHODS else 'OTHER'
+        REQUESTS.inc(view, method, str(response.status_code))
+        REQUEST_SECONDS.observe(elapsed, view, method)
+        REQUEST_QUERIES.observe(queries.count, view, method)
+        threshold = settings.METRICS_REPEATED_QUERY_THRESHOLD
+        for sql, count in queries.statements.items():
+            if count >= threshold:
+                REPEATED_QUERIES.inc(view, *fingerprint(sql), amount=count)
+
+
+_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+class MetricsView(View):
+    """The Prometheus scrape target; requires ``METRICS_TOKEN`` as a bearer token when one is set."""
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+        return HttpResponse(exposition(), content_type=CONTENT_TYPE)
+
+
+def install():
+    """Time every query on every connection; once per process."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_wrap_connection)
+        for connection in connections.all(initialized_only=True):
+            _wrap_connection(connection=connection)
+        _installed = True
+
+
+def _wrap_connection(sender=None, connection=None, **kwargs):
+    if _observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_observe_query)
+
+
+def _observe_query(execute, sql, params, many, context):
+    if not settings.METRICS_ENABLED:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - started
+        QUERY_SECONDS.observe(elapsed)
+        if elapsed * 1000 >= settings.METRICS_SLOW_QUERY_MS:
+            fingerprint_id, query = fingerprint(sql)
+            SLOW_QUERIES.inc(fingerprint_id, query)
+            SLOW_QUERY_SECONDS.inc(fingerprint_id, query, amount=elapsed)
+        queries = _current.get()
+        if queries is not None:
+            queries.count += 1
+            queries.statements[sql] += 1
+
+
+def _labels(pairs):
+    pairs = list(pairs)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def _number(value):
+    return str(int(value)) if value == int(value) else repr(value)
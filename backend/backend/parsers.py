@@ -0,0 +1,39 @@
+"""JSON parser backed by orjson, falling back to DRF's stdlib parser."""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.mediatypes import parse_header_parameters
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """Drop-in ``JSONParser`` that decodes with orjson when it is installed.
+
+    orjson only reads UTF-8 and always rejects ``NaN``/``Infinity``; other
+    declared charsets go through the stdlib parser.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        charset = _charset(media_type, parser_context)
+        if orjson is None or charset.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            # DRF decodes with the context's encoding, not the media type's.
+            return super().parse(stream, media_type, {**parser_context, 'encoding': charset})
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def _charset(media_type, parser_context):
+    if media_type:
+        _base, params = parse_header_parameters(media_type)
+        if params.get('charset'):
+            return params['charset']
+    request = parser_context.get('request')
+    return parser_context.get('encoding') or getattr(request, 'encoding', None) or 'utf-8'
@@ -0,0 +1,222 @@
+"""Opt-in per-request profiling.
+
+With ``REQUEST_PROFILING`` on, ``RequestProfilingMiddleware`` measures each
+request's query count and time spent in the database, in serializers
+(``Serializer.data``) and in rendering, reports them in a ``Server-Timing``
+header and keeps the last ``REQUEST_PROFILING_WINDOW`` requests per endpoint
+for ``/api/admin/profiling``. Summaries are per process, so with several
+workers each answers for the requests it served.
+
+Switched off, the middleware removes itself at startup (``MiddlewareNotUsed``)
+and no hook is installed, so requests pay nothing for it.
+"""
+
+import contextvars
+import threading
+from collections import deque
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.permissions import IsAdmin
+
+_current = contextvars.ContextVar('request_profile', default=None)
+_install_lock = threading.Lock()
+_installed = False
+
+
+class Profile:
+    __slots__ = ('queries', 'db', 'serializer', 'render', '_serializing', '_render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = self.serializer = self.render = 0.0
+        self._serializing = False
+        self._render_started = None
+
+
+class EndpointSummary:
+    """The most recent requests to each endpoint, ``(total, db, serializer, render, queries)`` each."""
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, sample):
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(endpoint, deque(maxlen=self.window))
+        samples.append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples = {}
+
+    def report(self):
+        rows = []
+        for endpoint, samples in list(self._samples.items()):
+            samples = list(samples)
+            if not samples:
+                continue
+            total, db, serializer, render, queries = (sorted(column) for column in zip(*samples))
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(samples),
+                'totalMs': _percentiles(total),
+                'dbMs': _percentiles(db),
+                'serializerMs': _percentiles(serializer),
+                'renderMs': _percentiles(render),
+                'queriesPerRequest': round(sum(queries) / len(queries), 2),
+                'maxQueries': queries[-1],
+            })
+        return sorted(rows, key=lambda row: row['totalMs']['p95'], reverse=True)
+
+
+summary = EndpointSummary(window=1000)
+
+
+class RequestProfilingMiddleware:
+    """Time each request's database, serializer and render phases; see the module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        summary.window = settings.REQUEST_PROFILING_WINDOW
+        install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile = Profile()
+        token = _current.set(profile)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, (perf_counter() - started) * 1000, profile)
+
+    async def __acall__(self, request):
+        profile = Profile()
+        token = _current.set(profile)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, (perf_counter() - started) * 1000, profile)
+
+    def report(self, request, response, total, profile):
+        db, serializer, render = profile.db * 1000, profile.serializer * 1000, profile.render * 1000
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={db:.1f};desc="{profile.queries} queries"',
+            f'serialize;dur={serializer:.1f}',
+            f'render;dur={render:.1f}',
+            f'total;dur={total:.1f}',
+        ])
+        match = request.resolver_match
+        if match is not None:
+            summary.add(f'{request.method} /{match.route}', (total, db, serializer, render, profile.queries))
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after this hook returns; the callback stops the clock.
+        profile = _current.get()
+        if profile is not None:
+            profile._render_started = perf_counter()
+            response.add_post_render_callback(lambda rendered: _rendered(profile))
+        return response
+
+
+class ProfilingSummaryView(APIView):
+    """p50/p95/p99 timings and queries per request for each endpoint; ``DELETE`` resets them."""
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.REQUEST_PROFILING,
+            'window': summary.window,
+            'endpoints': summary.report(),
+        })
+
+    def delete(self, request):
+        summary.clear()
+        return Response(status=204)
+
+
+def install():
+    """Hook database execution and ``Serializer.data``; once per process."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        for cls in (serializers.Serializer, serializers.ListSerializer):
+            cls.data = property(_timed_data(cls.data.fget))
+        connection_created.connect(_wrap_connection)
+        for connection in connections.all(initialized_only=True):
+            _wrap_connection(connection=connection)
+        _installed = True
+
+
+def _wrap_connection(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _time_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db += perf_counter() - started
+        profile.queries += 1
+
+
+def _timed_data(fget):
+    def data(self):
+        profile = _current.get()
+        # Nested serializers run inside their parent's timing.
+        if profile is None or profile._serializing:
+            return fget(self)
+        profile._serializing = True
+        started = perf_counter()
+        try:
+            return fget(self)
+        finally:
+            profile.serializer += perf_counter() - started
+            profile._serializing = False
+
+    return data
+
+
+def _rendered(profile):
+    if profile._render_started is not None:
+        profile.render += perf_counter() - profile._render_started
+        profile._render_started = None
+
+
+def _percentiles(ordered):
+    def nearest_rank(percent):
+        return round(ordered[max(0, -(-len(ordered) * percent // 100) - 1)], 2)
+
+    return {'p50': nearest_rank(50), 'p95': nearest_rank(95), 'p99': nearest_rank(99)}
@@ -0,0 +1,49 @@
+"""JSON renderer backed by orjson, falling back to DRF's stdlib renderer."""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# DRF's encoder handles whatever orjson does not (or should not) encode itself.
+_encoder = JSONEncoder()
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in ``JSONRenderer`` that encodes with orjson when it is installed.
+
+    Output is the same as DRF's compact, unicode renderer: datetimes, times and
+    Decimals go through DRF's encoder (so UTC is written as ``Z`` and Decimals
+    as numbers), UUIDs and dates are encoded natively, and U+2028/U+2029 are
+    escaped. Floats are where the two differ:
+
+    - exponents have no ``+`` sign or leading zero (``1e16`` and ``1.5e-7``
+      where DRF writes ``1e+16`` and ``1.5e-07``); both parse to the same
+      value, but the bytes, and so ETags over them, differ;
+    - NaN and infinities become ``null`` instead of raising ``ValueError``
+      under ``STRICT_JSON``.
+
+    The API renders money as Decimals, so only floats a view builds itself
+    are affected. Indented or ASCII-only output uses the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits; the stdlib encoder copes.
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
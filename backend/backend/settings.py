@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -54,8 +55,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
+    'backend.profiling.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, able to sit in an async chain under ASGI.
+    'backend.static.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -93,20 +97,62 @@ if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.parse(
             DATABASE_URL,
-            conn_max_age=600,
+            # Ignored when the pool below is on. Without it, persistent
+            # connections are per thread; under ASGI, where requests run their
+            # queries on fresh threads, set DJANGO_CONN_MAX_AGE=0.
+            conn_max_age=int(os.getenv('DJANGO_CONN_MAX_AGE', '600')),
             ssl_require=not DEBUG,
         )
     }
+    # PostgreSQL connections come from a per-process pool (psycopg 3) and go
+    # back to it at the end of each request, which is safe under ASGI too.
+    # A max size of 0 turns pooling off.
+    DB_POOL_MAX_SIZE = int(os.getenv('DJANGO_DB_POOL_MAX_SIZE', '10'))
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and DB_POOL_MAX_SIZE > 0:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.getenv('DJANGO_DB_POOL_MIN_SIZE', '2')),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.getenv('DJANGO_DB_POOL_TIMEOUT', '10')),
+        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Take the write lock at BEGIN so concurrent booking writers queue
+                # on the busy timeout instead of failing with "database is locked".
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+            # An on-disk test database behaves like production SQLite under
+            # concurrent connections; the in-memory shared cache does not.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Local memory is per process, so production defaults to a file cache that
+# every gunicorn worker on the host shares (and sees invalidations in).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache' if DEBUG
+            else 'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', str(Path(tempfile.gettempdir()) / 'nch-cache')),
+    }
+}
+
+ROOM_CATALOG_CACHE_TIMEOUT = int(os.getenv('ROOM_CATALOG_CACHE_TIMEOUT', '300'))
+
+# How long an authenticated user's active flag and role may be served from
+# cache before it is re-read from the database.
+AUTH_PRINCIPAL_CACHE_TIMEOUT = int(os.getenv('AUTH_PRINCIPAL_CACHE_TIMEOUT', '30'))
+
 _cors_origins = os.getenv('CORS_ALLOWED_ORIGINS')
 if _cors_origins:
     CORS_ALLOWED_ORIGINS = [o.strip() for o in _cors_origins.split(',') if o.strip()]
@@ -127,13 +173,56 @@ else:
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # orjson-backed JSON; both fall back to the stdlib when orjson is missing.
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'backend.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Per client, for views that set ``throttle_scope``; counts live in the cache.
+    'DEFAULT_THROTTLE_RATES': {
+        # A reference and email pair is all a guest lookup needs, so keep
+        # guessing slow.
+        'booking-lookup': os.getenv('BOOKING_LOOKUP_THROTTLE_RATE', '10/minute'),
+    },
 }
 
+# Booking lists are cursor-paginated; the legacy flag keeps the bare list
+# response for clients that have not moved to ``{next, results}`` yet.
+BOOKINGS_PAGE_SIZE = int(os.getenv('BOOKINGS_PAGE_SIZE', '50'))
+BOOKINGS_LEGACY_LIST_RESPONSE = os.getenv('BOOKINGS_LEGACY_LIST_RESPONSE', 'false').lower() == 'true'
+
+# Unpaid PENDING bookings, other than cash ones paid at the hotel, hold their
+# room this long before the sweeper cancels them (0, the default, keeps holds
+# forever). A positive interval, in seconds, runs the sweeper in every gunicorn
+# worker; otherwise run ``manage.py expire_holds``.
+BOOKING_HOLD_TTL_MINUTES = int(os.getenv('BOOKING_HOLD_TTL_MINUTES', '0'))
+BOOKING_HOLD_SWEEP_INTERVAL = int(os.getenv('BOOKING_HOLD_SWEEP_INTERVAL', '0'))
+
+# Server-Timing headers and per-endpoint latency summaries at
+# /api/admin/profiling, over the last WINDOW requests per endpoint.
+REQUEST_PROFILING = os.getenv('DJANGO_REQUEST_PROFILING', 'false').lower() == 'true'
+REQUEST_PROFILING_WINDOW = int(os.getenv('DJANGO_REQUEST_PROFILING_WINDOW', '1000'))
+
+# Prometheus metrics at /metrics, on by default outside DEBUG. Each worker
+# writes its own file in METRICS_DIR and a scrape sums them, so the directory
+# must be shared by the workers on a host. With METRICS_TOKEN set, scrapes
+# must send it as a bearer token.
+METRICS_ENABLED = os.getenv('DJANGO_METRICS_ENABLED', 'false' if DEBUG else 'true').lower() == 'true'
+METRICS_DIR = os.getenv('DJANGO_METRICS_DIR', str(Path(tempfile.gettempdir()) / 'nch-metrics'))
+METRICS_TOKEN = os.getenv('DJANGO_METRICS_TOKEN', '')
+METRICS_SLOW_QUERY_MS = int(os.getenv('DJANGO_METRICS_SLOW_QUERY_MS', '100'))
+METRICS_REPEATED_QUERY_THRESHOLD = int(os.getenv('DJANGO_METRICS_REPEATED_QUERY_THRESHOLD', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
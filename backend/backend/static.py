@@ -0,0 +1,57 @@
+"""WhiteNoise static file serving that also runs in an async middleware chain.
+
+``WhiteNoiseMiddleware`` is sync-only, so under ASGI Django adapts it with
+``async_to_sync`` and every request below it, async views included, is run
+in a worker thread. ``StaticFilesMiddleware`` serves the same files with the
+same headers, but awaits the rest of the chain when it is async and streams
+files through an async iterator.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+
+        served = static_file.get_response(request.method, request.META)
+        if served.file is None:
+            response = HttpResponse(status=int(served.status))
+        else:
+            response = StreamingHttpResponse(_chunks(served.file), status=int(served.status))
+        del response['Content-Type']
+        for key, value in served.headers:
+            response[key] = value
+        return response
+
+
+async def _chunks(file):
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while chunk := await read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('backend.api_urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
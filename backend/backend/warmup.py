@@ -0,0 +1,92 @@
+"""First-request work done before a server process takes traffic.
+
+A fresh worker otherwise pays, on its first requests, for importing every
+serializer and view module, compiling the URL patterns, DRF's lazy imports
+of its renderers, parsers and authentication classes, connecting to the
+database (and filling its connection pool) and building this year's rate
+table. ``warm_up()`` does all of that up front; the gunicorn config calls it
+from each worker after the fork, since database connections must not be
+shared with the master.
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import date
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from rest_framework.settings import api_settings
+
+from rooms import rates
+
+APP_MODULES = ('serializers', 'views', 'permissions', 'signals')
+POOL_WAIT_SECONDS = 10
+
+
+def warm_up(database=True):
+    """Run every step; returns ``{step: seconds}``. ``database=False`` skips the steps that connect."""
+    timings = {}
+    with _timed(timings, 'imports'):
+        import_app_modules()
+    with _timed(timings, 'urls'):
+        compile_urls()
+    if database:
+        with _timed(timings, 'database'):
+            open_connections()
+        with _timed(timings, 'rates'):
+            build_rates()
+    return timings
+
+
+def import_app_modules():
+    for app_config in apps.get_app_configs():
+        for name in APP_MODULES:
+            module = f'{app_config.name}.{name}'
+            try:
+                import_module(module)
+            except ModuleNotFoundError as exc:
+                if exc.name != module:
+                    raise
+    # DRF imports the classes named in its settings on first access.
+    for setting in api_settings.import_strings:
+        getattr(api_settings, setting)
+
+
+def compile_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 - populates the whole tree
+    _compile(resolver)
+
+
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            pool.wait(timeout=POOL_WAIT_SECONDS)
+        # Pooled connections go back to the pool; persistent ones stay open
+        # for the request thread of a sync worker.
+        if not connection.settings_dict['CONN_MAX_AGE'] and not connection.in_atomic_block:
+            connection.close()
+
+
+def build_rates():
+    rates.year_rates(date.today().year)
+
+
+def _compile(resolver):
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # noqa: B018 - compiled on first access
+        if isinstance(pattern, URLResolver):
+            _compile(pattern)
+
+
+@contextmanager
+def _timed(timings, step):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[step] = time.perf_counter() - started
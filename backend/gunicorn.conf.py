@@ -0,0 +1,126 @@
+"""Gunicorn settings for production: ``gunicorn -c gunicorn.conf.py``.
+
+The app is served over ASGI by uvicorn workers, one per CPU the container
+may use, capped by how many ``GUNICORN_WORKER_MEMORY_MB`` workers fit in its
+memory limit (``WEB_CONCURRENCY`` overrides the count). The app is loaded
+in the master before forking, so workers share its imported code, and each
+worker runs ``backend.warmup`` (database connections, its pool and the rate
+table) before it accepts a connection. With ``BOOKING_HOLD_SWEEP_INTERVAL``
+set, each worker also starts the booking hold sweeper.
+
+Every worker keeps its own database pool of up to ``DJANGO_DB_POOL_MAX_SIZE``
+connections, so workers x that size must fit the server's ``max_connections``.
+"""
+
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+wsgi_app = os.getenv('GUNICORN_APP', 'backend.asgi:application')
+bind = os.getenv('GUNICORN_BIND') or f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+
+WARMUP = os.getenv('GUNICORN_WARMUP', 'true').lower() == 'true'
+WORKER_MEMORY_MB = int(os.getenv('GUNICORN_WORKER_MEMORY_MB', '160'))
+# Left to the master, the OS and anything else in the container.
+RESERVED_MEMORY_MB = int(os.getenv('GUNICORN_RESERVED_MEMORY_MB', '96'))
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return handle.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit():
+    """CPUs this process may use: its affinity, lowered by a cgroup CPU quota (rounded up)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _read('/sys/fs/cgroup/cpu.max')  # cgroup v2: "<quota> <period>" or "max <period>"
+    if quota:
+        limit, _sep, period = quota.partition(' ')
+        if limit != 'max':
+            return max(1, min(cpus, -(-int(limit) // int(period))))
+        return cpus
+    limit, period = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us'), _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    if limit and period and int(limit) > 0:
+        return max(1, min(cpus, -(-int(limit) // int(period))))
+    return cpus
+
+
+def memory_limit_mb():
+    """The container's memory limit, or the machine's memory when there is none."""
+    physical = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        limit = _read(path)
+        if limit and limit != 'max':
+            physical = min(physical, int(limit))
+            break
+    return physical // (1024 * 1024)
+
+
+def worker_count():
+    if os.getenv('WEB_CONCURRENCY'):
+        return max(1, int(os.environ['WEB_CONCURRENCY']))
+    # Async workers use a CPU each; sync workers also spend time blocked on I/O.
+    by_cpu = cpu_limit() if 'uvicorn' in worker_class else 2 * cpu_limit() + 1
+    by_memory = (memory_limit_mb() - RESERVED_MEMORY_MB) // WORKER_MEMORY_MB
+    return max(1, min(by_cpu, by_memory))
+
+
+workers = worker_count()
+
+
+def on_starting(server):
+    from backend import metrics
+
+    # Counters start again with the server rather than summing old workers' files.
+    metrics.reset()
+    if preload_app and WARMUP:
+        from backend import warmup
+
+        # Imports and URL patterns once, in the master, for every worker to inherit.
+        timings = warmup.warm_up(database=False)
+        server.log.info('Warmed up the master: %s', _format(timings))
+
+
+def pre_fork(server, worker):
+    if not preload_app:
+        return
+    from django.db import connections
+
+    # Nothing the master opened may be shared with a worker.
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    from bookings import holds
+
+    # After the fork: a thread started in the master would not survive it.
+    if holds.start_sweeper():
+        worker.log.info('Worker %s sweeps stale booking holds', worker.pid)
+    if not WARMUP:
+        return
+    from backend import warmup
+
+    try:
+        timings = warmup.warm_up()
+    except Exception:
+        # A cold worker still serves; the first requests just pay for it.
+        worker.log.exception('Warmup failed')
+        return
+    worker.log.info('Worker %s warmed up: %s', worker.pid, _format(timings))
+
+
+def _format(timings):
+    return ', '.join(f'{step} {seconds * 1000:.0f} ms' for step, seconds in timings.items())
+
@@ -1,10 +1,40 @@
 from django.contrib import admin
 
-from .models import Booking
+from . import search
+from .models import Booking, BookingEvent
 
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('reference', 'room', 'check_in', 'check_out', 'status', 'payment_status', 'payment_method', 'created_at')
     list_filter = ('status', 'payment_status', 'payment_method')
-    search_fields = ('reference', 'guest_email', 'guest_phone')
+    list_select_related = ('room',)
+    search_fields = ('search_key',)
+    search_help_text = 'Guest name, email, phone or booking reference'
+    # Skip the unfiltered COUNT(*) shown next to filtered results.
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # The normalized search key instead of icontains over several columns.
+        if not search_term.strip():
+            return queryset, False
+        condition = search.matches(search_term)
+        return (queryset.filter(condition) if condition is not None else queryset.none()), False
+
+
+@admin.register(BookingEvent)
+class BookingEventAdmin(admin.ModelAdmin):
+    list_display = ('booking', 'occurred_at', 'source', 'actor', 'status', 'payment_status', 'amount_paid')
+    list_filter = ('source', 'status')
+    list_select_related = ('booking', 'actor')
+    raw_id_fields = ('booking', 'actor')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
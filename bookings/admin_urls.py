@@ -1,8 +1,22 @@
 from django.urls import path
 
-from .views import AdminBookingsView, AdminBookingDetailView
+from .views import (
+    AdminBookingDetailView,
+    AdminBookingExportView,
+    AdminBookingHistoryView,
+    AdminBookingsView,
+    AdminCalendarView,
+    AdminOccupancyReportView,
+)
 
 urlpatterns = [
     path('bookings', AdminBookingsView.as_view(), name='admin-bookings'),
+    path('bookings/export.csv', AdminBookingExportView.as_view(), {'export_format': 'csv'}, name='admin-bookings-export-csv'),
+    path(
+        'bookings/export.jsonl', AdminBookingExportView.as_view(), {'export_format': 'jsonl'}, name='admin-bookings-export-jsonl'
+    ),
     path('bookings/<uuid:pk>', AdminBookingDetailView.as_view(), name='admin-booking-detail'),
+    path('bookings/<uuid:pk>/history', AdminBookingHistoryView.as_view(), name='admin-booking-history'),
+    path('calendar', AdminCalendarView.as_view(), name='admin-calendar'),
+    path('reports/occupancy', AdminOccupancyReportView.as_view(), name='admin-occupancy-report'),
 ]
@@ -0,0 +1,70 @@
+"""Rooms x nights occupancy grid for the reception and admin dashboards.
+
+Each room row is a Python int used as a bitset: bit ``i`` is set when night
+``start + i`` is occupied. Booking intervals are OR-ed in as whole masks, so
+building the grid costs one operation per booking rather than one per cell.
+"""
+
+from datetime import timedelta
+
+from .models import BookingStatus
+
+# Statuses drawn on the grid; a run's status is its index in this tuple.
+GRID_STATUSES = (
+    BookingStatus.PENDING,
+    BookingStatus.CONFIRMED,
+    BookingStatus.CHECKED_IN,
+    BookingStatus.CHECKED_OUT,
+)
+_STATUS_INDEX = {status: index for index, status in enumerate(GRID_STATUSES)}
+
+
+def build_grid(rooms, bookings, start, nights):
+    """Build the occupancy grid for ``nights`` nights from ``start``.
+
+    ``rooms`` is a sequence of ``(id, name)`` and ``bookings`` an iterable of
+    ``(room_id, check_in, check_out, status)``. Every room is returned with its
+    occupancy bitmap as hex and its run-length encoded stays as
+    ``[offset, length, status_index]``; ``occupancy`` counts occupied rooms per
+    night.
+    """
+    row_of = {room_id: row for row, (room_id, _name) in enumerate(rooms)}
+    bitmaps = [0] * len(rooms)
+    runs = [[] for _ in rooms]
+
+    for room_id, check_in, check_out, status in bookings:
+        row = row_of.get(room_id)
+        status_index = _STATUS_INDEX.get(status)
+        if row is None or status_index is None:
+            continue
+        first = max((check_in - start).days, 0)
+        last = min((check_out - start).days, nights)
+        if last <= first:
+            continue
+        length = last - first
+        bitmaps[row] |= ((1 << length) - 1) << first
+        runs[row].append([first, length, status_index])
+
+    occupancy = [0] * nights
+    for bitmap in bitmaps:
+        while bitmap:
+            lowest = bitmap & -bitmap
+            occupancy[lowest.bit_length() - 1] += 1
+            bitmap ^= lowest
+
+    return {
+        'start': start,
+        'end': start + timedelta(days=nights),
+        'nights': nights,
+        'statuses': list(GRID_STATUSES),
+        'occupancy': occupancy,
+        'rooms': [
+            {
+                'id': room_id,
+                'name': name,
+                'bitmap': format(bitmap, 'x'),
+                'runs': sorted(room_runs),
+            }
+            for (room_id, name), bitmap, room_runs in zip(rooms, bitmaps, runs)
+        ],
+    }
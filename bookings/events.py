@@ -0,0 +1,138 @@
+"""Append-only history of booking status and payment changes.
+
+Model signals call ``record()`` for every saved change to ``EVENT_FIELDS``;
+paths that bypass signals (``bulk_create``, ``QuerySet.update``) call it
+themselves. Events are buffered per transaction (per savepoint, strictly)
+and written with one ``bulk_create`` when it commits, so a request pays for
+one extra insert however many bookings it touches, and rolled back work
+leaves no events behind. Outside a transaction they are written at once.
+
+Views say who acted with ``acting(user, source)``; anything else is
+recorded with ``source='save'`` and no actor.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import partial
+from weakref import WeakValueDictionary
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .models import BookingEvent
+
+EVENT_FIELDS = ('status', 'payment_status', 'payment_method', 'amount_paid')
+
+_context = contextvars.ContextVar('booking_event_context', default=(None, 'save'))
+
+
+@contextmanager
+def acting(user=None, source='save'):
+    """Attribute events recorded inside the block to ``user`` and ``source``."""
+    actor_id = user.pk if user is not None and user.is_authenticated else None
+    token = _context.set((actor_id, source))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def state(booking):
+    """``EVENT_FIELDS`` of ``booking`` as loaded, or ``None`` if any were deferred."""
+    values = booking.__dict__
+    if any(field not in values for field in EVENT_FIELDS):
+        return None
+    return tuple(values[field] for field in EVENT_FIELDS)
+
+
+def record(booking_id, before, after, source=None, using=DEFAULT_DB_ALIAS):
+    """Queue an event for ``booking_id`` moving from state ``before`` (``None`` if new) to ``after``.
+
+    Does nothing when no field changed.
+    """
+    event = _event(booking_id, before, after, source, timezone.now())
+    if event is not None:
+        _queue([event], using)
+
+
+def record_many(changes, source=None, using=DEFAULT_DB_ALIAS):
+    """``record()`` for many ``(booking_id, before, after)`` triples at once."""
+    now = timezone.now()
+    events = [_event(booking_id, before, after, source, now) for booking_id, before, after in changes]
+    _queue([event for event in events if event is not None], using)
+
+
+def replay(events, at=None):
+    """Fold ``events`` (oldest first) up to ``at`` into the booking state they describe.
+
+    Returns ``None`` when the booking had no recorded state by then.
+    """
+    current = None
+    for event in events:
+        if at is not None and event.occurred_at > at:
+            break
+        current = dict(current or {})
+        for field, (_before, after) in event.changes.items():
+            current[field] = after
+        current.update({'asOf': event.occurred_at, 'lastEventId': event.pk})
+    return current
+
+
+def _event(booking_id, before, after, source, occurred_at):
+    changes = {
+        field: [_json(field, old), _json(field, new)]
+        for field, old, new in zip(EVENT_FIELDS, before or (None,) * len(EVENT_FIELDS), after)
+        if before is None or _normalize(field, old) != _normalize(field, new)
+    }
+    if not changes:
+        return None
+    actor_id, default_source = _context.get()
+    return BookingEvent(
+        booking_id=booking_id,
+        occurred_at=occurred_at,
+        source=source or default_source,
+        actor_id=actor_id,
+        changes=changes,
+        **dict(zip(EVENT_FIELDS, after)),
+    )
+
+
+def _queue(events, using):
+    if not events:
+        return
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        BookingEvent.objects.using(using).bulk_create(events)
+        return
+    # One buffer per open atomic block, flushed by the one on_commit callback
+    # registered with it. Only Django keeps the callback alive, so the weak
+    # entry disappears when a rollback discards it, and a flush removes its
+    # own entry; either way the next event starts a new buffer.
+    buffers = connection.__dict__.setdefault('_booking_events', WeakValueDictionary())
+    key = tuple(connection.savepoint_ids)
+    flush = buffers.get(key)
+    if flush is None:
+        flush = buffers[key] = partial(_flush, key, [], using)
+        transaction.on_commit(flush, using=using, robust=True)
+    flush.args[1].extend(events)
+
+
+def _flush(key, buffer, using):
+    buffers = connections[using].__dict__.get('_booking_events', {})
+    pending = buffers.get(key)
+    if pending is not None and pending.args[1] is buffer:
+        del buffers[key]
+    events, buffer[:] = list(buffer), []
+    BookingEvent.objects.using(using).bulk_create(events)
+
+
+def _normalize(field, value):
+    if field == 'amount_paid' and value is not None:
+        return Decimal(value).quantize(Decimal('0.01'))
+    return value
+
+
+def _json(field, value):
+    value = _normalize(field, value)
+    return str(value) if isinstance(value, Decimal) else value
@@ -0,0 +1,117 @@
+"""Expiry of abandoned booking holds.
+
+A new booking is an unpaid ``PENDING`` hold on its room. Holds still unpaid
+after ``BOOKING_HOLD_TTL_MINUTES`` (0, the default, disables expiry) are
+cancelled in batches: each batch is
+one short transaction that selects up to ``batch_size`` holds along
+``booking_pending_created_idx``, cancels them with a single ``UPDATE``,
+releases their room nights, moves their daily stats and logs their events,
+so availability never lags behind. Batches keep the write lock brief, and on
+PostgreSQL rows another transaction holds are skipped rather than waited for.
+Cash bookings are paid at the hotel and stay ``PENDING`` until the guest
+arrives, so they are never expired.
+
+Run it from cron with ``manage.py expire_holds``, keep it running with
+``manage.py expire_holds --interval N``, or set ``BOOKING_HOLD_SWEEP_INTERVAL``
+to sweep from every gunicorn worker (see ``gunicorn.conf.py``).
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import events, inventory, stats
+from .models import Booking, BookingStatus, PaymentMethod, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+_STATUS = stats.STATE_FIELDS.index('status')
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def stale_holds(now=None):
+    """Unpaid ``PENDING`` bookings, other than pay-at-hotel ones, created before the hold TTL ran out."""
+    cutoff = (now or timezone.now()) - timedelta(minutes=settings.BOOKING_HOLD_TTL_MINUTES)
+    return Booking.objects.filter(
+        status=BookingStatus.PENDING, payment_status=PaymentStatus.UNPAID, created_at__lt=cutoff
+    ).exclude(payment_method=PaymentMethod.CASH)
+
+
+def expire_stale_holds(now=None, batch_size=BATCH_SIZE):
+    """Cancel every stale hold, ``batch_size`` at a time. Returns how many were cancelled.
+
+    A TTL of zero or less disables expiry.
+    """
+    if settings.BOOKING_HOLD_TTL_MINUTES <= 0:
+        return 0
+    holds = stale_holds(now).order_by('created_at')
+    expired = 0
+    while True:
+        with transaction.atomic():
+            rows = list(holds.select_for_update(skip_locked=True).values_list('pk', *stats.STATE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            expired += Booking.objects.filter(pk__in=ids, status=BookingStatus.PENDING).update(
+                status=BookingStatus.CANCELLED, updated_at=timezone.now()
+            )
+            # QuerySet.update sends no signals, so the derived tables follow here.
+            inventory.release_bookings(ids)
+            removed = [row[1:] for row in rows]
+            stats.record(
+                removed=removed,
+                added=[(*state[:_STATUS], BookingStatus.CANCELLED, *state[_STATUS + 1:]) for state in removed],
+            )
+            events.record_many(
+                [
+                    (
+                        pk,
+                        (BookingStatus.PENDING, PaymentStatus.UNPAID, payment_method, amount_paid),
+                        (BookingStatus.CANCELLED, PaymentStatus.UNPAID, payment_method, amount_paid),
+                    )
+                    for pk, _room_id, _check_in, _check_out, _status, payment_method, amount_paid in rows
+                ],
+                source='hold_expiry',
+            )
+        if len(rows) < batch_size:
+            break
+    return expired
+
+
+def start_sweeper(interval=None):
+    """Expire stale holds every ``interval`` seconds on a daemon thread; once per process.
+
+    Returns the thread, or ``None`` when the interval or the hold TTL is zero or less.
+    """
+    global _sweeper
+    interval = settings.BOOKING_HOLD_SWEEP_INTERVAL if interval is None else interval
+    if interval <= 0 or settings.BOOKING_HOLD_TTL_MINUTES <= 0:
+        return None
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = threading.Thread(target=sweep_forever, args=(interval,), name='booking-hold-sweeper', daemon=True)
+            _sweeper.start()
+    return _sweeper
+
+
+def sweep_forever(interval, batch_size=BATCH_SIZE):
+    """Expire stale holds every ``interval`` seconds until the process exits."""
+    while True:
+        time.sleep(interval)
+        try:
+            expired = expire_stale_holds(batch_size=batch_size)
+            if expired:
+                logger.info('Expired %d stale booking holds', expired)
+        except Exception:
+            logger.exception('Expiring stale booking holds failed')
+        finally:
+            close_old_connections()
@@ -0,0 +1,153 @@
+"""Per-room, per-night occupancy inventory derived from bookings.
+
+Every active booking is materialized as one ``RoomNight`` row per night of
+the stay, so "is this room free" is a probe on the ``(room, night)`` index
+rather than an overlap scan over ``bookings_booking``.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import ACTIVE_STATUSES, Booking, RoomNight
+
+# Booking fields whose change can move the nights a booking occupies.
+TRACKED_FIELDS = frozenset({'room', 'room_id', 'check_in', 'check_out', 'status'})
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def stay_nights(check_in, check_out):
+    """Return the nights of a stay: ``check_in`` up to, not including, ``check_out``."""
+    return [check_in + timedelta(days=offset) for offset in range((check_out - check_in).days)]
+
+
+def night_rows(booking_id, room_id, check_in, check_out):
+    return [
+        RoomNight(booking_id=booking_id, room_id=room_id, night=night)
+        for night in stay_nights(check_in, check_out)
+    ]
+
+
+def booking_nights(booking):
+    """Return the unsaved ``RoomNight`` rows ``booking`` should occupy."""
+    if booking.status not in ACTIVE_STATUSES:
+        return []
+    return night_rows(booking.pk, booking.room_id, booking.check_in, booking.check_out)
+
+
+def sync_booking(booking, created=False):
+    """Make the stored nights of ``booking`` match its current room, dates and status."""
+    rows = booking_nights(booking)
+    with transaction.atomic():
+        if not created:
+            RoomNight.objects.filter(booking_id=booking.pk).delete()
+        if rows:
+            RoomNight.objects.bulk_create(rows)
+
+
+def release_bookings(booking_ids):
+    """Drop the nights held by ``booking_ids``, e.g. after a bulk status update."""
+    return RoomNight.objects.filter(booking_id__in=list(booking_ids)).delete()[0]
+
+
+def is_room_available(room_id, check_in, check_out):
+    return not occupied_nights(check_in, check_out).filter(room_id=room_id).exists()
+
+
+def taken_nights(stays):
+    """Return the ``(room_id, night)`` pairs already occupied within ``stays``.
+
+    ``stays`` are ``(room_id, check_in, check_out)`` tuples; they are all
+    checked with a single query.
+    """
+    condition = Q()
+    for room_id, check_in, check_out in stays:
+        condition |= Q(room_id=room_id, night__gte=check_in, night__lt=check_out)
+    if not condition:
+        return set()
+    return set(RoomNight.objects.filter(condition).values_list('room_id', 'night'))
+
+
+async def ais_room_available(room_id, check_in, check_out):
+    return not await occupied_nights(check_in, check_out).filter(room_id=room_id).aexists()
+
+
+def occupied_nights(check_in, check_out):
+    return RoomNight.objects.filter(night__gte=check_in, night__lt=check_out)
+
+
+def exclude_occupied(rooms, check_in, check_out):
+    """Anti-join a ``Room`` queryset against the nights taken in the stay window."""
+    return rooms.exclude(Exists(occupied_nights(check_in, check_out).filter(room_id=OuterRef('pk'))))
+
+
+def _active_bookings():
+    # Oldest first: when stays overlap, the booking made first keeps the night.
+    return (
+        Booking.objects.filter(status__in=ACTIVE_STATUSES)
+        .values_list('pk', 'room_id', 'check_in', 'check_out')
+        .order_by('created_at', 'pk')
+    )
+
+
+def _claims():
+    """Yield ``(booking_id, room_id, night, holder_id)`` for every night of every active booking.
+
+    ``holder_id`` is the booking that holds the night: ``booking_id`` itself,
+    or an older booking whose stay overlaps it.
+    """
+    holders = {}
+    for booking_id, room_id, check_in, check_out in _active_bookings().iterator(chunk_size=REBUILD_BATCH_SIZE):
+        for night in stay_nights(check_in, check_out):
+            yield booking_id, room_id, night, holders.setdefault((room_id, night), booking_id)
+
+
+def rebuild():
+    """Recreate the whole inventory from the bookings table.
+
+    Returns ``(created, conflicts)``: the row count, and the
+    ``(booking_id, room_id, night, holder_id)`` nights left out because an
+    older overlapping booking already holds them.
+    """
+    created = 0
+    conflicts = set()
+    with transaction.atomic():
+        RoomNight.objects.all().delete()
+        batch = []
+        for booking_id, room_id, night, holder_id in _claims():
+            if holder_id != booking_id:
+                conflicts.add((booking_id, room_id, night, holder_id))
+                continue
+            batch.append(RoomNight(booking_id=booking_id, room_id=room_id, night=night))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                RoomNight.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            RoomNight.objects.bulk_create(batch)
+            created += len(batch)
+    return created, conflicts
+
+
+def verify():
+    """Compare the inventory with the bookings.
+
+    Returns ``(missing, unexpected, conflicts)``: sets of
+    ``(booking_id, room_id, night)`` that should exist but don't, rows that
+    exist but shouldn't, and the ``(booking_id, room_id, night, holder_id)``
+    nights of overlapping bookings that only their older ``holder_id`` can hold.
+    """
+    expected = set()
+    conflicts = set()
+    for booking_id, room_id, night, holder_id in _claims():
+        if holder_id == booking_id:
+            expected.add((booking_id, room_id, night))
+        else:
+            conflicts.add((booking_id, room_id, night, holder_id))
+
+    actual = set(
+        RoomNight.objects.values_list('booking_id', 'room_id', 'night').order_by().iterator(chunk_size=REBUILD_BATCH_SIZE)
+    )
+    return expected - actual, actual - expected, conflicts
@@ -0,0 +1,50 @@
+"""Per-room write locks for booking creation.
+
+Creating a booking is check-then-insert, so two requests for the same room
+must not interleave. On databases with ``SELECT ... FOR UPDATE`` the room
+rows themselves are the locks. SQLite has no row locks, so a process-local
+lock per room stands in for local runs. Either way, requests for different
+rooms never wait on each other's room locks.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+from rooms.models import Room
+
+_registry_lock = threading.Lock()
+_room_locks = {}
+
+
+def _local_lock(room_id):
+    with _registry_lock:
+        return _room_locks.setdefault(room_id, threading.Lock())
+
+
+@contextmanager
+def locked_rooms(room_ids):
+    """Open a transaction that holds an exclusive lock on every room in ``room_ids``.
+
+    Yields the set of room ids that exist. Rooms are locked in id order so
+    callers locking several rooms cannot deadlock each other.
+    """
+    room_ids = sorted(set(room_ids))
+    rooms = Room.objects.filter(pk__in=room_ids).order_by('pk').values_list('pk', flat=True)
+
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            yield set(rooms.select_for_update())
+        return
+
+    locks = [_local_lock(room_id) for room_id in room_ids]
+    for lock in locks:
+        lock.acquire()
+    try:
+        # Commit before releasing, so the next holder sees this transaction's rows.
+        with transaction.atomic():
+            yield set(rooms)
+    finally:
+        for lock in reversed(locks):
+            lock.release()
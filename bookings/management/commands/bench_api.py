@@ -0,0 +1,320 @@
+import http.client
+import json
+import platform
+import random
+import re
+import statistics
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserRole
+from bookings import synthetic
+from bookings.models import Booking
+from rooms.models import Room
+
+SCENARIOS = ('availability', 'rooms', 'create', 'admin_list', 'login')
+PASSWORD = 'Bench-Pass-123!'
+ADMIN_EMAIL = f'bench-admin@{synthetic.EMAIL_DOMAIN}'
+LOGIN_EMAIL = f'bench-login@{synthetic.EMAIL_DOMAIN}'
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic hotel, replay scripted API scenarios in process or against a local server, '
+        'and write throughput, latency percentiles and queries per request to a JSON file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=300)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--bookings', type=int, default=200000)
+        parser.add_argument('--seed', type=int, default=1, help='Seeds the data set and every scenario.')
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+        parser.add_argument('--requests', type=int, default=300, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per scenario first.')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument(
+            '--url', help='Base URL of a local server using this database (e.g. http://127.0.0.1:8000); '
+            'default is in process. Queries per request are then read from Server-Timing, if profiling is on.'
+        )
+        parser.add_argument('--output', help='JSON results file (default: bench-<commit>.json).')
+        parser.add_argument('--compare', help='Earlier results file to print the changes against.')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic data afterwards.')
+        parser.add_argument('--reuse', action='store_true', help='Benchmark existing synthetic data instead of seeding.')
+
+    def handle(self, *args, **options):
+        if not options['reuse']:
+            synthetic.clear()
+            started = time.perf_counter()
+            room_ids = synthetic.seed_rooms(options['rooms'], seed=options['seed'])
+            user_ids = synthetic.seed_users(options['users'])
+            synthetic.seed_bookings(room_ids, user_ids, options['bookings'], seed=options['seed'])
+            self.stdout.write(f"Seeded {options['bookings']} bookings in {time.perf_counter() - started:.1f}s")
+        room_ids = list(Room.objects.filter(name__startswith=synthetic.ROOM_PREFIX).order_by('id').values_list('pk', flat=True))
+        if not room_ids:
+            raise CommandError('No synthetic rooms found; run without --reuse first.')
+
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        meta = self.meta(options, room_ids)
+        created = []
+        try:
+            self.create_users()
+            client = HTTPClient(options['url']) if options['url'] else InProcessClient()
+            token = client.call('POST', '/api/auth/login', {'email': ADMIN_EMAIL, 'password': PASSWORD})[2]['token']
+            results = {}
+            for name in options['scenarios']:
+                calls = build_calls(name, room_ids, options['warmup'] + options['requests'], options['seed'], token)
+                results[name] = run(client, calls[:options['warmup']], calls[options['warmup']:], options['concurrency'], created)
+                self.report(name, results[name])
+        finally:
+            # Bookings the create scenario made carry server references, not BENCH- ones.
+            for booking in Booking.objects.filter(pk__in=created):
+                booking.delete()
+            if not options['keep'] and not options['reuse']:
+                synthetic.clear()
+            else:
+                User.objects.filter(email__in=[ADMIN_EMAIL, LOGIN_EMAIL]).delete()
+
+        document = {'meta': meta, 'scenarios': results}
+        output = options['output'] or f'bench-{document["meta"]["commit"] or "unknown"}.json'
+        with open(output, 'w') as handle:
+            json.dump(document, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'\nWrote {output}'))
+
+        if options['compare']:
+            with open(options['compare']) as handle:
+                self.compare(json.load(handle), document)
+
+    def create_users(self):
+        User.objects.filter(email__in=[ADMIN_EMAIL, LOGIN_EMAIL]).delete()
+        User.objects.create_user(ADMIN_EMAIL, PASSWORD, full_name='Bench Admin', role=UserRole.ADMIN)
+        User.objects.create_user(LOGIN_EMAIL, PASSWORD, full_name='Bench Login')
+
+    def meta(self, options, room_ids):
+        return {
+            'commit': _git('rev-parse', '--short', 'HEAD'),
+            'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'createdAt': timezone.now().isoformat(),
+            'mode': 'http' if options['url'] else 'in-process',
+            'url': options['url'],
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'rooms': len(room_ids),
+            'bookings': Booking.objects.filter(reference__startswith=synthetic.REFERENCE_PREFIX).count(),
+            'seed': options['seed'],
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'concurrency': options['concurrency'],
+        }
+
+    def report(self, name, result):
+        queries = f", {result['queriesPerRequest']:.1f} queries/request" if result['queriesPerRequest'] is not None else ''
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}'))
+        self.stdout.write(
+            f"{result['requests']} requests: {result['throughput']:.1f} req/s, p50 {result['p50Ms'] or 0:.2f} ms, "
+            f"p99 {result['p99Ms'] or 0:.2f} ms{queries}, {result['errors']} errors"
+        )
+
+    def compare(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nChange since {before.get('meta', {}).get('commit') or 'baseline'}"))
+        for name, result in after['scenarios'].items():
+            previous = before.get('scenarios', {}).get(name)
+            if previous is None:
+                continue
+            changes = [
+                f"{label} {_change(previous.get(key), result[key])}"
+                for label, key in (('throughput', 'throughput'), ('p50', 'p50Ms'), ('p99', 'p99Ms'), ('queries', 'queriesPerRequest'))
+            ]
+            self.stdout.write(f"{name}: {', '.join(changes)}")
+
+
+class InProcessClient:
+    """Requests through Django's test client, counting the queries each one runs."""
+
+    def __init__(self):
+        self.host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host and not host.startswith('.')), 'localhost')
+
+    def call(self, method, path, body=None, headers=None):
+        client = APIClient(HTTP_HOST=self.host)
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = client.generic(
+                method, path, json.dumps(body) if body is not None else '', content_type='application/json',
+                headers=headers or {},
+            )
+        elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, _json(response.content), queries
+
+    def close(self):
+        connection.close()
+
+
+class HTTPClient:
+    """Keep-alive HTTP/1.1 requests to a server; one connection per thread."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self._connection = None
+
+    def call(self, method, path, body=None, headers=None):
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        payload = json.dumps(body).encode() if body is not None else None
+        started = time.perf_counter()
+        try:
+            self._connection.request(
+                method, self.prefix + path, payload, {'Content-Type': 'application/json', **(headers or {})}
+            )
+            response = self._connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        elapsed = time.perf_counter() - started
+        match = _QUERIES.search(response.getheader('Server-Timing') or '')
+        return response.status, elapsed, _json(content), int(match.group(1)) if match else None
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def copy(self):
+        clone = HTTPClient.__new__(HTTPClient)
+        clone.host, clone.port, clone.prefix, clone._connection = self.host, self.port, self.prefix, None
+        return clone
+
+
+def build_calls(name, room_ids, count, seed, token):
+    """``count`` requests for scenario ``name``, the same for the same seed and data set."""
+    rng = random.Random(f'{seed}:{name}')
+    today = date.today()
+    admin = {'Authorization': f'Bearer {token}'}
+    calls = []
+    for index in range(count):
+        if name == 'availability':
+            check_in = today + timedelta(days=rng.randint(-60, 300))
+            body = {'roomId': rng.choice(room_ids), 'checkIn': check_in.isoformat(),
+                    'checkOut': (check_in + timedelta(days=rng.randint(1, 5))).isoformat()}
+            calls.append(('POST', '/api/rooms/check-availability', body, None))
+        elif name == 'rooms':
+            calls.append(('GET', '/api/rooms', None, None))
+        elif name == 'create':
+            # Past the seeded span, one room per request and then the next free dates.
+            check_in = date(today.year + 5, 1, 1) + timedelta(days=3 * (index // len(room_ids)))
+            body = {
+                'roomId': room_ids[index % len(room_ids)], 'checkIn': check_in.isoformat(),
+                'checkOut': (check_in + timedelta(days=2)).isoformat(),
+                'guestInfo': {'firstName': 'Bench', 'lastName': f'Guest {index}', 'email': f'create{index}@{synthetic.EMAIL_DOMAIN}'},
+            }
+            calls.append(('POST', '/api/bookings/', body, None))
+        elif name == 'admin_list':
+            params = rng.choice(['', '?status=CONFIRMED', '?q=bench', f'?room={rng.choice(room_ids)}'])
+            calls.append(('GET', f'/api/admin/bookings{params}', None, admin))
+        elif name == 'login':
+            calls.append(('POST', '/api/auth/login', {'email': LOGIN_EMAIL, 'password': PASSWORD}, None))
+    return calls
+
+
+def run(client, warmup, calls, concurrency, created):
+    """Send ``warmup`` untimed, then ``calls`` from ``concurrency`` threads, and summarize them."""
+    def send(worker, batch):
+        results = []
+        try:
+            for method, path, body, headers in batch:
+                try:
+                    status, elapsed, data, queries = worker.call(method, path, body, headers)
+                except (OSError, http.client.HTTPException):
+                    status, elapsed, data, queries = None, 0.0, None, None
+                if method == 'POST' and path == '/api/bookings/' and status == 201:
+                    created.append(data['id'])
+                results.append((status, elapsed, queries))
+        finally:
+            if concurrency > 1:
+                worker.close()
+        return results
+
+    send(client, warmup)
+    started = time.perf_counter()
+    if concurrency > 1:
+        workers = [client.copy() if isinstance(client, HTTPClient) else InProcessClient() for _ in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = [
+                result for batch in pool.map(send, workers, [calls[offset::concurrency] for offset in range(concurrency)])
+                for result in batch
+            ]
+    else:
+        # Inline, so in-process runs share the caller's connection (and its transaction).
+        results = send(client, calls)
+    elapsed = time.perf_counter() - started
+
+    ok = sorted(seconds * 1000 for status, seconds, _ in results if status is not None and status < 400)
+    queries = [count for status, _, count in results if count is not None]
+    return {
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        'statuses': dict(sorted(Counter(str(status) for status, _, _ in results).items())),
+        'throughput': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'meanMs': round(statistics.fmean(ok), 3) if ok else None,
+        'p50Ms': _percentile(ok, 50),
+        'p95Ms': _percentile(ok, 95),
+        'p99Ms': _percentile(ok, 99),
+        'queriesPerRequest': round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return None
+    return round(ordered[max(0, -(-len(ordered) * percent // 100) - 1)], 3)
+
+
+def _change(before, after):
+    if before is None or after is None:
+        return 'n/a'
+    if not before:
+        return f'{before} -> {after}'
+    return f'{(after - before) / before:+.1%}'
+
+
+def _json(content):
+    try:
+        return json.loads(content) if content else None
+    except ValueError:
+        return None
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ['git', *args], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from rest_framework.test import APIClient
+
+from bookings import synthetic
+from bookings.models import Booking
+
+from .bench_api import InProcessClient
+
+
+class Command(BaseCommand):
+    help = (
+        'Create bookings from concurrent threads, first all for one room and then spread over many, '
+        'and compare the throughput: creates for different rooms should not queue on one lock.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=300, help='Bookings created per scenario.')
+        parser.add_argument('--workers', type=int, default=16, help='Threads posting at once.')
+
+    def handle(self, *args, **options):
+        synthetic.clear()
+        room_ids = synthetic.seed_rooms(options['rooms'], seed=5)
+        self.host = InProcessClient().host
+        if connection.vendor == 'sqlite':
+            self.stdout.write(
+                self.style.WARNING('SQLite serializes every write transaction, so expect no gain from spreading rooms.')
+            )
+        try:
+            requests = options['requests']
+            # One-night stays that never overlap, so every request books.
+            start = date.today() + timedelta(days=30)
+            one_room = [(room_ids[0], start + timedelta(days=index)) for index in range(requests)]
+            spread = [
+                (room_ids[index % len(room_ids)], start + timedelta(days=requests + index // len(room_ids)))
+                for index in range(requests)
+            ]
+            results = {}
+            for label, jobs in (('one room', one_room), (f'{len(room_ids)} rooms', spread)):
+                results[label] = self.run(jobs, options['workers'])
+                self.stdout.write(f'{label}: {results[label]:.1f} bookings/s')
+            single, many = results.values()
+            self.stdout.write(f'Spreading over rooms: {many / single:.2f}x the single-room throughput')
+        finally:
+            Booking.objects.filter(room_id__in=room_ids).delete()
+            synthetic.clear()
+
+    def run(self, jobs, workers):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            codes = list(pool.map(lambda job: self.post(*job), jobs))
+        elapsed = time.perf_counter() - started
+        failed = [code for code in codes if code != 201]
+        if failed:
+            raise CommandError(f'{len(failed)} of {len(codes)} creates failed, e.g. with status {failed[0]}')
+        return len(codes) / elapsed
+
+    def post(self, room_id, check_in):
+        client = APIClient(HTTP_HOST=self.host)
+        try:
+            response = client.post(
+                '/api/bookings/',
+                {
+                    'roomId': room_id,
+                    'checkIn': check_in.isoformat(),
+                    'checkOut': (check_in + timedelta(days=1)).isoformat(),
+                    'guestInfo': {'email': f'bench@{synthetic.EMAIL_DOMAIN}'},
+                },
+                format='json',
+            )
+            return response.status_code
+        finally:
+            close_old_connections()
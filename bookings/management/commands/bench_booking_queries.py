@@ -0,0 +1,85 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from bookings import synthetic
+from bookings.calendar import GRID_STATUSES
+from bookings.models import ACTIVE_STATUSES, Booking, RoomNight
+
+
+class Command(BaseCommand):
+    help = 'Seed a large synthetic bookings table and print query plans and timings for the hot booking queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--bookings', type=int, default=200000)
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query.')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic data afterwards.')
+        parser.add_argument('--reuse', action='store_true', help='Benchmark existing synthetic data instead of seeding.')
+
+    def handle(self, *args, **options):
+        if not options['reuse']:
+            synthetic.clear()
+            started = time.perf_counter()
+            room_ids = synthetic.seed_rooms(options['rooms'], seed=4)
+            user_ids = synthetic.seed_users(options['users'])
+            synthetic.seed_bookings(room_ids, user_ids, options['bookings'], seed=4)
+            self.stdout.write(f"Seeded {options['bookings']} bookings in {time.perf_counter() - started:.1f}s")
+
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        try:
+            self.run_queries(options['repeat'])
+        finally:
+            if not options['keep'] and not options['reuse']:
+                synthetic.clear()
+
+    def run_queries(self, repeat):
+        sample = (
+            Booking.objects.filter(reference__startswith=synthetic.REFERENCE_PREFIX, created_by__isnull=False)
+            .values('room_id', 'created_by_id', 'check_in')
+            .first()
+        )
+        if sample is None:
+            self.stderr.write('No synthetic bookings found.')
+            return
+
+        check_in = sample['check_in']
+        check_out = check_in + timedelta(days=3)
+        queries = {
+            'overlap check': Booking.objects.filter(
+                room_id=sample['room_id'],
+                status__in=ACTIVE_STATUSES,
+                check_in__lt=check_out,
+                check_out__gt=check_in,
+            ).values('pk')[:1],
+            'inventory probe': RoomNight.objects.filter(
+                room_id=sample['room_id'], night__gte=check_in, night__lt=check_out
+            ).values('pk')[:1],
+            'my bookings page': Booking.objects.filter(created_by_id=sample['created_by_id'])
+            .order_by('-created_at', '-id')
+            .values('pk')[:50],
+            'admin bookings page': Booking.objects.order_by('-created_at', '-id').values('pk')[:50],
+            'calendar window': Booking.objects.filter(
+                status__in=GRID_STATUSES, check_in__lt=check_in + timedelta(days=30), check_out__gt=check_in
+            ).values_list('room_id', 'check_in', 'check_out', 'status'),
+        }
+
+        self.stdout.write(f'Backend: {connection.vendor}')
+        for label, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+            self.stdout.write(queryset.explain())
+            self.stdout.write(
+                f'median {statistics.median(timings):.3f} ms, p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.3f} ms'
+            )
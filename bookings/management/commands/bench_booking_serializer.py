@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from bookings import synthetic
+from bookings.serializers import BookingSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare the fast booking list serializer with per-row DRF serialization on in-memory bookings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--rooms', type=int, default=50)
+        parser.add_argument('--users', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for count in options['rows']:
+            bookings = synthetic.build_bookings(count, rooms=options['rooms'], users=options['users'], seed=7)
+
+            per_row = serializers.ListSerializer(child=BookingSerializer())
+            baseline, baseline_time = self._time(lambda: per_row.to_representation(bookings))
+            fast, fast_time = self._time(lambda: BookingSerializer(bookings, many=True).data)
+
+            identical = JSONRenderer().render(baseline) == JSONRenderer().render(fast)
+            self.stdout.write(
+                f'{count:>7} rows: per-row {baseline_time * 1000:9.1f} ms, fast {fast_time * 1000:9.1f} ms, '
+                f'{baseline_time / fast_time:5.1f}x, identical={identical}'
+            )
+
+    def _time(self, func):
+        started = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - started
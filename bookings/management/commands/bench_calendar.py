@@ -0,0 +1,88 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserRole
+from bookings import calendar, synthetic
+from bookings.models import Booking
+from rooms.models import Room
+
+from .bench_api import InProcessClient
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic hotel and time the admin occupancy calendar, both the whole request '
+        'and building the grid alone, against a latency budget.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=500)
+        parser.add_argument('--nights', type=int, default=90)
+        parser.add_argument('--bookings', type=int, default=12000, help='Bookings seeded around the window.')
+        parser.add_argument('--repeat', type=int, default=30, help='Timed runs of each measurement.')
+        parser.add_argument('--budget-ms', type=float, default=100.0, help='Target median for the whole request.')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic data afterwards.')
+
+    def handle(self, *args, **options):
+        start = date.today()
+        nights = options['nights']
+        synthetic.clear()
+        try:
+            started = time.perf_counter()
+            room_ids = synthetic.seed_rooms(options['rooms'], seed=3)
+            # Stays spread over the window and a few days either side of it.
+            synthetic.seed_bookings(
+                room_ids, [], options['bookings'], start=start - timedelta(days=5), span_days=nights + 10, seed=3
+            )
+            self.stdout.write(f"Seeded {options['bookings']} bookings in {time.perf_counter() - started:.1f}s")
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            self.run(start, nights, options['repeat'], options['budget_ms'])
+        finally:
+            if not options['keep']:
+                synthetic.clear()
+
+    def run(self, start, nights, repeat, budget_ms):
+        end = start + timedelta(days=nights)
+        rooms = list(Room.objects.filter(is_active=True).order_by('id').values_list('id', 'name'))
+        bookings = list(
+            Booking.objects.filter(status__in=calendar.GRID_STATUSES, check_in__lt=end, check_out__gt=start)
+            .values_list('room_id', 'check_in', 'check_out', 'status')
+            .order_by()
+        )
+        self.stdout.write(f'Backend: {connection.vendor}, {len(rooms)} rooms x {nights} nights, {len(bookings)} stays drawn')
+
+        build = self._time(repeat, lambda: calendar.build_grid(rooms, bookings, start, nights))
+
+        client = APIClient(HTTP_HOST=InProcessClient().host)
+        # Never saved: the view only checks the role.
+        client.force_authenticate(User(email=f'bench-admin@{synthetic.EMAIL_DOMAIN}', role=UserRole.ADMIN))
+        params = {'start': start.isoformat(), 'nights': nights}
+        response = client.get('/api/admin/calendar', params)
+        if response.status_code != 200:
+            raise CommandError(f'The calendar answered {response.status_code}: {response.content[:200]!r}')
+        request = self._time(repeat, lambda: client.get('/api/admin/calendar', params))
+
+        for label, timings in (('build_grid', build), ('GET /api/admin/calendar', request)):
+            self.stdout.write(f'{label}: median {statistics.median(timings):.2f} ms, p95 {_p95(timings):.2f} ms')
+        median = statistics.median(request)
+        verdict = self.style.SUCCESS('within') if median <= budget_ms else self.style.ERROR('over')
+        self.stdout.write(f'Request median {median:.2f} ms is {verdict} the {budget_ms:.0f} ms budget')
+
+    def _time(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+
+def _p95(timings):
+    return sorted(timings)[max(int(len(timings) * 0.95) - 1, 0)]
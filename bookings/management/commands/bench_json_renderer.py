@@ -0,0 +1,43 @@
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from backend.renderers import FastJSONRenderer, orjson
+from bookings import synthetic
+from bookings.serializers import BookingSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare render time and peak memory of the JSON renderers on large booking lists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson is not installed; FastJSONRenderer is using the stdlib fallback.')
+
+        for count in options['rows']:
+            data = BookingSerializer(synthetic.build_bookings(count, seed=7), many=True).data
+            stdlib, stdlib_time, stdlib_peak = self._measure(JSONRenderer(), data)
+            fast, fast_time, fast_peak = self._measure(FastJSONRenderer(), data)
+            self.stdout.write(
+                f'{count:>7} rows: stdlib {stdlib_time * 1000:8.1f} ms / {stdlib_peak / 2**20:6.1f} MiB, '
+                f'fast {fast_time * 1000:8.1f} ms / {fast_peak / 2**20:6.1f} MiB, '
+                f'{stdlib_time / fast_time:5.1f}x, identical={stdlib == fast}'
+            )
+
+    def _measure(self, renderer, data):
+        gc.collect()
+        started = time.perf_counter()
+        renderer.render(data)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        body = renderer.render(data)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return body, elapsed, peak
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookings import holds
+
+
+class Command(BaseCommand):
+    help = 'Cancel unpaid PENDING bookings older than BOOKING_HOLD_TTL_MINUTES and release their rooms.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=holds.BATCH_SIZE, help='Holds cancelled per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the stale holds.')
+        parser.add_argument('--interval', type=int, default=0, help='Keep running, sweeping every INTERVAL seconds.')
+
+    def handle(self, *args, **options):
+        ttl = settings.BOOKING_HOLD_TTL_MINUTES
+        if ttl <= 0:
+            self.stdout.write('Hold expiry is disabled (BOOKING_HOLD_TTL_MINUTES is 0).')
+            return
+        if options['dry_run']:
+            self.stdout.write(f'{holds.stale_holds().count()} holds are older than {ttl} minutes.')
+            return
+        if options['interval'] > 0:
+            self.stdout.write(f"Expiring holds older than {ttl} minutes every {options['interval']} seconds.")
+            holds.sweep_forever(options['interval'], batch_size=options['batch_size'])
+        expired = holds.expire_stale_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} holds older than {ttl} minutes.'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings import export
+
+
+class Command(BaseCommand):
+    help = 'Stream bookings as CSV or JSON Lines to a file or stdout.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=sorted(export.CONTENT_TYPES), default='csv')
+        parser.add_argument('--from', dest='from', help='Earliest check-in date (inclusive).')
+        parser.add_argument('--to', dest='to', help='Latest check-in date (inclusive).')
+        parser.add_argument('--status', action='append', default=[], help='Repeatable or comma separated.')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE, help='Rows fetched per round trip.')
+        parser.add_argument('--output', '-o', help='File to write; defaults to stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            filters = export.parse_filters(options)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        chunks = export.stream(export.bookings(filters), options['export_format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
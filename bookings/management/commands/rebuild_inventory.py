@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings import inventory
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the per-night room inventory against the bookings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report differences; exit with an error if the inventory is out of sync.',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            missing, unexpected, conflicts = inventory.verify()
+            for booking_id, room_id, night in sorted(missing, key=str)[:20]:
+                self.stdout.write(f'- missing: booking {booking_id} room {room_id} night {night}')
+            for booking_id, room_id, night in sorted(unexpected, key=str)[:20]:
+                self.stdout.write(f'- unexpected: booking {booking_id} room {room_id} night {night}')
+            self.report_conflicts(conflicts)
+            if missing or unexpected or conflicts:
+                raise CommandError(
+                    f'Inventory out of sync: {len(missing)} missing, {len(unexpected)} unexpected, '
+                    f'{len(conflicts)} overlapping room nights.'
+                )
+            self.stdout.write(self.style.SUCCESS('Inventory matches bookings.'))
+            return
+
+        created, conflicts = inventory.rebuild()
+        self.report_conflicts(conflicts)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt inventory. Created {created} room nights.'))
+        if conflicts:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{len(conflicts)} room nights of overlapping bookings were left to the older booking; '
+                    'cancel or move the newer ones.'
+                )
+            )
+
+    def report_conflicts(self, conflicts):
+        for booking_id, room_id, night, holder_id in sorted(conflicts, key=str)[:20]:
+            self.stdout.write(f'- overlap: booking {booking_id} room {room_id} night {night} is held by booking {holder_id}')
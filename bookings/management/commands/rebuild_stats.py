@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings import stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the daily occupancy and revenue aggregates against the bookings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report differences; exit with an error if the aggregates are out of sync.',
+        )
+        parser.add_argument('--room', type=int, action='append', dest='rooms', help='Limit the rebuild to these rooms.')
+        parser.add_argument(
+            '--hotel',
+            action='store_true',
+            help='Only sum the hotel-wide rows again from the room rows, e.g. after a lost after-commit increment.',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatched = stats.verify()
+            for room_id, day, status, payment_method in sorted(mismatched, key=str)[:20]:
+                scope = 'hotel' if room_id is None else f'room {room_id}'
+                self.stdout.write(f'- mismatch: {scope} {day} {status}/{payment_method}')
+            if mismatched:
+                raise CommandError(f'Daily stats out of sync: {len(mismatched)} rows differ.')
+            self.stdout.write(self.style.SUCCESS('Daily stats match bookings.'))
+            return
+
+        if options['hotel']:
+            stats.rebuild_hotel()
+            self.stdout.write(self.style.SUCCESS('Rebuilt the hotel-wide daily stats from the room rows.'))
+            return
+
+        written = stats.rebuild(room_ids=options['rooms'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily stats. Wrote {written} rows.'))
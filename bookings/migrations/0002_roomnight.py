@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-17 17:27
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+ACTIVE_STATUSES = ('PENDING', 'CONFIRMED', 'CHECKED_IN')
+
+
+def backfill_room_nights(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    rows = []
+    for booking_id, room_id, check_in, check_out in (
+        Booking.objects.filter(status__in=ACTIVE_STATUSES)
+        .values_list('pk', 'room_id', 'check_in', 'check_out')
+        .iterator(chunk_size=2000)
+    ):
+        rows.extend(
+            RoomNight(booking_id=booking_id, room_id=room_id, night=check_in + timedelta(days=offset))
+            for offset in range((check_out - check_in).days)
+        )
+        if len(rows) >= 5000:
+            RoomNight.objects.bulk_create(rows)
+            rows = []
+    if rows:
+        RoomNight.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='bookings.booking')),
+                ('room', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='occupied_nights', to='rooms.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'night'], name='roomnight_room_night_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_room_nights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+from bookings.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('bookings', '0002_roomnight'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['room', 'status', 'check_out', 'check_in'], name='booking_room_status_stay_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['created_at'], name='booking_pending_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['-created_at', '-id'], name='booking_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='booking_creator_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 6.0 on 2026-10-17 18:05
+
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    DailyRoomStat = apps.get_model('bookings', 'DailyRoomStat')
+    DailyHotelStat = apps.get_model('bookings', 'DailyHotelStat')
+    Room = apps.get_model('rooms', 'Room')
+    prices = dict(Room.objects.values_list('pk', 'price'))
+    rooms = defaultdict(lambda: [0, Decimal('0'), 0, Decimal('0')])
+    hotel = defaultdict(lambda: [0, Decimal('0'), 0, Decimal('0')])
+    for room_id, check_in, check_out, status, payment_method, amount_paid in (
+        Booking.objects.order_by()
+        .values_list('room_id', 'check_in', 'check_out', 'status', 'payment_method', 'amount_paid')
+        .iterator(chunk_size=2000)
+    ):
+        for offset in range((check_out - check_in).days):
+            night = check_in + timedelta(days=offset)
+            for counters in (rooms[(room_id, night, status, payment_method)], hotel[(night, status, payment_method)]):
+                counters[0] += 1
+                counters[1] += prices.get(room_id) or 0
+        for counters in (rooms[(room_id, check_in, status, payment_method)], hotel[(check_in, status, payment_method)]):
+            counters[2] += 1
+            counters[3] += amount_paid or 0
+
+    def counters(values):
+        return dict(zip(('nights', 'revenue', 'arrivals', 'amount_paid'), values))
+
+    DailyRoomStat.objects.bulk_create(
+        [
+            DailyRoomStat(room_id=room_id, date=day, status=status, payment_method=method, **counters(values))
+            for (room_id, day, status, method), values in rooms.items()
+        ],
+        batch_size=5000,
+    )
+    DailyHotelStat.objects.bulk_create(
+        [
+            DailyHotelStat(date=day, status=status, payment_method=method, **counters(values))
+            for (day, status, method), values in hotel.items()
+        ],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_indexes'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHotelStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('CANCELLED', 'Cancelled'), ('CHECKED_IN', 'Checked In'), ('CHECKED_OUT', 'Checked Out')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('UNSPECIFIED', 'Unspecified'), ('CASH', 'Cash'), ('MOMO', 'Mobile Money')], max_length=20)),
+                ('nights', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('arrivals', models.IntegerField(default=0)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'status', 'payment_method'), name='dailyhotelstat_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRoomStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('CANCELLED', 'Cancelled'), ('CHECKED_IN', 'Checked In'), ('CHECKED_OUT', 'Checked Out')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('UNSPECIFIED', 'Unspecified'), ('CASH', 'Cash'), ('MOMO', 'Mobile Money')], max_length=20)),
+                ('nights', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('arrivals', models.IntegerField(default=0)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('room', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='rooms.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'date', 'status', 'payment_method'), name='dailyroomstat_key')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
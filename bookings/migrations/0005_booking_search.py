@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-17 20:10
+
+from django.db import migrations, models, transaction
+
+from bookings.operations import AddIndexConcurrently, AddTrigramIndexConcurrently
+from bookings.search import search_key
+
+BATCH_SIZE = 2000
+
+
+def backfill_search_keys(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    queryset = Booking.objects.using(schema_editor.connection.alias).only(
+        'reference', 'guest_first_name', 'guest_last_name', 'guest_email', 'guest_phone'
+    )
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            return
+        for booking in batch:
+            booking.search_key = search_key(booking)
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Booking.objects.using(schema_editor.connection.alias).bulk_update(batch, ['search_key'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('bookings', '0004_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='search_key',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='booking_status_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['check_in'], name='booking_check_in_idx'),
+        ),
+        AddTrigramIndexConcurrently(model_name='booking', field_name='search_key', name='booking_search_key_trgm_idx'),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-17 21:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+EVENT_FIELDS = ('status', 'payment_status', 'payment_method', 'amount_paid')
+
+
+def backfill_booking_events(apps, schema_editor):
+    # Existing bookings start their history with one event holding their
+    # current state, dated when they were last updated.
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingEvent = apps.get_model('bookings', 'BookingEvent')
+    alias = schema_editor.connection.alias
+    rows = Booking.objects.using(alias).order_by().values_list('pk', 'updated_at', *EVENT_FIELDS)
+    batch = []
+    for pk, updated_at, *values in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(
+            BookingEvent(
+                booking_id=pk,
+                occurred_at=updated_at,
+                source='backfill',
+                changes={field: [None, str(value)] for field, value in zip(EVENT_FIELDS, values)},
+                **dict(zip(EVENT_FIELDS, values)),
+            )
+        )
+        if len(batch) >= BATCH_SIZE:
+            BookingEvent.objects.using(alias).bulk_create(batch)
+            batch = []
+    BookingEvent.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('source', models.CharField(max_length=30)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('CANCELLED', 'Cancelled'), ('CHECKED_IN', 'Checked In'), ('CHECKED_OUT', 'Checked Out')], max_length=20)),
+                ('payment_status', models.CharField(choices=[('UNPAID', 'Unpaid'), ('PAID', 'Paid')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('UNSPECIFIED', 'Unspecified'), ('CASH', 'Cash'), ('MOMO', 'Mobile Money')], max_length=20)),
+                ('amount_paid', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('changes', models.JSONField(blank=True, default=dict)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='booking_events', to=settings.AUTH_USER_MODEL)),
+                ('booking', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='bookings.booking')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['booking', 'occurred_at', 'id'], name='bookingevent_booking_time_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_booking_events, migrations.RunPython.noop),
+    ]
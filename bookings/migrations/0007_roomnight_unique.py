@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:59
+
+from collections import defaultdict
+
+from django.core.management.base import CommandError
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+# Conflicting stays listed before the report is cut short.
+REPORTED_CONFLICTS = 50
+
+
+def check_overlapping_bookings(apps, schema_editor):
+    # Overlapping active bookings were accepted before this constraint, and
+    # each of them holds its own row for the shared nights. Which one keeps
+    # the room is for the hotel to decide, so stop with a report instead.
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    shared = RoomNight.objects.filter(
+        Exists(
+            RoomNight.objects.filter(room_id=OuterRef('room_id'), night=OuterRef('night')).exclude(pk=OuterRef('pk'))
+        )
+    )
+    nights = defaultdict(set)
+    stays = {}
+    for room_id, night, booking_id, reference, status, check_in, check_out in shared.values_list(
+        'room_id', 'night', 'booking_id', 'booking__reference', 'booking__status', 'booking__check_in', 'booking__check_out'
+    ).order_by('room_id', 'night'):
+        nights[room_id, night].add(booking_id)
+        stays[booking_id] = (check_in, f'{reference or booking_id} ({status}, {check_in} to {check_out})')
+    if not nights:
+        return
+
+    conflicts = defaultdict(list)
+    for (room_id, night), booking_ids in nights.items():
+        booking_ids = tuple(sorted(booking_ids, key=lambda booking_id: (stays[booking_id][0], str(booking_id))))
+        conflicts[room_id, booking_ids].append(night)
+    lines = [
+        f'- room {room_id}: {" and ".join(stays[booking_id][1] for booking_id in booking_ids)} '
+        f'share {len(shared_nights)} night(s) from {min(shared_nights)}'
+        for (room_id, booking_ids), shared_nights in sorted(conflicts.items(), key=lambda item: (item[0][0], min(item[1])))
+    ]
+    if len(lines) > REPORTED_CONFLICTS:
+        lines[REPORTED_CONFLICTS:] = [f'- ... and {len(lines) - REPORTED_CONFLICTS} more']
+    raise CommandError(
+        'Active bookings overlap on the same room, so room nights cannot be made unique. '
+        'Cancel or move one booking of each pair, then run migrate again:\n' + '\n'.join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_overlapping_bookings, migrations.RunPython.noop),
+        # The unique index replaces the plain one; it is built first so
+        # availability checks are never left without an index.
+        migrations.AddConstraint(
+            model_name='roomnight',
+            constraint=models.UniqueConstraint(fields=('room', 'night'), name='roomnight_room_night_key'),
+        ),
+        migrations.RemoveIndex(
+            model_name='roomnight',
+            name='roomnight_room_night_idx',
+        ),
+    ]
@@ -1,7 +1,8 @@
 import uuid
 
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.utils import timezone
 
 
 class BookingStatus(models.TextChoices):
@@ -12,6 +13,10 @@ class BookingStatus(models.TextChoices):
     CHECKED_OUT = 'CHECKED_OUT', 'Checked Out'
 
 
+# Statuses that hold a room for the nights of the stay.
+ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN)
+
+
 class PaymentStatus(models.TextChoices):
     UNPAID = 'UNPAID', 'Unpaid'
     PAID = 'PAID', 'Paid'
@@ -23,6 +28,10 @@ class PaymentMethod(models.TextChoices):
     MOMO = 'MOMO', 'Mobile Money'
 
 
+# Generated references drawn before giving up on a unique one.
+REFERENCE_ATTEMPTS = 5
+
+
 class Booking(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     reference = models.CharField(max_length=32, unique=True, blank=True)
@@ -56,13 +65,175 @@ class Booking(models.Model):
     guest_country = models.CharField(max_length=100, blank=True)
     guest_postal_code = models.CharField(max_length=30, blank=True)
 
+    # Normalized guest name, email, phone digits and reference; see bookings.search.
+    search_key = models.TextField(blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Overlap checks: seek (room, status) then range over stays ending after check-in.
+            models.Index(fields=['room', 'status', 'check_out', 'check_in'], name='booking_room_status_stay_idx'),
+            # Unpaid holds waiting to be confirmed or expired.
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status=BookingStatus.PENDING),
+                name='booking_pending_created_idx',
+            ),
+            models.Index(fields=['-created_at', '-id'], name='booking_recent_idx'),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='booking_creator_recent_idx'),
+            # Admin list filtered by status, newest first.
+            models.Index(fields=['status', '-created_at', '-id'], name='booking_status_recent_idx'),
+            models.Index(fields=['check_in'], name='booking_check_in_idx'),
+        ]
+
+    @staticmethod
+    def new_reference():
+        return f"NCH-{uuid.uuid4().hex[:10].upper()}"
+
+    def refresh_search_key(self):
+        from .search import search_key
+
+        self.search_key = search_key(self)
+
     def save(self, *args, **kwargs):
-        if not self.reference:
-            self.reference = f"NCH-{uuid.uuid4().hex[:10].upper()}"
-        super().save(*args, **kwargs)
+        from .search import SEARCH_FIELDS
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(SEARCH_FIELDS).intersection(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        if self.reference:
+            self.refresh_search_key()
+            super().save(*args, **kwargs)
+            return
+
+        # A generated reference can collide with an existing one; draw another
+        # and retry. The savepoint keeps an enclosing transaction usable.
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        for attempt in range(REFERENCE_ATTEMPTS):
+            self.reference = self.new_reference()
+            self.refresh_search_key()
+            try:
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                taken = Booking.objects.using(using).filter(reference=self.reference).exists()
+                if not taken or attempt == REFERENCE_ATTEMPTS - 1:
+                    raise
 
     def __str__(self):
         return self.reference
+
+
+class RoomNight(models.Model):
+    """One occupied night of a room, materialized from an active booking.
+
+    Kept in sync with ``Booking`` by ``bookings.inventory`` so availability
+    checks become a lookup on the ``(room, night)`` index instead of a range
+    overlap scan over the bookings table. The index is unique: the database
+    itself refuses a second active booking for a night already held.
+    """
+
+    room = models.ForeignKey('rooms.Room', on_delete=models.CASCADE, related_name='occupied_nights', db_index=False)
+    night = models.DateField()
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='nights')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'night'], name='roomnight_room_night_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.room_id} @ {self.night}'
+
+
+# Statuses whose nights count as sold in occupancy and revenue figures.
+SOLD_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN, BookingStatus.CHECKED_OUT)
+
+
+class DailyRoomStat(models.Model):
+    """Bookings of one room on one date, per status and payment method.
+
+    ``nights`` and ``revenue`` cover the bookings staying that night (revenue
+    at the room's price); ``arrivals`` and ``amount_paid`` are booked on the
+    check-in date. Maintained incrementally by ``bookings.stats`` so reports
+    read a few rows per day instead of every booking.
+    """
+
+    room = models.ForeignKey('rooms.Room', on_delete=models.CASCADE, related_name='daily_stats', db_index=False)
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=BookingStatus.choices)
+    payment_method = models.CharField(max_length=20, choices=PaymentMethod.choices)
+
+    nights = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    arrivals = models.IntegerField(default=0)
+    amount_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date', 'status', 'payment_method'], name='dailyroomstat_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.room_id} @ {self.date} {self.status}/{self.payment_method}'
+
+
+class DailyHotelStat(models.Model):
+    """``DailyRoomStat`` summed over all rooms, so hotel-wide reports read a few rows per day."""
+
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=BookingStatus.choices)
+    payment_method = models.CharField(max_length=20, choices=PaymentMethod.choices)
+
+    nights = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    arrivals = models.IntegerField(default=0)
+    amount_paid = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status', 'payment_method'], name='dailyhotelstat_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.status}/{self.payment_method}'
+
+
+class BookingEvent(models.Model):
+    """One change to a booking's status or payment, appended by ``bookings.events``.
+
+    Each event stores the booking's status and payment fields as they stood
+    after the change, plus ``changes`` as ``{field: [before, after]}``, so the
+    state at any time is the newest event at or before it. Events are never
+    updated; ``source`` names the code path and ``actor`` the user behind it.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='events', db_index=False)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    source = models.CharField(max_length=30)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='booking_events'
+    )
+
+    status = models.CharField(max_length=20, choices=BookingStatus.choices)
+    payment_status = models.CharField(max_length=20, choices=PaymentStatus.choices)
+    payment_method = models.CharField(max_length=20, choices=PaymentMethod.choices)
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
+    changes = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['booking', 'occurred_at', 'id'], name='bookingevent_booking_time_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Booking events are append-only')
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'{self.booking_id} {self.source} @ {self.occurred_at}'
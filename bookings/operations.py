@@ -0,0 +1,75 @@
+"""Migration operations shared by the bookings migrations."""
+
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.operations.base import Operation
+
+
+class AddIndexConcurrently(AddIndex):
+    """``AddIndex`` that builds with ``CREATE INDEX CONCURRENTLY`` on PostgreSQL.
+
+    The table stays writable while the index builds. Other backends fall back
+    to a plain ``CREATE INDEX``. Migrations using it must set ``atomic = False``
+    because PostgreSQL refuses concurrent builds inside a transaction.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.add_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.remove_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, self.index)
+
+    def describe(self):
+        return f'Concurrently create index {self.index.name} on {self.model_name}'
+
+
+class AddTrigramIndexConcurrently(Operation):
+    """A ``pg_trgm`` GIN index on one text column, for ``LIKE '%term%'`` lookups.
+
+    PostgreSQL only, built concurrently like ``AddIndexConcurrently`` (so the
+    migration must set ``atomic = False``); other backends skip it. The index
+    is not part of the model state, since only PostgreSQL can express it.
+    """
+
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, field_name, name):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.name = name
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'postgresql' or not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        quote = schema_editor.quote_name
+        column = model._meta.get_field(self.field_name).column
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(self.name)} '
+            f'ON {quote(model._meta.db_table)} USING gin ({quote(column)} gin_trgm_ops)'
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'postgresql' or not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(self.name)}')
+
+    def describe(self):
+        return f'Concurrently create trigram index {self.name} on {self.model_name}.{self.field_name}'
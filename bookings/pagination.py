@@ -0,0 +1,97 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class BookingCursorPagination(BasePagination):
+    """Keyset pagination over ``(created_at, id)``, newest first.
+
+    The cursor carries the key of the last row served, so every page is an
+    index range read of ``page_size + 1`` rows whatever its depth, and no
+    ``COUNT(*)`` is ever issued. Setting ``BOOKINGS_LEGACY_LIST_RESPONSE``
+    turns pagination off and restores the bare list response.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request)
+        if window is None:
+            return None
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        rows = list(window)
+        self.page = rows[:page_size]
+        self.has_next = len(rows) > page_size
+        return self.page
+
+    def page_window(self, queryset, request):
+        """The slice of ``queryset`` read for this request's page, plus one look-ahead row.
+
+        Returns ``None`` when pagination is off.
+        """
+        if getattr(settings, 'BOOKINGS_LEGACY_LIST_RESPONSE', False):
+            return None
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        return queryset[:self.get_page_size(request) + 1]
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'BOOKINGS_PAGE_SIZE', 50)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(last.created_at, last.pk)
+        )
+
+    def encode_cursor(self, created_at, pk):
+        raw = f'{created_at.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+            created_at, pk = raw.split('|')
+            return datetime.fromisoformat(created_at), uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound('Invalid cursor')
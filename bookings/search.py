@@ -0,0 +1,128 @@
+"""Server-side filtering and guest search for booking lists.
+
+Guest search matches against ``Booking.search_key``: the guest's name, email,
+phone digits and the booking reference, case folded and stripped of accents
+when the booking is saved. Every search term must appear in the key, so
+``"ama mensah"`` finds Ama Mensah and ``"024 412"`` finds ``+233 24 412 ...``.
+
+The lookup is a case-sensitive ``LIKE '%term%'`` on that one column. On
+PostgreSQL a ``pg_trgm`` GIN index answers it (migration 0005); on SQLite it
+is a scan of a narrow column, and because lists are read newest first along
+``booking_recent_idx`` the scan stops as soon as a page is full.
+"""
+
+import re
+import unicodedata
+from datetime import date
+
+from django.db.models import Q
+
+from .models import BookingStatus, PaymentStatus
+
+SEARCH_FIELDS = ('reference', 'guest_first_name', 'guest_last_name', 'guest_email', 'guest_phone')
+
+MIN_TERM_LENGTH = 2
+
+_SPACES = re.compile(r'\s+')
+_PHONE = re.compile(r'^[\d\s()+.-]+$')
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize(text):
+    """Case fold ``text``, drop accents and collapse whitespace."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _SPACES.sub(' ', stripped.casefold()).strip()
+
+
+def search_key(booking):
+    phone = _NON_DIGITS.sub('', booking.guest_phone or '')
+    parts = (booking.guest_first_name, booking.guest_last_name, booking.guest_email, phone, booking.reference)
+    return ' '.join(normalize(part) for part in parts if part)
+
+
+def terms(query):
+    """Split a search box value into normalized terms.
+
+    Phone numbers keep only their digits, less any leading trunk ``0``, so a
+    number dialled locally still matches one stored with its country code.
+    """
+    query = query or ''
+    if _PHONE.match(query):
+        digits = _NON_DIGITS.sub('', query).lstrip('0')
+        return [digits] if len(digits) >= MIN_TERM_LENGTH else []
+    return [term for term in normalize(query).split(' ') if len(term) >= MIN_TERM_LENGTH]
+
+
+def matches(query):
+    """``Q`` matching bookings whose key contains every term of ``query``, or ``None``."""
+    found = terms(query)
+    if not found:
+        return None
+    condition = Q()
+    for term in found:
+        condition &= Q(search_key__contains=term)
+    return condition
+
+
+def parse_filters(params):
+    """Validate list filters from ``params`` (a ``QueryDict`` or a plain dict).
+
+    ``status`` and ``payment_status`` may be repeated or comma separated;
+    ``check_in_from``/``check_in_to`` and ``check_out_from``/``check_out_to``
+    are inclusive ISO dates; ``room`` is a room id; ``q`` is a guest search.
+    Raises ``ValueError`` with a user-facing message.
+    """
+    filters = {}
+    for name, choices in (('status', BookingStatus), ('payment_status', PaymentStatus)):
+        values = _choices(params, name)
+        unknown = sorted(set(values) - set(choices.values))
+        if unknown:
+            raise ValueError(f'Unknown {name}: {", ".join(unknown)}')
+        if values:
+            filters[name] = values
+
+    for name in ('check_in_from', 'check_in_to', 'check_out_from', 'check_out_to'):
+        if params.get(name):
+            try:
+                filters[name] = date.fromisoformat(str(params[name])[:10])
+            except ValueError:
+                raise ValueError(f'{name} must be an ISO date')
+
+    if params.get('room'):
+        try:
+            filters['room'] = int(params['room'])
+        except (TypeError, ValueError):
+            raise ValueError('room must be a room id')
+
+    if params.get('q'):
+        filters['q'] = str(params['q'])
+    return filters
+
+
+def apply(queryset, filters):
+    if 'status' in filters:
+        queryset = queryset.filter(status__in=filters['status'])
+    if 'payment_status' in filters:
+        queryset = queryset.filter(payment_status__in=filters['payment_status'])
+    if 'check_in_from' in filters:
+        queryset = queryset.filter(check_in__gte=filters['check_in_from'])
+    if 'check_in_to' in filters:
+        queryset = queryset.filter(check_in__lte=filters['check_in_to'])
+    if 'check_out_from' in filters:
+        queryset = queryset.filter(check_out__gte=filters['check_out_from'])
+    if 'check_out_to' in filters:
+        queryset = queryset.filter(check_out__lte=filters['check_out_to'])
+    if 'room' in filters:
+        queryset = queryset.filter(room_id=filters['room'])
+    if 'q' in filters:
+        condition = matches(filters['q'])
+        queryset = queryset.filter(condition) if condition is not None else queryset.none()
+    return queryset
+
+
+def _choices(params, name):
+    values = params.getlist(name) if hasattr(params, 'getlist') else params.get(name) or []
+    if isinstance(values, str):
+        values = [values]
+    return [value.strip().upper() for raw in values for value in raw.split(',') if value.strip()]
@@ -1,11 +1,26 @@
 from datetime import date
 
+from django.db import models
 from rest_framework import serializers
 
+from accounts.models import User
 from accounts.serializers import UserSerializer
+from rooms import rates
+from rooms.models import Room
 from rooms.serializers import RoomSerializer
 
-from .models import Booking, BookingStatus, PaymentMethod, PaymentStatus
+from . import events, inventory, stats
+from .locking import locked_rooms
+from .models import REFERENCE_ATTEMPTS, Booking, BookingStatus, PaymentMethod, PaymentStatus, RoomNight
+
+
+class RoomUnavailable(Exception):
+    """The requested stay overlaps a booking that already holds the room."""
+
+    def __init__(self, conflicts=()):
+        super().__init__(conflicts)
+        # Indexes of the unavailable stays when booking a group.
+        self.conflicts = list(conflicts)
 
 
 class _ISODateField(serializers.DateField):
@@ -42,24 +57,34 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         check_out = attrs['checkOut']
         if check_out <= check_in:
             raise serializers.ValidationError('Check-out must be after check-in')
+        # Every night is a row written under the room lock; cap it like the quotes.
+        if (check_out - check_in).days > rates.MAX_NIGHTS:
+            raise serializers.ValidationError(f'A stay must cover 1 to {rates.MAX_NIGHTS} nights')
         if check_in < date.today():
             raise serializers.ValidationError('Check-in cannot be in the past')
         return attrs
 
     def create(self, validated_data):
-        room_id = validated_data.pop('roomId')
-        check_in = validated_data.pop('checkIn')
-        check_out = validated_data.pop('checkOut')
-        guest_info = validated_data.pop('guestInfo')
-        special_requests = validated_data.pop('specialRequests', '') or validated_data.get('special_requests', '')
-
-        booking = Booking.objects.create(
-            room_id=room_id,
-            check_in=check_in,
-            check_out=check_out,
+        booking = self.build(validated_data)
+        with locked_rooms([booking.room_id]) as existing_rooms:
+            if booking.room_id not in existing_rooms:
+                raise serializers.ValidationError({'roomId': 'Room not found'})
+            if not inventory.is_room_available(booking.room_id, booking.check_in, booking.check_out):
+                raise RoomUnavailable()
+            booking.save(force_insert=True)
+        return booking
+
+    def build(self, validated_data):
+        """Unsaved ``Booking`` for ``validated_data``; callers check availability and insert it."""
+        guest_info = validated_data['guestInfo']
+        request = self.context['request']
+        return Booking(
+            room_id=validated_data['roomId'],
+            check_in=validated_data['checkIn'],
+            check_out=validated_data['checkOut'],
             adults=validated_data.get('adults', 1),
             children=validated_data.get('children', 0),
-            special_requests=special_requests,
+            special_requests=validated_data.get('specialRequests', '') or validated_data.get('special_requests', ''),
             guest_first_name=guest_info.get('firstName', ''),
             guest_last_name=guest_info.get('lastName', ''),
             guest_email=guest_info.get('email', ''),
@@ -71,9 +96,171 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             status=BookingStatus.PENDING,
             payment_status=PaymentStatus.UNPAID,
             payment_method=PaymentMethod.UNSPECIFIED,
-            created_by=self.context['request'].user if self.context['request'].user.is_authenticated else None,
+            created_by_id=request.user.pk if request.user.is_authenticated else None,
         )
-        return booking
+
+
+class BookingGroupCreateSerializer(serializers.Serializer):
+    """Book many rooms or stays at once, all or nothing.
+
+    Every stay is validated by ``BookingCreateSerializer``. Creation locks all
+    rooms involved, checks every stay against the inventory in one query and
+    inserts the bookings and their nights with ``bulk_create``, so the number
+    of round trips does not grow with the size of the group.
+    """
+
+    max_size = 200
+
+    bookings = BookingCreateSerializer(many=True, allow_empty=False, max_length=max_size)
+
+    def validate_bookings(self, stays):
+        nights = set()
+        for stay in stays:
+            for night in inventory.stay_nights(stay['checkIn'], stay['checkOut']):
+                if (stay['roomId'], night) in nights:
+                    raise serializers.ValidationError('Stays for the same room overlap within the group')
+                nights.add((stay['roomId'], night))
+        return stays
+
+    def create(self, validated_data):
+        child = self.fields['bookings'].child
+        bookings = [child.build(stay) for stay in validated_data['bookings']]
+        self.assign_references(bookings)
+
+        with locked_rooms(booking.room_id for booking in bookings) as existing_rooms:
+            missing = [index for index, booking in enumerate(bookings) if booking.room_id not in existing_rooms]
+            if missing:
+                raise serializers.ValidationError(
+                    {'bookings': [{'roomId': ['Room not found']} if index in missing else {} for index in range(len(bookings))]}
+                )
+            taken = inventory.taken_nights((b.room_id, b.check_in, b.check_out) for b in bookings)
+            conflicts = [
+                index
+                for index, booking in enumerate(bookings)
+                if any((booking.room_id, night) in taken for night in inventory.stay_nights(booking.check_in, booking.check_out))
+            ]
+            if conflicts:
+                raise RoomUnavailable(conflicts)
+            # bulk_create sends no post_save, so the nights, daily stats and
+            # events are written here rather than by the signal handlers.
+            Booking.objects.bulk_create(bookings)
+            RoomNight.objects.bulk_create(
+                [night for booking in bookings for night in inventory.booking_nights(booking)],
+                batch_size=inventory.REBUILD_BATCH_SIZE,
+            )
+            stats.record(added=[stats.state(booking) for booking in bookings])
+            events.record_many((booking.pk, None, events.state(booking)) for booking in bookings)
+        return bookings
+
+    @staticmethod
+    def assign_references(bookings):
+        """Give each booking a reference that is unique within the group and not already stored.
+
+        ``bulk_create`` skips ``Booking.save()`` and its retry, so the drawn
+        references are checked against stored ones with one query per attempt.
+        A collision that slips in after the check still fails the insert.
+        """
+        taken = set()
+        for _attempt in range(REFERENCE_ATTEMPTS):
+            references = set()
+            for booking in bookings:
+                while not booking.reference or booking.reference in taken or booking.reference in references:
+                    booking.reference = Booking.new_reference()
+                references.add(booking.reference)
+            taken = set(Booking.objects.filter(reference__in=references).values_list('reference', flat=True))
+            if not taken:
+                break
+        for booking in bookings:
+            booking.refresh_search_key()
+
+
+# Field types whose representation of a value loaded from the database is the value itself.
+_PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+
+class BookingListSerializer(serializers.ListSerializer):
+    """Fast read path for many bookings.
+
+    Produces exactly what ``BookingSerializer`` does row by row, but resolves
+    each field's converter once per response instead of once per row, and
+    serializes every distinct room and user once and reuses the result.
+    Querysets are read with ``values()`` so no model instances are built.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, (models.QuerySet, models.manager.BaseManager)):
+            return self._represent_values(data.all())
+        return self._represent_instances(data)
+
+    def _plan(self):
+        # (field name, converter); None passes the value through, and the
+        # nested room/user are looked up in the per-response caches.
+        plan = []
+        for name, field in self.child.fields.items():
+            if name in ('room', 'created_by'):
+                plan.append((name, name))
+            elif isinstance(field, _PASSTHROUGH_FIELDS) and not isinstance(field, serializers.ChoiceField):
+                plan.append((name, None))
+            elif isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone'):
+                # Resolve the active timezone once rather than on every value.
+                fixed = serializers.DateTimeField(default_timezone=field.default_timezone())
+                if hasattr(field, 'format'):
+                    fixed.format = field.format
+                plan.append((name, fixed.to_representation))
+            else:
+                plan.append((name, field.to_representation))
+        return plan
+
+    def _represent_instances(self, bookings):
+        plan = self._plan()
+        room_serializer = RoomSerializer()
+        user_serializer = UserSerializer()
+        rooms = {}
+        users = {None: None}
+        rows = []
+        for booking in bookings:
+            if booking.room_id not in rooms:
+                rooms[booking.room_id] = room_serializer.to_representation(booking.room)
+            if booking.created_by_id not in users:
+                users[booking.created_by_id] = user_serializer.to_representation(booking.created_by)
+            row = {}
+            for name, convert in plan:
+                if convert == 'room':
+                    row[name] = rooms[booking.room_id]
+                elif convert == 'created_by':
+                    row[name] = users[booking.created_by_id]
+                else:
+                    value = getattr(booking, name)
+                    row[name] = value if convert is None or value is None else convert(value)
+            rows.append(row)
+        return rows
+
+    def _represent_values(self, queryset):
+        plan = self._plan()
+        columns = [name for name, convert in plan if convert not in ('room', 'created_by')]
+        records = list(queryset.values(*columns, 'room_id', 'created_by_id'))
+
+        room_ids = {record['room_id'] for record in records}
+        user_ids = {record['created_by_id'] for record in records} - {None}
+        room_serializer = RoomSerializer()
+        user_serializer = UserSerializer()
+        rooms = {pk: room_serializer.to_representation(room) for pk, room in Room.objects.in_bulk(room_ids).items()}
+        users = {pk: user_serializer.to_representation(user) for pk, user in User.objects.in_bulk(user_ids).items()}
+        users[None] = None
+
+        rows = []
+        for record in records:
+            row = {}
+            for name, convert in plan:
+                if convert == 'room':
+                    row[name] = rooms[record['room_id']]
+                elif convert == 'created_by':
+                    row[name] = users.get(record['created_by_id'])
+                else:
+                    value = record[name]
+                    row[name] = value if convert is None or value is None else convert(value)
+            rows.append(row)
+        return rows
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -82,6 +269,7 @@ class BookingSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Booking
+        list_serializer_class = BookingListSerializer
         fields = [
             'id',
             'reference',
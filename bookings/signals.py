@@ -0,0 +1,93 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from rooms.models import Room
+
+from . import events, inventory, stats
+from .models import Booking
+
+
+@receiver(post_save, sender=Booking)
+def sync_room_nights(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not inventory.TRACKED_FIELDS.intersection(update_fields):
+        return
+    inventory.sync_booking(instance, created=created)
+
+
+@receiver(post_init, sender=Booking)
+def remember_stats_state(sender, instance, **kwargs):
+    # What the row in the database holds for instances loaded from it.
+    instance._stats_state = stats.state(instance)
+
+
+@receiver(pre_save, sender=Booking)
+def capture_stats_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if instance._state.adding:
+        instance._stats_previous = None
+    elif update_fields is None or stats.TRACKED_FIELDS.intersection(update_fields):
+        instance._stats_previous = instance._stats_state or stats.stored_state(instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+def update_daily_stats(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not stats.TRACKED_FIELDS.intersection(update_fields):
+        return
+    current = stats.state(instance)
+    stats.record(removed=[instance._stats_previous], added=[current])
+    instance._stats_state = current
+
+
+@receiver(post_init, sender=Booking)
+def remember_event_state(sender, instance, **kwargs):
+    instance._event_state = events.state(instance)
+
+
+@receiver(pre_save, sender=Booking)
+def capture_event_state(sender, instance, raw=False, update_fields=None, using=None, **kwargs):
+    if raw or instance._state.adding or instance._event_state is not None:
+        return
+    # Instances loaded with deferred fields hold no snapshot; read the row.
+    if update_fields is None or set(events.EVENT_FIELDS).intersection(update_fields):
+        instance._event_state = (
+            Booking.objects.using(using).filter(pk=instance.pk).values_list(*events.EVENT_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def record_booking_event(sender, instance, created, raw=False, update_fields=None, using=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(events.EVENT_FIELDS).intersection(update_fields):
+        return
+    current = events.state(instance)
+    if current is None:
+        return
+    events.record(instance.pk, None if created else instance._event_state, current, using=using)
+    instance._event_state = current
+
+
+@receiver(post_delete, sender=Booking)
+def remove_daily_stats(sender, instance, **kwargs):
+    stats.record(removed=[instance._stats_state or stats.state(instance)])
+
+
+@receiver(pre_save, sender=Room)
+def capture_room_price(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._stats_price_changed = False
+        return
+    previous = Room.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+    instance._stats_price_changed = previous is not None and previous != Room._meta.get_field('price').to_python(instance.price)
+
+
+@receiver(post_save, sender=Room)
+def reprice_daily_stats(sender, instance, **kwargs):
+    # Revenue is counted at the room's price, so a new price restates its history.
+    if getattr(instance, '_stats_price_changed', False):
+        stats.rebuild(room_ids=[instance.pk])
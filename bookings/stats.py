@@ -0,0 +1,383 @@
+"""Daily occupancy and revenue aggregates.
+
+Each booking contributes to ``DailyRoomStat`` rows keyed by
+``(room, date, status, payment_method)``: one night and the room's price for
+every night of the stay, plus one arrival and its ``amount_paid`` on the
+check-in date. ``DailyHotelStat`` holds the same figures summed over rooms.
+
+Saving a booking subtracts what its previous state contributed and adds its
+new state as atomic increments (``INSERT ... ON CONFLICT DO UPDATE SET col =
+col + excluded.col``, which SQLite and PostgreSQL share), so concurrent
+writers never lose updates and a change costs a handful of statements
+whatever the table size. Room rows are written in the booking's transaction,
+where the room lock already serializes their writers. The hotel rows are
+shared by every room, so they are incremented after commit, each in its own
+short statement in key order: bookings of different rooms never wait on each
+other's hotel rows, and never lock them in conflicting orders.
+
+The hotel rows are therefore eventually consistent with the room rows. If the
+increment fails after commit (it is logged as an error on ``bookings.stats``)
+or the process dies between the commit and the increment, they lag until
+repaired: ``manage.py rebuild_stats --verify`` reports the drift as ``hotel``
+mismatches and ``manage.py rebuild_stats --hotel`` sums the hotel rows again
+from the room rows.
+
+Paths that skip model signals (``bulk_create``, ``QuerySet.update``) call
+``record()`` themselves; ``rebuild()`` recomputes everything for backfills.
+"""
+
+import contextvars
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+from operator import itemgetter
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Sum
+
+from rooms.models import Room
+
+from .inventory import stay_nights
+from .models import SOLD_STATUSES, Booking, DailyHotelStat, DailyRoomStat
+
+logger = logging.getLogger(__name__)
+
+# Booking fields a stats row depends on; ``state()`` returns them in this order.
+STATE_FIELDS = ('room_id', 'check_in', 'check_out', 'status', 'payment_method', 'amount_paid')
+TRACKED_FIELDS = frozenset(STATE_FIELDS) | {'room'}
+
+REBUILD_BATCH_SIZE = 5000
+
+_ROOM_KEY = ('room_id', 'date', 'status', 'payment_method')
+_HOTEL_KEY = ('date', 'status', 'payment_method')
+
+_COUNTERS = ('nights', 'revenue', 'arrivals', 'amount_paid')
+# Column types whose Python values the database drivers take as they are.
+_PLAIN_TYPES = frozenset((
+    'AutoField', 'BigAutoField', 'BigIntegerField', 'BooleanField', 'CharField', 'EmailField', 'IntegerField',
+    'PositiveBigIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField', 'SmallIntegerField', 'TextField',
+))
+_paused = contextvars.ContextVar('bookings_stats_paused', default=False)
+
+
+def state(booking):
+    """The stats-relevant fields of ``booking`` as loaded, or ``None`` if any were deferred."""
+    values = booking.__dict__
+    if any(field not in values for field in STATE_FIELDS):
+        return None
+    # to_python, since unsaved instances may still hold strings such as '2030-01-01'.
+    return tuple(
+        Booking._meta.get_field(field).to_python(values[field]) if values[field] is not None else None
+        for field in STATE_FIELDS
+    )
+
+
+def stored_state(booking_id):
+    return Booking.objects.filter(pk=booking_id).values_list(*STATE_FIELDS).first()
+
+
+def contributions(states, prices, sign=1, into=None):
+    """Add the room rows ``states`` contribute to ``into`` (key -> counters), times ``sign``."""
+    totals = into if into is not None else _totals_dict()
+    for room_id, check_in, check_out, status, payment_method, amount_paid in states:
+        price = Decimal(prices.get(room_id) or 0)
+        for night in stay_nights(check_in, check_out):
+            counters = totals[(room_id, night, status, payment_method)]
+            counters[0] += sign
+            counters[1] += sign * price
+        counters = totals[(room_id, check_in, status, payment_method)]
+        counters[2] += sign
+        counters[3] += sign * Decimal(amount_paid or 0)
+    return totals
+
+
+def record(removed=(), added=()):
+    """Apply the change from the ``removed`` booking states to the ``added`` ones."""
+    if _paused.get():
+        return
+    removed, added = [s for s in removed if s], [s for s in added if s]
+    if not removed and not added:
+        return
+    room_ids = {s[0] for s in removed} | {s[0] for s in added}
+    prices = dict(Room.objects.filter(pk__in=room_ids).values_list('pk', 'price'))
+    totals = contributions(removed, prices, sign=-1)
+    contributions(added, prices, into=totals)
+    apply(totals)
+
+
+def apply(totals):
+    """Add ``totals`` from ``contributions()`` to the room rows now and to the hotel rows on commit.
+
+    Bulk loaders sum many batches with ``contributions(into=...)`` and apply
+    them once, which writes each key once instead of once per batch.
+    """
+    if _paused.get():
+        return
+    room_rows = _changed(totals)
+    _increment(DailyRoomStat, _ROOM_KEY, room_rows)
+    _increment_hotel_on_commit(_hotel_totals(room_rows))
+
+
+@contextmanager
+def paused():
+    """Skip incremental updates, e.g. while deleting data whose stats go with it."""
+    token = _paused.set(True)
+    try:
+        yield
+    finally:
+        _paused.reset(token)
+
+
+def rebuild(room_ids=None):
+    """Recompute the aggregates from the bookings table. Returns the number of room rows written.
+
+    A full rebuild also sums the hotel table again. With ``room_ids`` only
+    those rooms' rows are recomputed, and the hotel rows take the difference
+    on commit like any other change, so only the dates they cover are touched.
+    """
+    bookings = Booking.objects.order_by()
+    room_stats = DailyRoomStat.objects.all()
+    prices = Room.objects.all()
+    if room_ids is not None:
+        bookings = bookings.filter(room_id__in=room_ids)
+        room_stats = room_stats.filter(room_id__in=room_ids)
+        prices = prices.filter(pk__in=room_ids)
+
+    totals = _compute(bookings, dict(prices.values_list('pk', 'price')))
+    rows = [
+        DailyRoomStat(room_id=room_id, date=day, status=status, payment_method=payment_method, **_counters(counters))
+        for (room_id, day, status, payment_method), counters in totals.items()
+    ]
+    with transaction.atomic():
+        if room_ids is not None:
+            # What the rooms' rows held before, subtracted from the hotel rows.
+            for row in room_stats.values_list(*_ROOM_KEY, *_COUNTERS).iterator(chunk_size=REBUILD_BATCH_SIZE):
+                counters = totals[row[:4]]
+                for index, value in enumerate(row[4:]):
+                    counters[index] -= value
+        room_stats.delete()
+        DailyRoomStat.objects.bulk_create(rows, batch_size=REBUILD_BATCH_SIZE)
+        if room_ids is None:
+            rebuild_hotel()
+        else:
+            _increment_hotel_on_commit(_hotel_totals(_changed(totals)))
+    return len(rows)
+
+
+def rebuild_hotel():
+    """Sum the hotel table again from the room rows, e.g. after rooms were deleted with theirs."""
+    with transaction.atomic():
+        DailyHotelStat.objects.all().delete()
+        DailyHotelStat.objects.bulk_create(
+            [
+                DailyHotelStat(**row)
+                for row in DailyRoomStat.objects.values(*_HOTEL_KEY)
+                .annotate(**{name: Sum(name) for name in _COUNTERS})
+                .order_by()
+            ],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+
+
+def verify():
+    """Return the keys whose stored counters differ from a fresh computation.
+
+    Room keys are ``(room_id, date, status, payment_method)``; hotel keys have
+    ``None`` for the room. Hotel rows are updated after commit, so they can
+    differ briefly under concurrent bookings, or until ``rebuild_hotel()`` if
+    an increment was lost.
+    """
+    totals = _compute(Booking.objects.order_by(), dict(Room.objects.values_list('pk', 'price')))
+    room_rows = [(key, counters) for key, counters in totals.items() if any(counters)]
+    expected = {key: tuple(counters) for key, counters in room_rows}
+    expected.update(((None, *key), tuple(counters)) for key, counters in _hotel_totals(room_rows).items())
+
+    actual = {}
+    for row in DailyRoomStat.objects.values_list('room_id', 'date', 'status', 'payment_method', *_COUNTERS):
+        if any(row[4:]):
+            actual[row[:4]] = tuple(row[4:])
+    for row in DailyHotelStat.objects.values_list('date', 'status', 'payment_method', *_COUNTERS):
+        if any(row[3:]):
+            actual[(None, *row[:3])] = tuple(row[3:])
+    return {key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key)}
+
+
+def report(start, end, room_id=None):
+    """Occupancy, ADR and RevPAR for the nights from ``start`` up to, not including, ``end``.
+
+    Hotel-wide figures count the rooms currently active; with ``room_id``
+    they cover that room alone. Headline figures count ``SOLD_STATUSES``; the
+    breakdowns cover every status and payment method.
+    """
+    if room_id is None:
+        rows = DailyHotelStat.objects.all()
+        rooms = Room.objects.filter(is_active=True).count()
+    else:
+        rows = DailyRoomStat.objects.filter(room_id=room_id)
+        rooms = 1
+    rows = rows.filter(date__gte=start, date__lt=end).order_by()
+    days = (end - start).days
+
+    by_status, by_method = defaultdict(_zero), defaultdict(_zero)
+    sold, sold_by_day = _zero(), defaultdict(_zero)
+    # One row per (date, status, payment_method) in either table.
+    for row in rows.values('date', 'status', 'payment_method', *_COUNTERS):
+        targets = [by_status[row['status']], by_method[row['payment_method']]]
+        if row['status'] in SOLD_STATUSES:
+            targets += [sold, sold_by_day[row['date']]]
+        for totals in targets:
+            for name in _COUNTERS:
+                totals[name] += row[name] or 0
+
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        totals = sold_by_day.get(day) or _zero()
+        daily.append({'date': day, **_figures(totals['nights'], totals['revenue'], rooms)})
+
+    return {
+        'start': start,
+        'end': end,
+        'rooms': rooms,
+        **_figures(sold['nights'], sold['revenue'], rooms * days),
+        'arrivals': sold['arrivals'],
+        'amountPaid': _money(sold['amount_paid']),
+        'byStatus': {status: _breakdown(totals) for status, totals in sorted(by_status.items())},
+        'byPaymentMethod': {method: _breakdown(totals) for method, totals in sorted(by_method.items())},
+        'daily': daily,
+    }
+
+
+def _totals_dict():
+    return defaultdict(lambda: [0, Decimal('0'), 0, Decimal('0')])
+
+
+def _counters(counters):
+    return dict(zip(_COUNTERS, counters))
+
+
+def _changed(totals):
+    """The ``(key, counters)`` of ``totals`` that change anything, in key order."""
+    return sorted(((key, counters) for key, counters in totals.items() if any(counters)), key=itemgetter(0))
+
+
+def _hotel_totals(room_rows):
+    totals = _totals_dict()
+    for (_room_id, *key), counters in room_rows:
+        hotel = totals[tuple(key)]
+        for index, value in enumerate(counters):
+            hotel[index] += value
+    return totals
+
+
+def _increment_hotel_on_commit(totals):
+    rows = _changed(totals)
+    if rows:
+        transaction.on_commit(partial(_increment_hotel, rows))
+
+
+def _increment_hotel(rows):
+    # The booking is committed either way; say so loudly, since nothing else
+    # notices the hotel rows falling behind.
+    try:
+        _increment(DailyHotelStat, _HOTEL_KEY, rows)
+    except Exception:
+        logger.exception(
+            'Hotel stats missed %d increments after commit and now lag the room stats; '
+            'run `manage.py rebuild_stats --hotel` to repair them.',
+            len(rows),
+        )
+
+
+def _compute(bookings, prices):
+    totals = contributions((), prices)
+    for chunk in _chunks(bookings.values_list(*STATE_FIELDS).iterator(chunk_size=REBUILD_BATCH_SIZE)):
+        contributions(chunk, prices, into=totals)
+    return totals
+
+
+def _chunks(iterable, size=REBUILD_BATCH_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _increment(model, key_columns, deltas):
+    if not deltas:
+        return
+    # The real connection, not the proxy, which is a thread-local lookup per
+    # attribute access and would otherwise be resolved once per parameter.
+    connection = connections[DEFAULT_DB_ALIAS]
+    ops = connection.ops
+    table = ops.quote_name(model._meta.db_table)
+    key = ', '.join(ops.quote_name(column) for column in key_columns)
+    counters = [ops.quote_name(column) for column in _COUNTERS]
+    updates = ', '.join(f'{column} = {table}.{column} + excluded.{column}' for column in counters)
+    fields = [model._meta.get_field(column) for column in (*key_columns, *_COUNTERS)]
+    prepare = [prep or _unchanged for prep in preparers(fields, connection)]
+    max_params = connection.features.max_query_params
+    batch_size = max(1, max_params // len(fields)) if max_params else 500
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(deltas), batch_size):
+            batch = deltas[start:start + batch_size]
+            values = ', '.join(['(' + ', '.join(['%s'] * len(fields)) + ')'] * len(batch))
+            params = [
+                prep(value)
+                for key_values, counter_values in batch
+                for prep, value in zip(prepare, (*key_values, *counter_values))
+            ]
+            cursor.execute(
+                f'INSERT INTO {table} ({key}, {", ".join(counters)}) VALUES {values} '
+                f'ON CONFLICT ({key}) DO UPDATE SET {updates}',
+                params,
+            )
+
+
+def preparers(fields, connection):
+    """``get_db_prep_save`` for each of ``fields``, or ``None`` where drivers take the Python value as it is."""
+    return [
+        None if (field.target_field if field.is_relation else field).get_internal_type() in _PLAIN_TYPES
+        else partial(field.get_db_prep_save, connection=connection)
+        for field in fields
+    ]
+
+
+def _unchanged(value):
+    return value
+
+
+def _zero():
+    return {'nights': 0, 'revenue': Decimal('0'), 'arrivals': 0, 'amount_paid': Decimal('0')}
+
+
+def _figures(nights, revenue, available):
+    return {
+        'availableRoomNights': available,
+        'nightsSold': nights,
+        'occupancy': round(100 * nights / available, 2) if available else 0.0,
+        'revenue': _money(revenue),
+        'adr': _money(revenue / nights if nights else 0),
+        'revpar': _money(revenue / available if available else 0),
+    }
+
+
+def _breakdown(totals):
+    return {
+        'nights': totals['nights'],
+        'revenue': _money(totals['revenue']),
+        'arrivals': totals['arrivals'],
+        'amountPaid': _money(totals['amount_paid']),
+    }
+
+
+def _money(value):
+    return str(Decimal(value).quantize(Decimal('0.01')))
@@ -0,0 +1,260 @@
+"""Synthetic hotel data for benchmarks.
+
+Everything created here is tagged (``BENCH-`` references, ``Bench Room``
+and ``Bench Rate`` names, ``@bench.local`` emails) so ``clear()`` can remove it again without
+touching real data.
+"""
+
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from accounts.models import User, UserRole
+from rooms.models import RatePlan, Room
+
+from . import inventory, search, stats
+from .models import ACTIVE_STATUSES, Booking, BookingEvent, BookingStatus, PaymentMethod, PaymentStatus, RoomNight
+
+REFERENCE_PREFIX = 'BENCH-'
+ROOM_PREFIX = 'Bench Room'
+RATE_PLAN_PREFIX = 'Bench Rate'
+EMAIL_DOMAIN = 'bench.local'
+
+_ZERO = Decimal('0')
+
+_STATUS_WEIGHTS = (
+    (BookingStatus.PENDING, 2),
+    (BookingStatus.CONFIRMED, 5),
+    (BookingStatus.CANCELLED, 2),
+    (BookingStatus.CHECKED_IN, 1),
+    (BookingStatus.CHECKED_OUT, 4),
+)
+
+
+def seed_rooms(count, seed=None):
+    """Create ``count`` rooms with prices, sizes and amenities drawn from ``seed``; returns their ids in order."""
+    rng = random.Random(seed)
+    rooms = [
+        Room(
+            name=f'{ROOM_PREFIX} {index}',
+            price=f'{rng.randint(80, 400)}.00',
+            size=rng.randint(20, 80),
+            max_occupancy=rng.randint(1, 4),
+            amenities=rng.sample(['Free WiFi', 'Smart TV', 'Air Conditioning', 'Mini Bar', 'Ocean View'], 3),
+        )
+        for index in range(count)
+    ]
+    Room.objects.bulk_create(rooms, batch_size=1000)
+    # In id order, so bookings drawn from the list with the same seed match too.
+    return list(Room.objects.filter(name__startswith=ROOM_PREFIX).order_by('pk').values_list('pk', flat=True))
+
+
+def seed_users(count):
+    """Create ``count`` guests; nothing about them is random. Returns their ids in order."""
+    users = [
+        User(email=f'guest{index}@{EMAIL_DOMAIN}', full_name=f'Bench Guest {index}', role=UserRole.CUSTOMER)
+        for index in range(count)
+    ]
+    for user in users:
+        user.set_unusable_password()
+    User.objects.bulk_create(users, batch_size=1000)
+    return list(User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').order_by('pk').values_list('pk', flat=True))
+
+
+def seed_rate_plans(room_ids, start=None, seed=None):
+    """A hotel-wide weekend uplift plus a season and an offer per room over a year from ``start``."""
+    rng = random.Random(seed)
+    start = start or date.today()
+    plans = [RatePlan(name=f'{RATE_PLAN_PREFIX} weekend', weekdays=0b0110000, adjustment_percent='15.00')]
+    for room_id in room_ids:
+        season = start + timedelta(days=rng.randint(0, 300))
+        offer = start + timedelta(days=rng.randint(0, 330))
+        plans += [
+            RatePlan(
+                name=f'{RATE_PLAN_PREFIX} season', room_id=room_id, start_date=season,
+                end_date=season + timedelta(days=rng.randint(14, 60)), nightly_price=f'{rng.randint(150, 500)}.00',
+                priority=5,
+            ),
+            RatePlan(
+                name=f'{RATE_PLAN_PREFIX} midweek offer', room_id=room_id, start_date=offer,
+                end_date=offer + timedelta(days=30), weekdays=0b0001111, adjustment_percent='-10.00', priority=10,
+            ),
+        ]
+    RatePlan.objects.bulk_create(plans, batch_size=1000)
+    return len(plans)
+
+
+def seed_bookings(room_ids, user_ids, count, start=None, span_days=730, batch_size=5000, seed=None):
+    """Insert ``count`` bookings spread over ``span_days`` around ``start``.
+
+    Stays are laid out back to back per room, so active bookings never overlap
+    and the per-night inventory stays consistent. Rows go in as plain values
+    through ``insert_rows`` rather than as model instances. Returns the
+    number inserted.
+    """
+    rng = random.Random(seed)
+    start = start or date.today() - timedelta(days=span_days // 2)
+    statuses = [status for status, weight in _STATUS_WEIGHTS for _ in range(weight)]
+    cursors = {room_id: start + timedelta(days=rng.randint(0, 3)) for room_id in room_ids}
+    prices = dict(Room.objects.filter(pk__in=room_ids).values_list('pk', 'price'))
+    totals = stats.contributions((), prices)
+    now = timezone.now()
+
+    inserted = 0
+    while inserted < count:
+        bookings = []
+        nights = []
+        states = []
+        for _ in range(min(batch_size, count - inserted)):
+            room_id = rng.choice(room_ids)
+            check_in = cursors[room_id]
+            if check_in > start + timedelta(days=span_days):
+                check_in = start + timedelta(days=rng.randint(0, span_days))
+                status = BookingStatus.CANCELLED
+            else:
+                status = rng.choice(statuses)
+            check_out = check_in + timedelta(days=rng.randint(1, 6))
+            cursors[room_id] = max(cursors[room_id], check_out + timedelta(days=rng.randint(0, 2)))
+
+            booking = {
+                'id': uuid.UUID(int=rng.getrandbits(128), version=4),
+                'reference': f'{REFERENCE_PREFIX}{rng.getrandbits(48):012X}',
+                'room_id': room_id,
+                'created_by_id': rng.choice(user_ids) if user_ids and rng.random() < 0.7 else None,
+                'check_in': check_in,
+                'check_out': check_out,
+                'adults': rng.randint(1, 2),
+                'children': rng.randint(0, 2),
+                'status': status,
+                'payment_status': PaymentStatus.PAID if status == BookingStatus.CHECKED_OUT else PaymentStatus.UNPAID,
+                'payment_method': rng.choice(PaymentMethod.values),
+                'guest_first_name': f'Guest{rng.randint(1, 99999)}',
+                'guest_last_name': 'Bench',
+                'guest_email': f'guest{rng.randint(1, 99999)}@{EMAIL_DOMAIN}',
+                'guest_phone': f'+233{rng.randint(200000000, 599999999)}',
+                'created_at': now,
+                'updated_at': now,
+            }
+            booking['search_key'] = search.search_key(SimpleNamespace(**booking))
+            bookings.append(booking)
+            states.append((room_id, check_in, check_out, status, booking['payment_method'], _ZERO))
+            if status in ACTIVE_STATUSES:
+                nights.extend(
+                    {'room_id': room_id, 'night': night, 'booking_id': booking['id']}
+                    for night in inventory.stay_nights(check_in, check_out)
+                )
+
+        with transaction.atomic():
+            insert_rows(Booking, bookings)
+            insert_rows(RoomNight, nights)
+        stats.contributions(states, prices, into=totals)
+        inserted += len(bookings)
+    # Summed over every batch, so each stats row is written once.
+    with transaction.atomic():
+        stats.apply(totals)
+    return inserted
+
+
+def insert_rows(model, rows):
+    """Insert ``rows``, dicts of attribute name to value, without building model instances.
+
+    Fields the rows leave out take their defaults. Nothing is validated and
+    no signals are sent, so callers keep derived tables in step themselves.
+    """
+    if not rows:
+        return
+    connection = connections[DEFAULT_DB_ALIAS]
+    fields = [field for field in model._meta.concrete_fields if not field.db_returning]
+    defaults = {field.attname: field.get_default() for field in fields if field.attname not in rows[0]}
+    prepare = list(zip((field.attname for field in fields), stats.preparers(fields, connection)))
+    params = [
+        [
+            value if prep is None else prep(value)
+            for attname, prep in prepare
+            for value in (row[attname] if attname in row else defaults[attname],)
+        ]
+        for row in rows
+    ]
+
+    ops = connection.ops
+    table = ops.quote_name(model._meta.db_table)
+    columns = ', '.join(ops.quote_name(field.column) for field in fields)
+    placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # One prepared statement stepped per row beats 999-parameter VALUES lists.
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES {placeholders}', params)
+            return
+        max_params = connection.features.max_query_params
+        per_statement = max(1, max_params // len(fields)) if max_params else 1000
+        for start in range(0, len(params), per_statement):
+            batch = params[start:start + per_statement]
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) VALUES {", ".join([placeholders] * len(batch))}',
+                [value for row in batch for value in row],
+            )
+
+
+def clear():
+    """Delete every synthetic booking, room, rate plan and user."""
+    bookings = Booking.objects.filter(reference__startswith=REFERENCE_PREFIX)
+    with transaction.atomic(), stats.paused():
+        RoomNight.objects.filter(booking__in=bookings).delete()
+        BookingEvent.objects.filter(booking__in=bookings).delete()
+        # A plain DELETE: the collector would load every booking to send
+        # post_delete, and its one receiver (stats) is paused here anyway.
+        bookings._raw_delete(bookings.db)
+        RatePlan.objects.filter(name__startswith=RATE_PLAN_PREFIX).delete()
+        # The room stats of the synthetic rooms go with the rooms themselves;
+        # the hotel totals are then summed again from the rooms left.
+        Room.objects.filter(name__startswith=ROOM_PREFIX).delete()
+        stats.rebuild_hotel()
+        User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+
+
+def build_bookings(count, rooms=50, users=500, seed=None):
+    """Return ``count`` unsaved bookings with their rooms and users attached.
+
+    Nothing touches the database, which makes this the input for serializer
+    and renderer benchmarks at sizes the test database could not hold.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    room_objs = [
+        Room(pk=index, name=f'{ROOM_PREFIX} {index}', price=f'{rng.randint(80, 400)}.00',
+             amenities=['Free WiFi', 'Smart TV'], created_at=now, updated_at=now)
+        for index in range(1, rooms + 1)
+    ]
+    user_objs = [
+        User(pk=index, email=f'guest{index}@{EMAIL_DOMAIN}', full_name=f'Bench Guest {index}', role=UserRole.CUSTOMER)
+        for index in range(1, users + 1)
+    ]
+
+    bookings = []
+    for _ in range(count):
+        check_in = date(2030, 1, 1) + timedelta(days=rng.randint(0, 365))
+        bookings.append(Booking(
+            id=uuid.uuid4(),
+            reference=f'{REFERENCE_PREFIX}{uuid.uuid4().hex[:12].upper()}',
+            room=rng.choice(room_objs),
+            created_by=rng.choice(user_objs) if rng.random() < 0.7 else None,
+            check_in=check_in,
+            check_out=check_in + timedelta(days=rng.randint(1, 6)),
+            status=rng.choice(BookingStatus.values),
+            payment_status=rng.choice(PaymentStatus.values),
+            payment_method=rng.choice(PaymentMethod.values),
+            amount_paid=f'{rng.randint(0, 900)}.50',
+            guest_first_name='Ama',
+            guest_last_name='Mensah',
+            guest_email=f'guest{rng.randint(1, 99999)}@{EMAIL_DOMAIN}',
+            guest_phone=f'+233{rng.randint(200000000, 599999999)}',
+            created_at=now,
+            updated_at=now,
+        ))
+    return bookings
+
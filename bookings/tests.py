@@ -1,3 +1,1289 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import multiprocessing
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserRole
+from accounts.serializers import LoginTokenSerializer
+from backend import metrics, profiling, warmup
+from backend.parsers import FastJSONParser
+from backend.renderers import FastJSONRenderer
+from rooms.models import Room
+from rooms.serializers import RoomSerializer
+
+from . import calendar, events, holds, inventory, stats, synthetic
+from .locking import locked_rooms
+from .models import (
+    ACTIVE_STATUSES,
+    Booking,
+    BookingEvent,
+    BookingStatus,
+    DailyHotelStat,
+    DailyRoomStat,
+    PaymentMethod,
+    PaymentStatus,
+    RoomNight,
+)
+from .serializers import BookingSerializer
+
+
+class RoomInventoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [Room.objects.create(name=f'Room {index}', price='100.00') for index in range(2)]
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+
+    def book(self, room, day, nights=2, **fields):
+        return Booking.objects.create(
+            room=room, check_in=date(2030, 1, day), check_out=date(2030, 1, day + nights), **fields
+        )
+
+    def nights(self, booking):
+        return sorted(RoomNight.objects.filter(booking=booking).values_list('room_id', 'night'))
+
+    def test_sync_booking_follows_room_dates_and_status(self):
+        booking = self.book(self.rooms[0], 1)
+        self.assertEqual(self.nights(booking), [(self.rooms[0].pk, date(2030, 1, 1)), (self.rooms[0].pk, date(2030, 1, 2))])
+
+        booking.room = self.rooms[1]
+        booking.check_out = date(2030, 1, 4)
+        booking.save()
+        self.assertEqual([night for _room, night in self.nights(booking)], [date(2030, 1, day) for day in (1, 2, 3)])
+        self.assertEqual({room for room, _night in self.nights(booking)}, {self.rooms[1].pk})
+
+        booking.status = BookingStatus.CANCELLED
+        booking.save(update_fields=['status', 'updated_at'])
+        self.assertEqual(self.nights(booking), [])
+        booking.status = BookingStatus.CONFIRMED
+        booking.save(update_fields=['status', 'updated_at'])
+        self.assertEqual(len(self.nights(booking)), 3)
+
+    def test_rebuild_and_verify(self):
+        kept = self.book(self.rooms[0], 1)
+        self.book(self.rooms[0], 3, nights=3)
+        self.book(self.rooms[1], 1, status=BookingStatus.CANCELLED)
+        self.assertEqual(inventory.verify(), (set(), set(), set()))
+
+        RoomNight.objects.filter(booking=kept, night=date(2030, 1, 2)).delete()
+        stray = self.book(self.rooms[1], 10)
+        Booking.objects.filter(pk=stray.pk).update(status=BookingStatus.CANCELLED)
+        missing, unexpected, _conflicts = inventory.verify()
+        self.assertEqual(missing, {(kept.pk, self.rooms[0].pk, date(2030, 1, 2))})
+        self.assertEqual(unexpected, {(stray.pk, self.rooms[1].pk, date(2030, 1, 10)), (stray.pk, self.rooms[1].pk, date(2030, 1, 11))})
+
+        self.assertEqual(inventory.rebuild(), (5, set()))
+        self.assertEqual(inventory.verify(), (set(), set(), set()))
+
+    def test_overlapping_bookings_are_reported_not_raised(self):
+        older = self.book(self.rooms[0], 1)
+        newer = self.book(self.rooms[0], 5)
+        # Overlaps the database accepted before room nights were unique.
+        Booking.objects.filter(pk=newer.pk).update(
+            check_in=date(2030, 1, 2), check_out=date(2030, 1, 4), created_at=older.created_at + timedelta(seconds=1)
+        )
+        overlap = {(newer.pk, self.rooms[0].pk, date(2030, 1, 2), older.pk)}
+
+        self.assertEqual(inventory.verify()[2], overlap)
+        self.assertEqual(inventory.rebuild(), (3, overlap))
+        self.assertEqual(self.nights(older), [(self.rooms[0].pk, date(2030, 1, day)) for day in (1, 2)])
+        self.assertEqual(self.nights(newer), [(self.rooms[0].pk, date(2030, 1, 3))])
+        self.assertEqual(inventory.verify(), (set(), set(), overlap))
+
+        out = io.StringIO()
+        with self.assertRaisesMessage(CommandError, '1 overlapping room nights'):
+            call_command('rebuild_inventory', '--verify', stdout=out)
+        self.assertIn(f'is held by booking {older.pk}', out.getvalue())
+
+    def test_a_night_is_held_once(self):
+        first = self.book(self.rooms[0], 1)
+        second = self.book(self.rooms[0], 5, status=BookingStatus.CANCELLED)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RoomNight.objects.create(room=self.rooms[0], night=date(2030, 1, 2), booking=second)
+
+        # Reactivating a cancelled booking whose nights were taken meanwhile.
+        Booking.objects.filter(pk=second.pk).update(check_in=date(2030, 1, 2), check_out=date(2030, 1, 4))
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.patch(f'/api/admin/bookings/{second.pk}', {'status': 'CONFIRMED'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.get(pk=second.pk).status, BookingStatus.CANCELLED)
+        self.assertEqual(RoomNight.objects.filter(room=self.rooms[0]).count(), 2)
+        self.assertEqual(self.nights(first), [(self.rooms[0].pk, date(2030, 1, 1)), (self.rooms[0].pk, date(2030, 1, 2))])
+
+
+class BookingIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room_ids = synthetic.seed_rooms(6, seed=2)
+        user_ids = synthetic.seed_users(4)
+        synthetic.seed_bookings(room_ids, user_ids, 400, start=date(2030, 1, 1), span_days=120, seed=2)
+        # Spread creation times out, so the newest-first pages are not ordered by id alone.
+        bookings = list(Booking.objects.only('pk', 'check_in'))
+        for booking in bookings:
+            booking.created_at = datetime.combine(booking.check_in, datetime.min.time(), dt_timezone.utc)
+        Booking.objects.bulk_update(bookings, ['created_at'])
+        cls.rows = list(Booking.objects.values('pk', 'room_id', 'created_by_id', 'check_in', 'check_out', 'status', 'created_at'))
+
+    def newest(self, rows):
+        return [row['pk'] for row in sorted(rows, key=lambda row: (row['created_at'], row['pk']), reverse=True)][:50]
+
+    def queries(self):
+        """``{label: (queryset, expected pks, index)}`` for the access paths the indexes serve."""
+        sample = next(row for row in self.rows if row['created_by_id'] is not None)
+        check_in, check_out = sample['check_in'], sample['check_in'] + timedelta(days=3)
+        return {
+            'overlap check': (
+                Booking.objects.filter(
+                    room_id=sample['room_id'], status__in=ACTIVE_STATUSES, check_in__lt=check_out, check_out__gt=check_in
+                ).order_by('pk'),
+                sorted(
+                    row['pk'] for row in self.rows
+                    if row['room_id'] == sample['room_id'] and row['status'] in ACTIVE_STATUSES
+                    and row['check_in'] < check_out and row['check_out'] > check_in
+                ),
+                'booking_room_status_stay_idx',
+            ),
+            'my bookings page': (
+                Booking.objects.filter(created_by_id=sample['created_by_id']).order_by('-created_at', '-id')[:50],
+                self.newest(row for row in self.rows if row['created_by_id'] == sample['created_by_id']),
+                'booking_creator_recent_idx',
+            ),
+            'admin bookings page': (
+                Booking.objects.order_by('-created_at', '-id')[:50], self.newest(self.rows), 'booking_recent_idx'
+            ),
+            'admin status filter': (
+                Booking.objects.filter(status=BookingStatus.CONFIRMED).order_by('-created_at', '-id')[:50],
+                self.newest(row for row in self.rows if row['status'] == BookingStatus.CONFIRMED),
+                'booking_status_recent_idx',
+            ),
+        }
+
+    def test_indexed_queries_return_what_a_scan_does(self):
+        for label, (queryset, expected, _index) in self.queries().items():
+            with self.subTest(query=label):
+                self.assertTrue(expected)
+                self.assertEqual(list(queryset.values_list('pk', flat=True)), expected)
+
+    def test_queries_use_their_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plans are checked on SQLite only')
+        for label, (queryset, _expected, index) in self.queries().items():
+            with self.subTest(query=label):
+                self.assertIn(f'USING INDEX {index}', queryset.explain())
+
+    def test_bench_command(self):
+        out = io.StringIO()
+        call_command('bench_booking_queries', rooms=3, users=3, bookings=50, repeat=2, stdout=out)
+        self.assertIn('overlap check', out.getvalue())
+
+
+class ConcurrentBookingCreateTests(TransactionTestCase):
+    workers = 16
+
+    def setUp(self):
+        self.rooms = [Room.objects.create(name=f'Room {index}', price='100.00', max_occupancy=2) for index in range(10)]
+        self.check_in = date.today() + timedelta(days=30)
+
+    def _post(self, room_id, offset):
+        client = APIClient()
+        try:
+            response = client.post(
+                '/api/bookings/',
+                {
+                    'roomId': room_id,
+                    'checkIn': (self.check_in + timedelta(days=offset)).isoformat(),
+                    'checkOut': (self.check_in + timedelta(days=offset + 2)).isoformat(),
+                    'guestInfo': {'email': 'guest@example.com'},
+                },
+                format='json',
+            )
+            return response.status_code
+        finally:
+            close_old_connections()
+
+    def _run(self, jobs):
+        barrier = threading.Barrier(self.workers)
+
+        def job(args):
+            try:
+                barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+            return self._post(*args)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(job, jobs))
+
+    def test_same_stay_is_booked_once(self):
+        room_id = self.rooms[0].pk
+        codes = self._run([(room_id, 0)] * 200)
+
+        self.assertEqual(codes.count(201), 1)
+        self.assertEqual(codes.count(409), 199)
+        self.assertEqual(Booking.objects.filter(room_id=room_id).count(), 1)
+
+    def test_parallel_creates_never_overlap(self):
+        # 300 requests with overlapping stays spread over 10 rooms.
+        jobs = [(room.pk, offset) for offset in range(30) for room in self.rooms]
+        codes = self._run(jobs)
+
+        self.assertEqual(set(codes), {201, 409})
+        self.assertEqual(codes.count(201), Booking.objects.count())
+        for room in self.rooms:
+            stays = sorted(
+                Booking.objects.filter(room=room, status__in=ACTIVE_STATUSES).values_list('check_in', 'check_out')
+            )
+            for (_, previous_out), (next_in, _) in zip(stays, stays[1:]):
+                self.assertLessEqual(previous_out, next_in)
+        self.assertEqual(stats.verify(), set())
+
+
+    @skipIf(connection.vendor == 'sqlite', 'SQLite serializes every write transaction on the database lock.')
+    def test_a_held_room_does_not_block_creates_for_other_rooms(self):
+        held, other = self.rooms[0].pk, self.rooms[1].pk
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            with locked_rooms([held]):
+                waiting = pool.submit(self._post, held, 0)
+                self.assertEqual(pool.submit(self._post, other, 0).result(timeout=10), 201)
+                self.assertFalse(waiting.done())
+            self.assertEqual(waiting.result(timeout=10), 201)
+
+    def test_bench_command(self):
+        out = io.StringIO()
+        call_command('bench_booking_creates', rooms=3, requests=12, workers=4, stdout=out)
+        self.assertIn('3 rooms: ', out.getvalue())
+        self.assertIn('the single-room throughput', out.getvalue())
+        self.assertEqual(Booking.objects.count(), 0)
+        self.assertEqual(stats.verify(), set())
+
+
+class AdminCalendarTests(TestCase):
+    start = date(2030, 1, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [Room.objects.create(name=f'Room {index}', price='100.00') for index in range(3)]
+        Room.objects.create(name='Closed', price='100.00', is_active=False)
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        stays = [
+            # Starts before the window and is clipped to it.
+            (cls.rooms[0], date(2030, 1, 8), date(2030, 1, 12), BookingStatus.CHECKED_IN),
+            (cls.rooms[0], date(2030, 1, 14), date(2030, 1, 15), BookingStatus.PENDING),
+            # Runs past the end of the window.
+            (cls.rooms[1], date(2030, 1, 16), date(2030, 1, 25), BookingStatus.CONFIRMED),
+            (cls.rooms[1], date(2030, 1, 11), date(2030, 1, 13), BookingStatus.CANCELLED),
+            (cls.rooms[2], date(2030, 1, 1), date(2030, 1, 10), BookingStatus.CHECKED_OUT),
+        ]
+        for room, check_in, check_out, status in stays:
+            Booking.objects.create(room=room, check_in=check_in, check_out=check_out, status=status)
+
+    def cells(self, nights):
+        # Night by night, straight from the bookings: the grid the bitsets must reproduce.
+        grid = {}
+        for room in self.rooms:
+            for offset in range(nights):
+                night = self.start + timedelta(days=offset)
+                grid[room.pk, offset] = Booking.objects.filter(
+                    room=room, status__in=calendar.GRID_STATUSES, check_in__lte=night, check_out__gt=night
+                ).values_list('status', flat=True).first()
+        return grid
+
+    def test_grid_matches_the_bookings_night_by_night(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        nights = 10
+        grid = client.get('/api/admin/calendar', {'start': self.start.isoformat(), 'nights': nights}).json()
+        expected = self.cells(nights)
+
+        self.assertEqual([room['id'] for room in grid['rooms']], [room.pk for room in self.rooms])
+        self.assertEqual(grid['end'], '2030-01-20')
+        for room in grid['rooms']:
+            bitmap = int(room['bitmap'], 16)
+            drawn = {}
+            for offset, length, status_index in room['runs']:
+                for night in range(offset, offset + length):
+                    drawn[night] = grid['statuses'][status_index]
+            for offset in range(nights):
+                with self.subTest(room=room['name'], night=offset):
+                    self.assertEqual(bool(bitmap >> offset & 1), expected[room['id'], offset] is not None)
+                    self.assertEqual(drawn.get(offset), expected[room['id'], offset])
+        self.assertEqual(
+            grid['occupancy'],
+            [sum(expected[room.pk, offset] is not None for room in self.rooms) for offset in range(nights)],
+        )
+        self.assertEqual(grid['rooms'][0]['runs'], [[0, 2, 2], [4, 1, 0]])
+        self.assertEqual(grid['rooms'][2]['bitmap'], '0')
+
+    def test_window_validation(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/admin/calendar').status_code, 401)
+        client.force_authenticate(self.admin)
+        for params in ({'nights': 0}, {'nights': 367}, {'start': 'soon'}, {'start': '2030-01-10', 'end': '2030-01-10'}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get('/api/admin/calendar', params).status_code, 400)
+
+    def test_bench_command(self):
+        # Timings only; the budget is checked on realistic sizes, not here.
+        out = io.StringIO()
+        call_command('bench_calendar', rooms=5, nights=10, bookings=30, repeat=2, stdout=out)
+        self.assertIn('GET /api/admin/calendar: median', out.getvalue())
+        self.assertEqual(Room.objects.count(), 4)
+
+
+class BookingCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room = Room.objects.create(name='Room', price='100.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        Booking.objects.bulk_create(
+            Booking(reference=f'NCH-{index:010d}', room=room, check_in=date(2030, 1, 1), check_out=date(2030, 1, 2))
+            for index in range(25)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_pages_cover_every_booking_once(self):
+        seen = []
+        url = '/api/admin/bookings?page_size=10'
+        pages = 0
+        while url:
+            # The page itself plus its conditional-GET validators.
+            with self.assertNumQueries(2):
+                body = self.client.get(url).json()
+            seen.extend(row['id'] for row in body['results'])
+            url = body['next']
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(set(seen), {str(pk) for pk in Booking.objects.values_list('pk', flat=True)})
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/admin/bookings?cursor=garbage').status_code, 404)
+
+    @override_settings(BOOKINGS_LEGACY_LIST_RESPONSE=True)
+    def test_legacy_flag_returns_the_full_list(self):
+        body = self.client.get('/api/admin/bookings').json()
+        self.assertIsInstance(body, list)
+        self.assertEqual(len(body), 25)
+
+
+class AdminBookingSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Room', price='100.00')
+        cls.other_room = Room.objects.create(name='Other', price='80.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        cls.ama = Booking.objects.create(
+            room=cls.room, check_in=date(2030, 1, 1), check_out=date(2030, 1, 3), status=BookingStatus.CONFIRMED,
+            guest_first_name='Ámà', guest_last_name='Mensah', guest_email='Ama.Mensah@Example.com',
+            guest_phone='+233 (24) 412-3456',
+        )
+        cls.kofi = Booking.objects.create(
+            room=cls.other_room, check_in=date(2030, 2, 1), check_out=date(2030, 2, 5),
+            guest_first_name='Kofi', guest_last_name='Boateng', guest_email='kofi@example.com',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def ids(self, query):
+        response = self.client.get('/api/admin/bookings', query)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row['id'] for row in response.json()['results']}
+
+    def test_search_matches_name_email_phone_and_reference(self):
+        for query in ('ama mensah', 'AMA', 'mensah@example', '024 412', '4123456', self.ama.reference.lower()):
+            with self.subTest(query=query):
+                self.assertEqual(self.ids({'q': query}), {str(self.ama.pk)})
+        self.assertEqual(self.ids({'q': 'nobody'}), set())
+
+    def test_search_key_follows_guest_edits(self):
+        self.kofi.guest_last_name = 'Owusu'
+        self.kofi.save(update_fields=['guest_last_name', 'updated_at'])
+        self.assertEqual(self.ids({'q': 'owusu'}), {str(self.kofi.pk)})
+        self.assertEqual(self.ids({'q': 'boateng'}), set())
+
+    def test_filters(self):
+        self.assertEqual(self.ids({'status': 'confirmed,cancelled'}), {str(self.ama.pk)})
+        self.assertEqual(self.ids({'payment_status': 'UNPAID'}), {str(self.ama.pk), str(self.kofi.pk)})
+        self.assertEqual(self.ids({'check_in_from': '2030-01-15'}), {str(self.kofi.pk)})
+        self.assertEqual(self.ids({'check_out_to': '2030-01-03'}), {str(self.ama.pk)})
+        self.assertEqual(self.ids({'room': self.other_room.pk, 'q': 'kofi'}), {str(self.kofi.pk)})
+
+    def test_invalid_filters_are_rejected(self):
+        for query in ({'status': 'LOST'}, {'check_in_from': 'soon'}, {'room': 'x'}):
+            with self.subTest(query=query):
+                response = self.client.get('/api/admin/bookings', query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('message', response.json())
+
+    def test_django_admin_search_uses_the_key(self):
+        self.admin.is_staff = self.admin.is_superuser = True
+        self.admin.save()
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin/bookings/booking/', {'q': 'mensah'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.ama.reference)
+        self.assertNotContains(response, self.kofi.reference)
+
+
+class BookingListSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rooms = [Room.objects.create(name=f'Room {index}', price='129.50', amenities=['Free WiFi']) for index in range(3)]
+        guest = User.objects.create_user('guest@example.com', 'pw', full_name='Guest')
+        for index in range(12):
+            Booking.objects.create(
+                room=rooms[index % 3],
+                created_by=guest if index % 2 else None,
+                check_in=date(2030, 1, 1) + timedelta(days=2 * index),
+                check_out=date(2030, 1, 3) + timedelta(days=2 * index),
+                status=BookingStatus.CONFIRMED,
+                amount_paid='10.5',
+                guest_first_name='Ama',
+            )
+
+    def assertSameJSON(self, data):
+        per_row = serializers.ListSerializer(child=BookingSerializer()).to_representation(data)
+        fast = BookingSerializer(data, many=True).data
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(per_row))
+
+    def test_instances_match_per_row_serialization(self):
+        self.assertSameJSON(list(Booking.objects.select_related('room', 'created_by').order_by('-created_at')))
+
+    def test_queryset_matches_per_row_serialization(self):
+        queryset = Booking.objects.select_related('room', 'created_by').order_by('-created_at')
+        self.assertSameJSON(queryset)
+        with self.assertNumQueries(3):
+            BookingSerializer(queryset, many=True).data
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Room', price='100.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        cls.booking = Booking.objects.create(
+            room=cls.room, created_by=cls.admin, check_in=date(2030, 1, 1), check_out=date(2030, 1, 2)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def assertRevalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header('ETag'))
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+        return first['ETag']
+
+    def test_unchanged_resources_are_not_modified(self):
+        for url in ('/api/admin/bookings', '/api/bookings/me', f'/api/bookings/{self.booking.pk}'):
+            with self.subTest(url=url):
+                self.assertRevalidates(url)
+
+    def test_changes_produce_a_new_etag(self):
+        url = '/api/admin/bookings'
+        etag = self.assertRevalidates(url)
+
+        Booking.objects.filter(pk=self.booking.pk).update(updated_at=self.booking.updated_at + timedelta(seconds=5))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        Room.objects.filter(pk=self.room.pk).update(updated_at=self.room.updated_at + timedelta(seconds=5))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_room_catalog_is_not_modified(self):
+        client = APIClient()
+        for url in ('/api/rooms', f'/api/rooms/{self.room.pk}'):
+            first = client.get(url)
+            self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+
+class BookingExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Garden, "Deluxe"', price='100.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        cls.receptionist = User.objects.create_user('desk@example.com', 'pw', role=UserRole.RECEPTIONIST)
+        cls.confirmed = Booking.objects.create(
+            room=cls.room, created_by=cls.admin, check_in=date(2030, 1, 1), check_out=date(2030, 1, 3),
+            status=BookingStatus.CONFIRMED, amount_paid='200.00', guest_first_name='Ada',
+            special_requests='Late arrival,\nquiet room',
+        )
+        cls.cancelled = Booking.objects.create(
+            room=cls.room, check_in=date(2030, 2, 1), check_out=date(2030, 2, 2), status=BookingStatus.CANCELLED
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, suffix, **params):
+        response = self.client.get(f'/api/admin/bookings/export.{suffix}', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_matches_the_api_representation(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+        self.assertEqual([row['reference'] for row in rows], [self.confirmed.reference, self.cancelled.reference])
+
+        api = BookingSerializer(self.confirmed).data
+        row = rows[0]
+        for name in ('id', 'check_in', 'status', 'amount_paid', 'special_requests', 'created_at'):
+            self.assertEqual(row[name], str(api[name]))
+        self.assertEqual((row['room_name'], row['created_by_email']), ('Garden, "Deluxe"', 'admin@example.com'))
+        self.assertEqual(rows[1]['created_by_email'], '')
+
+    def test_csv_neutralizes_formulas(self):
+        Booking.objects.filter(pk=self.cancelled.pk).update(
+            guest_first_name='=HYPERLINK("http://evil.example","x")', guest_last_name='@SUM(A1)',
+            guest_email='-1+1@example.com', guest_phone='+233200000000', guest_city='\tAccra',
+            special_requests='\rcmd',
+        )
+        row = list(csv.DictReader(io.StringIO(self.export('csv'))))[1]
+        self.assertEqual(row['guest_first_name'], '\'=HYPERLINK("http://evil.example","x")')
+        self.assertEqual(
+            [row[name] for name in ('guest_last_name', 'guest_email', 'guest_phone', 'guest_city', 'special_requests')],
+            ["'@SUM(A1)", "'-1+1@example.com", "'+233200000000", "'\tAccra", "'\rcmd"],
+        )
+        self.assertEqual((row['amount_paid'], row['status']), ('0.00', 'CANCELLED'))
+        # JSON Lines are not opened as spreadsheets and keep the values as stored.
+        record = json.loads(self.export('jsonl', status='CANCELLED'))
+        self.assertEqual(record['guest_phone'], '+233200000000')
+
+    def test_jsonl_filters_by_status_and_check_in(self):
+        lines = self.export('jsonl', status='confirmed,checked_in', **{'from': '2030-01-01', 'to': '2030-01-31'})
+        records = [json.loads(line) for line in lines.splitlines()]
+        self.assertEqual([record['reference'] for record in records], [self.confirmed.reference])
+        self.assertEqual(records[0]['amount_paid'], '200.00')
+        self.assertEqual(self.export('jsonl', **{'from': '2030-03-01'}), '')
+
+    def test_invalid_filters_and_permissions(self):
+        self.assertEqual(self.client.get('/api/admin/bookings/export.csv', {'status': 'LOST'}).json(), {
+            'message': 'Unknown status: LOST'
+        })
+        self.assertEqual(self.client.get('/api/admin/bookings/export.csv', {'from': 'soon'}).status_code, 400)
+
+        self.client.force_authenticate(self.receptionist)
+        self.assertEqual(self.client.get('/api/admin/bookings/export.csv').status_code, 403)
+
+    def test_management_command(self):
+        output = io.StringIO()
+        call_command('export_bookings', '--format', 'jsonl', '--status', 'CANCELLED', stdout=output)
+        self.assertEqual(json.loads(output.getvalue())['reference'], self.cancelled.reference)
+
+    async def test_asgi_streams_asynchronously(self):
+        token = LoginTokenSerializer.get_token(self.admin).access_token
+        response = await AsyncClient().get(
+            '/api/admin/bookings/export.jsonl', headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).splitlines()
+        self.assertEqual(len(lines), 2)
+
+
+class BookingLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Room', price='100.00')
+        cls.booking = Booking.objects.create(
+            room=cls.room, check_in=date(2030, 1, 1), check_out=date(2030, 1, 2), guest_email='Ama@Example.com'
+        )
+
+    def setUp(self):
+        # Throttle counts live in the cache.
+        cache.clear()
+
+    def lookup(self, reference, email):
+        return APIClient().post('/api/bookings/lookup', {'reference': reference, 'email': email}, format='json')
+
+    def test_reference_and_email_find_the_booking(self):
+        with self.assertNumQueries(1):
+            response = self.lookup(self.booking.reference.lower(), ' ama@example.com ')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], str(self.booking.pk))
+
+    def test_wrong_email_looks_like_an_unknown_reference(self):
+        wrong_email = self.lookup(self.booking.reference, 'someone@example.com')
+        unknown = self.lookup('NCH-0000000000', 'ama@example.com')
+        self.assertEqual(wrong_email.status_code, 404)
+        self.assertEqual(wrong_email.json(), unknown.json())
+        self.assertEqual(self.lookup('', 'ama@example.com').status_code, 400)
+
+    def test_lookups_are_throttled(self):
+        for _ in range(10):
+            self.assertEqual(self.lookup('NCH-0000000000', 'ama@example.com').status_code, 404)
+        self.assertEqual(self.lookup(self.booking.reference, 'ama@example.com').status_code, 429)
+
+    def test_listing_is_for_staff_only(self):
+        self.assertEqual(APIClient().get('/api/bookings/').status_code, 401)
+        self.assertEqual(APIClient().get(f'/api/bookings/{self.booking.pk}').status_code, 200)
+
+    def test_save_draws_a_new_reference_on_collision(self):
+        fresh = 'NCH-FRESH00000'
+        references = iter([self.booking.reference, fresh])
+        with mock.patch.object(Booking, 'new_reference', side_effect=lambda: next(references)):
+            booking = Booking.objects.create(room=self.room, check_in=date(2030, 2, 1), check_out=date(2030, 2, 2))
+        self.assertEqual(booking.reference, fresh)
+        self.assertEqual(Booking.objects.get(pk=booking.pk).reference, fresh)
+        self.assertEqual(RoomNight.objects.filter(booking=booking).count(), 1)
+
+
+class BookingGroupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [Room.objects.create(name=f'Room {index}', price='100.00') for index in range(40)]
+        cls.guest = User.objects.create_user('lead@example.com', 'pw')
+        cls.check_in = date.today() + timedelta(days=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.guest)
+
+    def stay(self, room, offset=0, nights=2):
+        return {
+            'roomId': room.pk,
+            'checkIn': (self.check_in + timedelta(days=offset)).isoformat(),
+            'checkOut': (self.check_in + timedelta(days=offset + nights)).isoformat(),
+            'adults': 2,
+            'guestInfo': {'firstName': 'Tour', 'email': 'lead@example.com'},
+        }
+
+    def post(self, stays):
+        return self.client.post('/api/bookings/group', {'bookings': stays}, format='json')
+
+    def test_group_is_created_with_nights_and_unique_references(self):
+        response = self.post([self.stay(room) for room in self.rooms[:3]] + [self.stay(self.rooms[0], offset=2)])
+        self.assertEqual(response.status_code, 201)
+
+        bookings = response.json()['bookings']
+        self.assertEqual([booking['room']['id'] for booking in bookings], [room.pk for room in self.rooms[:3]] + [self.rooms[0].pk])
+        self.assertEqual(len({booking['reference'] for booking in bookings}), 4)
+        self.assertTrue(all(booking['created_by']['email'] == 'lead@example.com' for booking in bookings))
+        self.assertEqual(RoomNight.objects.count(), 8)
+        self.assertFalse(inventory.is_room_available(self.rooms[0].pk, self.check_in, self.check_in + timedelta(days=4)))
+
+    def test_round_trips_do_not_grow_with_the_group(self):
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.post([self.stay(room) for room in self.rooms[:2]]).status_code, 201)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.post([self.stay(room, offset=5) for room in self.rooms]).status_code, 201)
+        self.assertEqual(len(small), len(large))
+
+    def test_one_unavailable_stay_books_nothing(self):
+        Booking.objects.create(room=self.rooms[1], check_in=self.check_in, check_out=self.check_in + timedelta(days=1))
+
+        response = self.post([self.stay(room) for room in self.rooms[:3]])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicts'], [1])
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), 1)
+
+    def test_stored_references_are_not_reused(self):
+        existing = Booking.objects.create(room=self.rooms[3], check_in=self.check_in, check_out=self.check_in + timedelta(days=1))
+        drawn = iter([existing.reference, 'NCH-GROUP00001', existing.reference, 'NCH-GROUP00002'])
+        with mock.patch.object(Booking, 'new_reference', side_effect=lambda: next(drawn)):
+            response = self.post([self.stay(room) for room in self.rooms[:2]])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual({booking['reference'] for booking in response.json()['bookings']}, {'NCH-GROUP00001', 'NCH-GROUP00002'})
+
+    def test_a_constraint_violation_is_a_conflict(self):
+        Booking.objects.create(room=self.rooms[1], check_in=self.check_in, check_out=self.check_in + timedelta(days=1))
+        # As if another request took the night between the check and the insert.
+        with mock.patch.object(inventory, 'taken_nights', return_value=set()):
+            response = self.post([self.stay(room) for room in self.rooms[:3]])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_invalid_groups_are_rejected(self):
+        overlapping = self.post([self.stay(self.rooms[0]), self.stay(self.rooms[0], offset=1)])
+        self.assertEqual(overlapping.status_code, 400)
+        self.assertEqual(overlapping.json(), {'bookings': ['Stays for the same room overlap within the group']})
+
+        missing = self.post([self.stay(self.rooms[0]), {**self.stay(self.rooms[1]), 'roomId': 999999}])
+        self.assertEqual(missing.status_code, 400)
+        self.assertEqual(missing.json(), {'bookings': [{}, {'roomId': ['Room not found']}]})
+
+        past = self.post([{**self.stay(self.rooms[0]), 'checkIn': '2000-01-01'}])
+        self.assertEqual(past.status_code, 400)
+        endless = self.post([self.stay(self.rooms[0], nights=367)])
+        self.assertEqual(endless.status_code, 400)
+        self.assertIn('A stay must cover 1 to 366 nights', endless.content.decode())
+        single = self.client.post('/api/bookings/', self.stay(self.rooms[0], nights=367), format='json')
+        self.assertEqual(single.status_code, 400)
+        self.assertEqual(self.client.post('/api/bookings/', self.stay(self.rooms[0], nights=366), format='json').status_code, 201)
+        self.assertEqual(RoomNight.objects.count(), 366)
+        Booking.objects.all().delete()
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(Booking.objects.count(), 0)
+
+
+class DailyRoomStatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [Room.objects.create(name=f'Room {index}', price='100.00') for index in range(4)]
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        cls.receptionist = User.objects.create_user('desk@example.com', 'pw', role=UserRole.RECEPTIONIST)
+        cls.check_in = date.today() + timedelta(days=5)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def book(self, room, offset=0, nights=2):
+        response = self.client.post('/api/bookings/', {
+            'roomId': room.pk,
+            'checkIn': (self.check_in + timedelta(days=offset)).isoformat(),
+            'checkOut': (self.check_in + timedelta(days=offset + nights)).isoformat(),
+            'guestInfo': {'email': 'guest@example.com'},
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def report(self, nights=10):
+        response = self.client.get('/api/admin/reports/occupancy', {'start': self.check_in.isoformat(), 'nights': nights})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_stats_follow_every_write_path(self):
+        # The hotel rows are written once each change commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.book(self.rooms[0])
+            second = self.book(self.rooms[1], nights=3)
+            self.client.post('/api/bookings/group', {'bookings': [
+                {'roomId': room.pk, 'checkIn': self.check_in.isoformat(),
+                 'checkOut': (self.check_in + timedelta(days=1)).isoformat(), 'guestInfo': {}}
+                for room in self.rooms[2:]
+            ]}, format='json')
+            self.client.patch(f'/api/admin/bookings/{first}', {
+                'status': 'CONFIRMED', 'payment_method': 'MOMO', 'payment_status': 'PAID', 'amount_paid': '200.00',
+            }, format='json')
+            self.client.delete(f'/api/bookings/{second}/cancel')
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.filter(room=self.rooms[3]).get().delete()
+        self.assertEqual(stats.verify(), set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/rooms/{self.rooms[0].pk}', {'price': '150.00'}, format='json')
+        self.assertEqual(stats.verify(), set())
+
+        report = self.report()
+        self.assertEqual((report['rooms'], report['availableRoomNights'], report['nightsSold']), (4, 40, 2))
+        self.assertEqual((report['occupancy'], report['revenue'], report['adr'], report['revpar']), (5.0, '300.00', '150.00', '7.50'))
+        self.assertEqual((report['arrivals'], report['amountPaid']), (1, '200.00'))
+        self.assertEqual(report['byStatus']['CANCELLED']['nights'], 3)
+        self.assertEqual(report['byStatus']['PENDING']['nights'], 1)
+        self.assertEqual(report['byPaymentMethod']['MOMO']['amountPaid'], '200.00')
+        self.assertEqual([day['nightsSold'] for day in report['daily'][:3]], [1, 1, 0])
+
+        room = self.client.get(
+            '/api/admin/reports/occupancy', {'start': self.check_in.isoformat(), 'nights': 10, 'room': self.rooms[0].pk}
+        ).json()
+        self.assertEqual((room['rooms'], room['nightsSold'], room['occupancy'], room['revenue']), (1, 2, 20.0, '300.00'))
+
+    def test_rebuild_matches_incremental_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.rooms[0])
+            self.book(self.rooms[0], offset=4, nights=1)
+        before = self.report()
+
+        DailyRoomStat.objects.all().delete()
+        DailyHotelStat.objects.all().delete()
+        call_command('rebuild_stats', stdout=io.StringIO())
+        self.assertEqual(self.report(), before)
+        call_command('rebuild_stats', '--verify', stdout=io.StringIO())
+
+    def test_hotel_rows_are_written_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.rooms[0])
+            self.assertTrue(DailyRoomStat.objects.exists())
+            # Shared by every room, so not locked by the booking's transaction.
+            self.assertFalse(DailyHotelStat.objects.exists())
+        self.assertTrue(DailyHotelStat.objects.exists())
+        self.assertEqual(stats.verify(), set())
+
+    def test_a_failed_hotel_increment_is_logged_and_repairable(self):
+        increment = stats._increment
+
+        def fail_for_hotel(model, *args):
+            if model is DailyHotelStat:
+                raise RuntimeError('connection lost')
+            return increment(model, *args)
+
+        with mock.patch.object(stats, '_increment', side_effect=fail_for_hotel):
+            with self.assertLogs('bookings.stats', 'ERROR') as logs, self.captureOnCommitCallbacks(execute=True):
+                booking_id = self.book(self.rooms[0])
+        self.assertIn('rebuild_stats --hotel', logs.output[0])
+        self.assertTrue(Booking.objects.filter(pk=booking_id).exists())
+        self.assertTrue(stats.verify())
+        self.assertTrue(all(room_id is None for room_id, *_key in stats.verify()))
+
+        call_command('rebuild_stats', '--hotel', stdout=io.StringIO())
+        self.assertEqual(stats.verify(), set())
+
+    def test_price_change_touches_only_the_rooms_dates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.rooms[0])
+            self.book(self.rooms[1], offset=5)
+        untouched = dict(DailyHotelStat.objects.filter(date__gte=self.check_in + timedelta(days=5)).values_list('pk', 'revenue'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room = Room.objects.get(pk=self.rooms[0].pk)
+            room.price = '150.00'
+            room.save()
+        self.assertEqual(stats.verify(), set())
+        self.assertEqual(
+            dict(DailyHotelStat.objects.filter(date__gte=self.check_in + timedelta(days=5)).values_list('pk', 'revenue')),
+            untouched,
+        )
+        self.assertEqual(self.report()['byStatus']['PENDING']['revenue'], '500.00')
+
+    def test_report_cost_does_not_depend_on_bookings(self):
+        for index in range(3):
+            self.book(self.rooms[index])
+        with self.assertNumQueries(2):
+            self.report(nights=365)
+
+    def test_report_is_admin_only(self):
+        self.assertEqual(self.client.get('/api/admin/reports/occupancy', {'nights': 0}).status_code, 400)
+        self.client.force_authenticate(self.receptionist)
+        self.assertEqual(self.client.get('/api/admin/reports/occupancy').status_code, 403)
+
+
+@override_settings(BOOKING_HOLD_TTL_MINUTES=30)
+class HoldExpiryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Room', price='100.00')
+
+    def hold(self, age_minutes, day=1, **fields):
+        booking = Booking.objects.create(
+            room=self.room, check_in=date(2030, 1, day), check_out=date(2030, 1, day + 1), **fields
+        )
+        Booking.objects.filter(pk=booking.pk).update(created_at=timezone.now() - timedelta(minutes=age_minutes))
+        return booking
+
+    def test_stale_unpaid_holds_are_cancelled_and_released(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            stale = [self.hold(60, day=day) for day in range(1, 6)]
+            fresh = self.hold(5, day=10)
+            paid = self.hold(60, day=11, payment_status=PaymentStatus.PAID)
+            confirmed = self.hold(60, day=12, status=BookingStatus.CONFIRMED)
+            cash = self.hold(60, day=13, payment_method=PaymentMethod.CASH)
+
+        # Three batches of: savepoint, select, update, release nights, room
+        # prices, room stats upsert, release savepoint. The hotel stats follow
+        # on commit.
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(3 * 7):
+            self.assertEqual(holds.expire_stale_holds(batch_size=2), 5)
+
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertTrue(all(statuses[booking.pk] == BookingStatus.CANCELLED for booking in stale))
+        for booking in (fresh, paid, cash):
+            self.assertEqual(statuses[booking.pk], BookingStatus.PENDING)
+        self.assertEqual(statuses[confirmed.pk], BookingStatus.CONFIRMED)
+        self.assertEqual(
+            set(RoomNight.objects.values_list('booking_id', flat=True)), {fresh.pk, paid.pk, confirmed.pk, cash.pk}
+        )
+        self.assertTrue(inventory.is_room_available(self.room.pk, date(2030, 1, 1), date(2030, 1, 6)))
+        self.assertEqual(stats.verify(), set())
+        self.assertEqual(holds.expire_stale_holds(), 0)
+
+    def test_command(self):
+        self.hold(60)
+        out = io.StringIO()
+        call_command('expire_holds', '--dry-run', stdout=out)
+        self.assertIn('1 holds are older than 30 minutes', out.getvalue())
+        call_command('expire_holds', stdout=out)
+        self.assertIn('Expired 1 holds', out.getvalue())
+
+    @override_settings(BOOKING_HOLD_TTL_MINUTES=0)
+    def test_zero_ttl_keeps_holds(self):
+        self.hold(60 * 24 * 365)
+        self.assertEqual(holds.expire_stale_holds(), 0)
+        self.assertIsNone(holds.start_sweeper(interval=0))
+        self.assertIsNone(holds.start_sweeper(interval=60))
+
+
+class BookingEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [Room.objects.create(name=f'Room {index}', price='100.00') for index in range(3)]
+        cls.guest = User.objects.create_user('guest@example.com', 'pw')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def create(self, room, day=1):
+        guest = APIClient()
+        guest.force_authenticate(self.guest)
+        payload = {
+            'roomId': room.pk, 'checkIn': f'2030-01-{day:02d}', 'checkOut': f'2030-01-{day + 2:02d}',
+            'guestInfo': {'firstName': 'Ama', 'email': 'guest@example.com'},
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = guest.post('/api/bookings/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def test_every_transition_is_logged_with_its_actor(self):
+        booking_id = self.create(self.rooms[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/admin/bookings/{booking_id}', {'status': 'CONFIRMED', 'amount_paid': '50.00'}, format='json')
+            # Saving without a change records nothing.
+            self.client.patch(f'/api/admin/bookings/{booking_id}', {'amount_paid': '50'}, format='json')
+            APIClient().delete(f'/api/bookings/{booking_id}/cancel')
+
+        logged = list(BookingEvent.objects.filter(booking_id=booking_id).order_by('id'))
+        self.assertEqual([event.source for event in logged], ['create', 'admin_update', 'cancel'])
+        self.assertEqual([event.actor_id for event in logged], [self.guest.pk, self.admin.pk, None])
+        self.assertEqual(logged[1].changes, {'status': ['PENDING', 'CONFIRMED'], 'amount_paid': ['0.00', '50.00']})
+        self.assertEqual((logged[2].status, logged[2].amount_paid), (BookingStatus.CANCELLED, 50))
+
+    def test_history_replays_state_at_any_time(self):
+        booking_id = self.create(self.rooms[0])
+        BookingEvent.objects.filter(booking_id=booking_id).update(occurred_at=datetime(2020, 1, 1, 9, tzinfo=dt_timezone.utc))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/admin/bookings/{booking_id}', {'payment_status': 'PAID'}, format='json')
+
+        url = f'/api/admin/bookings/{booking_id}/history'
+        now = self.client.get(url).json()
+        self.assertEqual(len(now['events']), 2)
+        self.assertEqual((now['state']['status'], now['state']['payment_status']), ('PENDING', 'PAID'))
+
+        then = self.client.get(url, {'at': '2020-01-01T12:00:00Z'}).json()
+        self.assertEqual(len(then['events']), 1)
+        self.assertEqual(then['state']['payment_status'], 'UNPAID')
+        self.assertIsNone(self.client.get(url, {'at': '2019-12-31'}).json()['state'])
+        self.assertEqual(self.client.get(url, {'at': 'later'}).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/admin/bookings/{uuid.uuid4()}/history').status_code, 404)
+
+    def test_events_are_written_once_at_commit(self):
+        stays = [
+            {'roomId': room.pk, 'checkIn': '2030-02-01', 'checkOut': '2030-02-03', 'guestInfo': {'firstName': 'Tour'}}
+            for room in self.rooms
+        ]
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/bookings/group', {'bookings': stays}, format='json').status_code, 201)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "bookings_bookingevent"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(BookingEvent.objects.filter(source='group_create').count(), 3)
+
+    def test_rolled_back_changes_leave_no_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(room=self.rooms[0], check_in=date(2030, 3, 1), check_out=date(2030, 3, 2))
+            try:
+                with transaction.atomic():
+                    booking.status = BookingStatus.CONFIRMED
+                    booking.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            # Rolling back leaves the instance as it was; work on a fresh copy.
+            booking = Booking.objects.get(pk=booking.pk)
+            with transaction.atomic():
+                booking.amount_paid = 10
+                booking.save()
+        self.assertEqual(
+            [sorted(event.changes) for event in BookingEvent.objects.filter(booking=booking).order_by('id')],
+            [sorted(events.EVENT_FIELDS), ['amount_paid']],
+        )
+
+    @override_settings(BOOKING_HOLD_TTL_MINUTES=30)
+    def test_expired_holds_are_logged(self):
+        booking = Booking.objects.create(room=self.rooms[0], check_in=date(2030, 3, 1), check_out=date(2030, 3, 2))
+        Booking.objects.filter(pk=booking.pk).update(created_at=timezone.now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(holds.expire_stale_holds(), 1)
+        event = BookingEvent.objects.filter(booking=booking).latest('id')
+        self.assertEqual((event.source, event.changes), ('hold_expiry', {'status': ['PENDING', 'CANCELLED']}))
+
+    def test_events_are_append_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(room=self.rooms[0], check_in=date(2030, 3, 1), check_out=date(2030, 3, 2))
+        event = BookingEvent.objects.get(booking=booking)
+        with self.assertRaises(ValueError):
+            event.save()
+
+
+class BookingEventTransactionTests(TransactionTestCase):
+    def test_a_rolled_back_transaction_does_not_swallow_the_next_ones_events(self):
+        room = Room.objects.create(name='Room', price='100.00')
+        booking = Booking.objects.create(room=room, check_in=date(2030, 3, 1), check_out=date(2030, 3, 2))
+        pending = events.state(booking)
+        confirmed = (BookingStatus.CONFIRMED, *pending[1:])
+        try:
+            with transaction.atomic():
+                events.record(booking.pk, pending, confirmed)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        # The next transaction buffers at the same depth as the rolled back one.
+        with transaction.atomic():
+            events.record(booking.pk, pending, confirmed, source='retry')
+        self.assertEqual(list(BookingEvent.objects.values_list('source', flat=True).order_by('id')), ['save', 'retry'])
+
+
+@override_settings(REQUEST_PROFILING=True)
+class RequestProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room = Room.objects.create(name='Room', price='100.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        cls.receptionist = User.objects.create_user('desk@example.com', 'pw', role=UserRole.RECEPTIONIST)
+        for month in (1, 2, 3):
+            Booking.objects.create(room=room, check_in=date(2030, month, 1), check_out=date(2030, month, 3))
+
+    def setUp(self):
+        profiling.summary.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_server_timing_header_breaks_the_request_down(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/admin/bookings')
+        self.assertEqual(response.status_code, 200)
+        timings = dict(part.strip().split(';', 1) for part in response['Server-Timing'].split(','))
+        self.assertEqual(set(timings), {'db', 'serialize', 'render', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', timings['db'])
+
+    def test_summary_is_kept_per_endpoint(self):
+        for _ in range(3):
+            self.client.get('/api/admin/bookings')
+        self.client.get('/api/admin/bookings', {'status': 'PENDING'})
+
+        response = self.client.get('/api/admin/profiling')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['endpoint']: row for row in response.json()['endpoints']}
+        listing = rows['GET /api/admin/bookings']
+        self.assertEqual(listing['requests'], 4)
+        self.assertEqual(set(listing['totalMs']), {'p50', 'p95', 'p99'})
+        self.assertGreater(listing['queriesPerRequest'], 0)
+
+        self.assertEqual(self.client.delete('/api/admin/profiling').status_code, 204)
+        self.assertNotIn('GET /api/admin/bookings', {row['endpoint'] for row in self.client.get('/api/admin/profiling').json()['endpoints']})
+
+    def test_summary_is_admin_only(self):
+        desk = APIClient()
+        desk.force_authenticate(self.receptionist)
+        self.assertEqual(desk.get('/api/admin/profiling').status_code, 403)
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_disabled_adds_no_header(self):
+        self.assertNotIn('Server-Timing', APIClient().get('/api/rooms').headers)
+
+
+def _count_in_child(directory):
+    with override_settings(METRICS_DIR=directory):
+        for _ in range(5):
+            metrics.REQUESTS.inc('rooms-catalog', 'GET', '200')
+
+
+class FastJSONTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Suite \u2028 Nord', price='149.90', amenities=['Wi-Fi', 'Vue \u2029 mer'])
+        cls.booking = Booking.objects.create(
+            room=cls.room,
+            check_in=date(2030, 5, 1),
+            check_out=date(2030, 5, 3),
+            amount_paid=Decimal('75.50'),
+            guest_first_name='Zoë',
+            special_requests='Late arrival\u2028after 23:00',
+        )
+
+    def test_renderer_matches_drf(self):
+        payloads = [
+            BookingSerializer(Booking.objects.select_related('room', 'created_by').get(pk=self.booking.pk)).data,
+            RoomSerializer(self.room).data,
+            {
+                'id': uuid.uuid4(),
+                'day': date(2030, 5, 1),
+                'at': datetime(2030, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+                'naive': datetime(2030, 5, 1, 12, 30, 15, 123456),
+                'amount': Decimal('12.50'),
+                'label': gettext_lazy('Room'),
+                'text': 'a\u2028b\u2029c',
+                'nested': [{'count': 3, 'ratio': 0.25, 'none': None}],
+            },
+        ]
+        for payload in payloads:
+            with self.subTest(payload=type(payload).__name__):
+                self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_renderer_float_differences(self):
+        self.assertEqual(FastJSONRenderer().render({'x': 1e16}), b'{"x":1e16}')
+        self.assertEqual(JSONRenderer().render({'x': 1e16}), b'{"x":1e+16}')
+        self.assertEqual(FastJSONRenderer().render({'x': float('nan')}), b'{"x":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'x': float('nan')})
+
+    def test_parser_reads_other_charsets(self):
+        body = '{"firstName": "Zoë"}'.encode('latin-1')
+        parsed = FastJSONParser().parse(io.BytesIO(body), 'application/json; charset=latin-1')
+        self.assertEqual(parsed, {'firstName': 'Zoë'})
+        parsed = FastJSONParser().parse(io.BytesIO('{"firstName": "Zoë"}'.encode()), 'application/json')
+        self.assertEqual(parsed, {'firstName': 'Zoë'})
+
+    def test_parser_rejects_malformed_input(self):
+        for media_type in ('application/json', 'application/json; charset=latin-1'):
+            for body in (b'{"roomId": ', b'[1, 2,]', b'{"amount": NaN}'):
+                with self.subTest(media_type=media_type, body=body), self.assertRaises(ParseError):
+                    FastJSONParser().parse(io.BytesIO(body), media_type)
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.addClassCleanup(metrics.reset, directory.name)
+        cls.directory = directory.name
+        # Outlives the test database teardown, whose queries are measured too.
+        cls.enterClassContext(override_settings(METRICS_ENABLED=True, METRICS_DIR=directory.name))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [Room.objects.create(name=f'Room {index}', price='100.00') for index in range(12)]
+
+    def setUp(self):
+        metrics.reset()
+
+    def scrape(self, client=None, **headers):
+        response = (client or APIClient()).get('/metrics', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return {
+            key: float(value)
+            for key, _sep, value in (line.rpartition(' ') for line in response.content.decode().splitlines())
+            if not key.startswith('#')
+        }
+
+    def test_requests_are_counted_per_view_and_status(self):
+        client = APIClient()
+        client.get('/api/rooms')
+        client.get('/api/rooms')
+        client.get(f'/api/rooms/{self.rooms[0].pk}')
+        client.get('/api/rooms/0')
+
+        samples = self.scrape(client)
+        self.assertEqual(samples['http_requests_total{view="rooms-catalog",method="GET",status="200"}'], 2)
+        self.assertEqual(samples['http_requests_total{view="rooms-detail",method="GET",status="200"}'], 1)
+        self.assertEqual(samples['http_requests_total{view="rooms-detail",method="GET",status="404"}'], 1)
+        self.assertEqual(samples['http_request_duration_seconds_count{view="rooms-catalog",method="GET"}'], 2)
+        self.assertEqual(samples['http_request_duration_seconds_bucket{view="rooms-catalog",method="GET",le="+Inf"}'], 2)
+        self.assertGreater(samples['db_query_duration_seconds_count'], 0)
+
+    def test_repeated_and_slow_queries_are_fingerprinted(self):
+        def n_plus_one(request):
+            for room in self.rooms:
+                Room.objects.filter(pk=room.pk).exists()
+            return HttpResponse()
+
+        with override_settings(METRICS_SLOW_QUERY_MS=0):
+            metrics.MetricsMiddleware(n_plus_one)(RequestFactory().get('/anything'))
+
+        samples = metrics.collect(self.directory)
+        repeated = {key: value for key, value in samples.items() if key.startswith('db_repeated_queries_total')}
+        self.assertEqual(list(repeated.values()), [len(self.rooms)])
+        labels = next(iter(repeated)).split('{', 1)[1].removeprefix('view="<unmatched>",')
+        self.assertIn(r'FROM \"rooms_room\"', labels)
+        self.assertEqual(samples['db_slow_queries_total{' + labels], len(self.rooms))
+        self.assertGreater(samples['db_slow_query_seconds_total{' + labels], 0)
+
+    def test_fingerprints_ignore_arguments(self):
+        one = metrics.fingerprint('SELECT * FROM "rooms_room" WHERE "id" IN (%s, %s) LIMIT 21')
+        three = metrics.fingerprint("SELECT *  FROM \"rooms_room\" WHERE \"id\" IN (%s, %s, %s) LIMIT 5")
+        self.assertEqual(one, three)
+        self.assertNotEqual(one, metrics.fingerprint('SELECT * FROM "rooms_room" WHERE "name" IN (%s)'))
+
+    def test_worker_processes_are_summed(self):
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_count_in_child, args=(self.directory,)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        metrics.REQUESTS.inc('rooms-catalog', 'GET', '200')
+        self.assertEqual(metrics.collect(self.directory)['http_requests_total{view="rooms-catalog",method="GET",status="200"}'], 16)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_scrapes_need_the_token_when_set(self):
+        self.assertEqual(APIClient().get('/metrics').status_code, 401)
+        self.assertIn('http_requests_total', ''.join(self.scrape(Authorization='Bearer secret')))
+
+
+class BenchApiTests(TestCase):
+    def test_writes_comparable_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = f'{directory}/first.json', f'{directory}/second.json'
+            options = {'rooms': 4, 'users': 5, 'bookings': 40, 'requests': 3, 'warmup': 1, 'stdout': io.StringIO()}
+            call_command('bench_api', output=first, **options)
+            call_command('bench_api', output=second, compare=first, **options)
+            with open(second) as handle:
+                results = json.load(handle)
+
+        self.assertEqual(results['meta']['bookings'], 40)
+        self.assertEqual(set(results['scenarios']), {'availability', 'rooms', 'create', 'admin_list', 'login'})
+        for name, result in results['scenarios'].items():
+            with self.subTest(scenario=name):
+                self.assertEqual((result['requests'], result['errors']), (3, 0))
+                self.assertIsNotNone(result['p99Ms'])
+                self.assertIsNotNone(result['queriesPerRequest'])
+        # Everything the run created is gone again.
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    def test_seeded_rooms_are_reproducible(self):
+        fields = ('name', 'price', 'size', 'max_occupancy', 'amenities')
+        seeded = []
+        for _run in range(2):
+            room_ids = synthetic.seed_rooms(5, seed=7)
+            seeded.append(list(Room.objects.filter(pk__in=room_ids).order_by('pk').values_list(*fields)))
+            synthetic.clear()
+        self.assertEqual(seeded[0], seeded[1])
+
+
+class WarmupTests(TestCase):
+    def test_warm_up_runs_every_step(self):
+        self.assertEqual(list(warmup.warm_up()), ['imports', 'urls', 'database', 'rates'])
+        # The master process never connects.
+        with self.assertNumQueries(0):
+            self.assertEqual(list(warmup.warm_up(database=False)), ['imports', 'urls'])
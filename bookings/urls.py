@@ -1,7 +1,14 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import BookingViewSet, BookingMeView, BookingCancelView, BookingAvailabilityView
+from .views import (
+    BookingAvailabilityView,
+    BookingCancelView,
+    BookingGroupView,
+    BookingLookupView,
+    BookingMeView,
+    BookingViewSet,
+)
 
 
 router = DefaultRouter(trailing_slash=False)
@@ -9,6 +16,8 @@ router.register(r'', BookingViewSet, basename='bookings')
 
 urlpatterns = [
     path('me', BookingMeView.as_view(), name='bookings-me'),
+    path('group', BookingGroupView.as_view(), name='bookings-group'),
+    path('lookup', BookingLookupView.as_view(), name='bookings-lookup'),
     path('check-availability', BookingAvailabilityView.as_view(), name='bookings-check-availability'),
     path('<uuid:pk>/cancel', BookingCancelView.as_view(), name='bookings-cancel'),
     path('', include(router.urls)),
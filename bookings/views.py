@@ -1,17 +1,64 @@
-from datetime import date
+import uuid
+from datetime import date, datetime, timedelta
 
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics, permissions, status, viewsets
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
 
-from accounts.permissions import IsReceptionistOrAdmin
+from accounts.permissions import IsAdmin, IsReceptionistOrAdmin
+from backend.conditional import ConditionalGetMixin
 
-from .models import Booking, BookingStatus
-from .serializers import AdminBookingUpdateSerializer, BookingCreateSerializer, BookingSerializer
+from rooms.models import Room
+from rooms.views import RoomAvailabilityView
 
+from . import calendar, events, export, inventory, search, stats
+from .locking import locked_rooms
+from .models import ACTIVE_STATUSES, Booking, BookingEvent, BookingStatus
+from .pagination import BookingCursorPagination
+from .serializers import (
+    AdminBookingUpdateSerializer,
+    BookingCreateSerializer,
+    BookingGroupCreateSerializer,
+    BookingSerializer,
+    RoomUnavailable,
+)
 
-class BookingViewSet(viewsets.ModelViewSet):
-    queryset = Booking.objects.select_related('room', 'created_by').all().order_by('-created_at')
+
+def _booking_validators(queryset):
+    """Validators for the bookings in ``queryset``, including their nested room and guest."""
+    stats = queryset.order_by().aggregate(
+        count=Count('pk'),
+        updated=Max('updated_at'),
+        room_updated=Max('room__updated_at'),
+        user_updated=Max('created_by__updated_at'),
+    )
+    last_modified = max(
+        (stats[key] for key in ('updated', 'room_updated', 'user_updated') if stats[key] is not None),
+        default=None,
+    )
+    return tuple(stats.values()), last_modified
+
+
+class BookingListValidatorsMixin(ConditionalGetMixin):
+    def get_validators(self):
+        queryset = self.get_queryset()
+        window = self.paginator.page_window(queryset, self.request) if self.paginator else None
+        if window is not None:
+            queryset = Booking.objects.filter(pk__in=window.values('pk'))
+        return _booking_validators(queryset)
+
+
+class BookingViewSet(BookingListValidatorsMixin, viewsets.ModelViewSet):
+    queryset = Booking.objects.select_related('room', 'created_by').all().order_by('-created_at', '-id')
+    pagination_class = BookingCursorPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -19,26 +66,106 @@ class BookingViewSet(viewsets.ModelViewSet):
         return BookingSerializer
 
     def get_permissions(self):
-        if self.action in ('retrieve', 'list'):
-            return [permissions.AllowAny()]
-        if self.action == 'create':
+        # Guests find their own booking through BookingLookupView; listing is for staff.
+        if self.action in ('retrieve', 'create'):
             return [permissions.AllowAny()]
         return [IsReceptionistOrAdmin()]
 
+    def get_validators(self):
+        if self.action == 'list':
+            return super().get_validators()
+        if self.action == 'retrieve':
+            try:
+                pk = uuid.UUID(self.kwargs['pk'])
+            except ValueError:
+                return None
+            validators = _booking_validators(Booking.objects.filter(pk=pk))
+            return validators if validators[0][0] else None
+        return None
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
-        booking = serializer.save()
+        try:
+            with events.acting(request.user, 'create'):
+                booking = serializer.save()
+        except (RoomUnavailable, IntegrityError):
+            return Response(
+                {'message': 'Room is not available for the selected dates'},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
 
 
-class BookingMeView(generics.ListAPIView):
+class BookingGroupView(APIView):
+    """Create every booking of a tour group or event in one transaction, or none of them."""
+
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = BookingGroupCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        try:
+            with events.acting(request.user, 'group_create'):
+                bookings = serializer.save()
+        except RoomUnavailable as exc:
+            return Response(
+                {'message': 'Some rooms are not available for the selected dates', 'conflicts': exc.conflicts},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except IntegrityError:
+            return Response(
+                {'message': 'Some rooms are not available for the selected dates', 'conflicts': []},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        created = Booking.objects.select_related('room', 'created_by').in_bulk([booking.pk for booking in bookings])
+        return Response(
+            {'bookings': BookingSerializer([created[booking.pk] for booking in bookings], many=True).data},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class BookingLookupView(APIView):
+    """Find a booking by its reference and the guest email it was made with.
+
+    One probe of the unique ``reference`` index. A wrong email answers the same
+    404 as an unknown reference, so the endpoint does not confirm that a
+    reference exists. POST keeps the email out of URLs and access logs, and
+    the ``booking-lookup`` throttle keeps references from being enumerated.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'booking-lookup'
+
+    def post(self, request):
+        reference = str(request.data.get('reference') or '').strip().upper()
+        email = str(request.data.get('email') or '').strip()
+        if not reference or not email:
+            return Response({'message': 'reference and email are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        booking = Booking.objects.select_related('room', 'created_by').filter(reference=reference).first()
+        if booking is None or booking.guest_email.casefold() != email.casefold():
+            return Response({'message': 'No booking matches that reference and email'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(BookingSerializer(booking).data)
+
+
+class BookingAvailabilityView(RoomAvailabilityView):
+    """The rooms availability check, but an empty or reversed stay is a 400 here."""
+
+    def invalid_range(self):
+        return self.respond({'message': 'Check-out must be after check-in'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BookingMeView(BookingListValidatorsMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = BookingSerializer
+    pagination_class = BookingCursorPagination
 
     def get_queryset(self):
         # For customers: their own created bookings
-        return Booking.objects.select_related('room', 'created_by').filter(created_by=self.request.user).order_by('-created_at')
+        return Booking.objects.select_related('room', 'created_by').filter(created_by_id=self.request.user.pk).order_by('-created_at', '-id')
 
 
 class BookingCancelView(APIView):
@@ -54,47 +181,159 @@ class BookingCancelView(APIView):
             return Response({'message': 'Booking cannot be cancelled'}, status=status.HTTP_400_BAD_REQUEST)
 
         booking.status = BookingStatus.CANCELLED
-        booking.save(update_fields=['status', 'updated_at'])
+        with events.acting(request.user, 'cancel'), locked_rooms([booking.room_id]):
+            booking.save(update_fields=['status', 'updated_at'])
         return Response(BookingSerializer(booking).data)
 
 
-class BookingAvailabilityView(APIView):
-    permission_classes = [permissions.AllowAny]
+class AdminBookingsView(BookingListValidatorsMixin, generics.ListAPIView):
+    """All bookings, newest first, narrowed by the filters in ``bookings.search.parse_filters``."""
 
-    def post(self, request):
-        room_id = request.data.get('roomId')
-        check_in = request.data.get('checkIn')
-        check_out = request.data.get('checkOut')
-        if not room_id or not check_in or not check_out:
-            return Response({'message': 'roomId, checkIn, checkOut are required'}, status=status.HTTP_400_BAD_REQUEST)
+    permission_classes = [IsReceptionistOrAdmin]
+    serializer_class = BookingSerializer
+    pagination_class = BookingCursorPagination
 
+    def initial(self, request, *args, **kwargs):
+        # Before the conditional GET check, which already reads the queryset.
         try:
-            room_id = int(room_id)
-        except (TypeError, ValueError):
-            return Response({'message': 'roomId must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            self.filters = search.parse_filters(request.query_params)
+        except ValueError as exc:
+            raise ParseError({'message': str(exc)})
+        super().initial(request, *args, **kwargs)
 
+    def get_queryset(self):
+        queryset = Booking.objects.select_related('room', 'created_by').all().order_by('-created_at', '-id')
+        return search.apply(queryset, self.filters)
+
+
+class AdminBookingHistoryView(APIView):
+    """The event log of one booking, oldest first, and its state replayed from it.
+
+    ``at`` (an ISO datetime) replays up to that moment and leaves out later events.
+    """
+
+    permission_classes = [IsReceptionistOrAdmin]
+
+    def get(self, request, pk):
+        at = None
+        if request.query_params.get('at'):
+            at = _parse_moment(request.query_params['at'])
+            if at is None:
+                return Response({'message': 'at must be an ISO datetime'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+
+        history = list(BookingEvent.objects.filter(booking_id=pk).order_by('occurred_at', 'id'))
+        if not history and not Booking.objects.filter(pk=pk).exists():
+            return Response({'message': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        if at is not None:
+            history = [event for event in history if event.occurred_at <= at]
+        return Response({
+            'bookingId': pk,
+            'at': at,
+            'state': events.replay(history),
+            'events': [
+                {
+                    'id': event.pk,
+                    'occurredAt': event.occurred_at,
+                    'source': event.source,
+                    'actorId': event.actor_id,
+                    'changes': event.changes,
+                }
+                for event in history
+            ],
+        })
+
+
+def _parse_moment(value):
+    """An ISO datetime, or the start of an ISO date; ``None`` if ``value`` is neither."""
+    try:
+        return parse_datetime(value) or datetime.combine(date.fromisoformat(value[:10]), datetime.min.time())
+    except ValueError:
+        return None
+
+
+class AdminCalendarView(APIView):
+    permission_classes = [IsReceptionistOrAdmin]
+
+    max_nights = 366
+
+    def get(self, request):
         try:
-            check_in_date = date.fromisoformat(str(check_in)[:10])
-            check_out_date = date.fromisoformat(str(check_out)[:10])
+            start = date.fromisoformat(request.query_params['start'][:10]) if request.query_params.get('start') else date.today()
+            if request.query_params.get('end'):
+                nights = (date.fromisoformat(request.query_params['end'][:10]) - start).days
+            else:
+                nights = int(request.query_params.get('nights', 30))
         except ValueError:
-            return Response({'message': 'Dates must be ISO format'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'message': 'start/end must be ISO dates and nights an integer'}, status=status.HTTP_400_BAD_REQUEST)
 
-        overlapping = Booking.objects.filter(
-            room_id=room_id,
-            status__in=(BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN),
-            check_in__lt=check_out_date,
-            check_out__gt=check_in_date,
-        ).exists()
+        if not 0 < nights <= self.max_nights:
+            return Response({'message': f'The window must cover 1 to {self.max_nights} nights'}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({'available': not overlapping})
+        end = start + timedelta(days=nights)
+        rooms = list(Room.objects.filter(is_active=True).order_by('id').values_list('id', 'name'))
+        bookings = (
+            Booking.objects.filter(status__in=calendar.GRID_STATUSES, check_in__lt=end, check_out__gt=start)
+            .values_list('room_id', 'check_in', 'check_out', 'status')
+            .order_by()
+        )
+        return Response(calendar.build_grid(rooms, bookings, start, nights))
 
 
-class AdminBookingsView(generics.ListAPIView):
-    permission_classes = [IsReceptionistOrAdmin]
-    serializer_class = BookingSerializer
+class AdminOccupancyReportView(APIView):
+    """Occupancy %, ADR and RevPAR for a date range, read from the daily aggregates.
 
-    def get_queryset(self):
-        return Booking.objects.select_related('room', 'created_by').all().order_by('-created_at')
+    Takes ``start`` (default: first of this month) and either ``end``
+    (exclusive) or ``nights`` (default 30), like the admin calendar, and an
+    optional ``room`` to report on a single room.
+    """
+
+    permission_classes = [IsAdmin]
+
+    max_nights = 3660
+
+    def get(self, request):
+        try:
+            start = date.fromisoformat(request.query_params['start'][:10]) if request.query_params.get('start') else date.today().replace(day=1)
+            if request.query_params.get('end'):
+                nights = (date.fromisoformat(request.query_params['end'][:10]) - start).days
+            else:
+                nights = int(request.query_params.get('nights', 30))
+            room_id = int(request.query_params['room']) if request.query_params.get('room') else None
+        except ValueError:
+            return Response(
+                {'message': 'start/end must be ISO dates, nights and room integers'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 < nights <= self.max_nights:
+            return Response({'message': f'The range must cover 1 to {self.max_nights} nights'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(stats.report(start, start + timedelta(days=nights), room_id=room_id))
+
+
+class AdminBookingExportView(APIView):
+    """Stream every matching booking as CSV or JSON Lines without building the list in memory."""
+
+    permission_classes = [IsAdmin]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is CSV/JSONL whatever the Accept header says; errors still render as JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, export_format):
+        try:
+            filters = export.parse_filters(request.query_params)
+        except ValueError as exc:
+            return Response({'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        chunks = export.astream if isinstance(request._request, ASGIRequest) else export.stream
+        response = StreamingHttpResponse(
+            chunks(export.bookings(filters), export_format),
+            content_type=export.CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export.filename(export_format)}"'
+        return response
 
 
 class AdminBookingDetailView(generics.RetrieveUpdateAPIView):
@@ -113,5 +352,17 @@ class AdminBookingDetailView(generics.RetrieveUpdateAPIView):
 
         # Receptionists can update most booking fields we expose here.
         # You can tighten this later if needed.
-        self.perform_update(serializer)
+        try:
+            with events.acting(request.user, 'admin_update'), locked_rooms([instance.room_id]):
+                # Reactivating a booking takes its nights back; the room lock
+                # keeps a create from taking them between check and save.
+                reactivated = instance.status not in ACTIVE_STATUSES and serializer.validated_data.get('status') in ACTIVE_STATUSES
+                if reactivated and not inventory.is_room_available(instance.room_id, instance.check_in, instance.check_out):
+                    raise RoomUnavailable()
+                self.perform_update(serializer)
+        except (RoomUnavailable, IntegrityError):
+            return Response(
+                {'message': 'Room is not available for the selected dates'},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response(BookingSerializer(instance).data)
@@ -58,8 +58,9 @@ export const bookingsAPI = {
   createBooking: (bookingData) => api.post('/bookings', bookingData),
   getMyBookings: () => api.get('/bookings/me'),
   getBookingById: (id) => api.get(`/bookings/${id}`),
+  lookupBooking: (reference, email) => api.post('/bookings/lookup', { reference, email }),
   cancelBooking: (id) => api.delete(`/bookings/${id}/cancel`),
-  getAdminBookings: () => api.get('/admin/bookings'),
+  getAdminBookings: (params = {}) => api.get('/admin/bookings', { params }),
   updateAdminBooking: (id, patch) => api.patch(`/admin/bookings/${id}`, patch),
   updateBookingStatus: (id, status) => api.patch(`/admin/bookings/${id}`, { status }),
 };
@@ -10,6 +10,26 @@ export const createBooking = async (bookingData) => {
   }
 };
 
+// Create several bookings (tour group or event) at once; all succeed or none do
+export const createGroupBooking = async (bookings) => {
+  try {
+    const response = await apiClient.post('/bookings/group', { bookings });
+    return response.data;
+  } catch (error) {
+    throw error;
+  }
+};
+
+// Find a booking by its reference and the guest's email
+export const lookupBooking = async (reference, email) => {
+  try {
+    const response = await apiClient.post('/bookings/lookup', { reference, email });
+    return response.data;
+  } catch (error) {
+    throw error;
+  }
+};
+
 // Get booking by ID
 export const getBookingById = async (bookingId) => {
   try {
@@ -34,6 +34,24 @@ export const checkRoomAvailability = async (roomId, checkIn, checkOut) => {
   }
 };
 
+// Find every room that is free for a stay and fits the party
+export const searchAvailableRooms = async ({ checkIn, checkOut, adults, children, minPrice, maxPrice, amenities } = {}) => {
+  try {
+    const response = await apiClient.post('/rooms/search', {
+      checkIn,
+      checkOut,
+      adults,
+      children,
+      minPrice,
+      maxPrice,
+      amenities,
+    });
+    return response.data;
+  } catch (error) {
+    throw error;
+  }
+};
+
 // Get room amenities
 export const getRoomAmenities = async () => {
   try {
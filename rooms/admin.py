@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Room
+from .models import RatePlan, Room
 
 
 @admin.register(Room)
@@ -8,3 +8,10 @@ class RoomAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'price', 'max_occupancy', 'is_active')
     list_filter = ('is_active',)
     search_fields = ('name',)
+
+
+@admin.register(RatePlan)
+class RatePlanAdmin(admin.ModelAdmin):
+    list_display = ('name', 'room', 'start_date', 'end_date', 'weekdays', 'nightly_price', 'adjustment_percent', 'priority', 'is_active')
+    list_filter = ('is_active', 'room')
+    list_select_related = ('room',)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RoomsConfig(AppConfig):
     name = 'rooms'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,65 @@
+"""Versioned cache for the public room catalog.
+
+Serialized catalog responses are stored under the current catalog version.
+Saving or deleting a ``Room`` bumps the version once the transaction commits,
+which orphans every cached entry at once; nothing has to be deleted key by
+key. Works with any Django cache backend, including local-memory and file.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'rooms:catalog:version'
+
+
+def _new_version():
+    # Time based, so a version key lost to eviction never restarts at a
+    # number whose entries may still be cached.
+    return time.time_ns()
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acurrent_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _new_version(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        version = _new_version()
+        cache.set(VERSION_KEY, version, timeout=None)
+        return version
+
+
+def get_or_build(name, build):
+    """Return the cached entry ``name`` for the current version, building it on a miss."""
+    key = f'rooms:catalog:{current_version()}:{name}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout=getattr(settings, 'ROOM_CATALOG_CACHE_TIMEOUT', 300))
+    return data
+
+
+async def aget_or_build(name, build):
+    """Async ``get_or_build``; ``build`` is a coroutine function."""
+    key = f'rooms:catalog:{await acurrent_version()}:{name}'
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data, timeout=getattr(settings, 'ROOM_CATALOG_CACHE_TIMEOUT', 300))
+    return data
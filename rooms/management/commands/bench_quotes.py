@@ -0,0 +1,75 @@
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from bookings import synthetic
+from rooms import cache as catalog_cache
+from rooms import rates
+from rooms.models import RatePlan, Room
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic rooms with rate plans and time batch stay quotes against a per-room ORM loop.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=500)
+        parser.add_argument('--nights', type=int, default=30)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per variant.')
+
+    def handle(self, *args, **options):
+        synthetic.clear()
+        room_ids = synthetic.seed_rooms(options['rooms'], seed=9)
+        start = date.today() + timedelta(days=30)
+        synthetic.seed_rate_plans(room_ids, start=start, seed=9)
+        check_in, check_out = start + timedelta(days=60), start + timedelta(days=60 + options['nights'])
+        self.stdout.write(f"{len(room_ids)} rooms, {options['nights']} nights")
+
+        try:
+            catalog_cache.bump_version()
+            started = time.perf_counter()
+            rates.quote_all(check_in, check_out, room_ids)
+            self.stdout.write(f'cold batch (builds the year arrays): {(time.perf_counter() - started) * 1000:.1f} ms')
+
+            self.report('warm batch', options['repeat'], lambda: rates.quote_all(check_in, check_out, room_ids))
+            self.report('per-room ORM loop', max(1, options['repeat'] // 10), lambda: naive_quotes(room_ids, check_in, check_out))
+
+            batch = {quote['roomId']: quote['total'] for quote in rates.quote_all(check_in, check_out, room_ids)}
+            naive = naive_quotes(room_ids, check_in, check_out)
+            mismatched = [room_id for room_id in room_ids if batch.get(room_id) != naive.get(room_id)]
+            self.stdout.write(f'totals agree: {not mismatched}')
+        finally:
+            synthetic.clear()
+
+    def report(self, label, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(f'{label}: median {statistics.median(timings):.1f} ms, max {max(timings):.1f} ms')
+
+
+def naive_quotes(room_ids, check_in, check_out):
+    """What pricing looks like without the arrays: load each room's plans and walk the nights."""
+    totals = {}
+    for room in Room.objects.filter(pk__in=room_ids):
+        plans = sorted(
+            RatePlan.objects.filter(Q(room=room) | Q(room__isnull=True), is_active=True),
+            key=lambda plan: (plan.priority, plan.room_id is not None, plan.created_at, plan.pk),
+        )
+        total = 0
+        night = check_in
+        while night < check_out:
+            cents = rates._cents(room.price)
+            for plan in plans:
+                covered = (plan.start_date is None or plan.start_date <= night) and (plan.end_date is None or night <= plan.end_date)
+                if covered and plan.weekdays & (1 << night.weekday()):
+                    cents = rates._plan_cents(plan, rates._cents(room.price))
+            total += cents
+            night += timedelta(days=1)
+        totals[room.pk] = str((Decimal(total) / 100).quantize(Decimal('0.01')))
+    return totals
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings import synthetic
+from rooms.models import Room
+
+SERVERS = {
+    'wsgi': ['backend.wsgi:application', '--worker-class', 'sync'],
+    'asgi': ['backend.asgi:application', '--worker-class', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Start the app under gunicorn as WSGI and as ASGI and compare how the public room and '
+        'availability endpoints hold up while slow clients keep connections open. Under ASGI a '
+        'slow upload is read on the event loop before Django dispatches it, so most of the gap '
+        'comes from not tying a worker to each slow client, not from the views being async.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--requests', type=int, default=400, help='Fast requests per server.')
+        parser.add_argument('--concurrency', type=int, default=20, help='Fast requests in flight at once.')
+        parser.add_argument('--slow-clients', type=int, default=20, help='Clients trickling their request body.')
+        parser.add_argument('--slow-seconds', type=float, default=5.0, help='How long each slow upload takes.')
+        parser.add_argument('--timeout', type=float, default=15.0, help='Per-request timeout in seconds.')
+
+    def handle(self, *args, **options):
+        room = Room.objects.filter(is_active=True).order_by('id').first()
+        seeded = room is None
+        if seeded:
+            synthetic.seed_rooms(10, seed=1)
+            room = Room.objects.filter(is_active=True).order_by('id').first()
+
+        try:
+            for name in options['servers']:
+                with Server(name, options['workers'], options['port']) as server:
+                    result = asyncio.run(load(server.address, room.pk, options))
+                self.report(name, options, result)
+        finally:
+            if seeded:
+                synthetic.clear()
+
+    def report(self, name, options, result):
+        timings = sorted(result['timings']) or [0.0]
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name} ({options["workers"]} workers)'))
+        self.stdout.write(
+            f'{len(result["timings"])}/{options["requests"]} fast requests x{options["concurrency"]} '
+            f'with {options["slow_clients"]} slow clients: {result["throughput"]:.1f} req/s, '
+            f'p50 {statistics.median(timings):.1f} ms, p99 {timings[int(len(timings) * 0.99) - 1]:.1f} ms, '
+            f'{result["failed"]} failed or timed out, {result["slow_ok"]}/{options["slow_clients"]} slow uploads served'
+        )
+
+
+class Server:
+    """A gunicorn process serving the project on localhost for the duration of a ``with`` block."""
+
+    def __init__(self, name, workers, port):
+        self.name = name
+        self.address = ('127.0.0.1', port)
+        self.command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[name],
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+        ]
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),
+            # gunicorn.conf.py applies; keep its access log out of the report.
+            'GUNICORN_ACCESS_LOG': '',
+        }
+        self.process = subprocess.Popen(self.command, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f'{self.name} server exited with code {self.process.returncode}')
+            try:
+                status, _ = asyncio.run(request(self.address, 'GET', '/api/rooms', timeout=2))
+                if status == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.__exit__()
+        raise CommandError(f'{self.name} server did not start')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+async def request(address, method, path, body=None, timeout=15.0, trickle=0.0):
+    """Send one HTTP/1.1 request; with ``trickle`` the body is uploaded a byte at a time over that many seconds."""
+    payload = json.dumps(body).encode() if body is not None else b''
+    head = (
+        f'{method} {path} HTTP/1.1\r\nHost: {address[0]}\r\nConnection: close\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n'
+    ).encode()
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(*address)
+        try:
+            writer.write(head)
+            if trickle and payload:
+                for index in range(len(payload)):
+                    writer.write(payload[index:index + 1])
+                    await writer.drain()
+                    await asyncio.sleep(trickle / len(payload))
+            else:
+                writer.write(payload)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        status_line, _, rest = response.partition(b'\r\n')
+        return int(status_line.split()[1]), rest.partition(b'\r\n\r\n')[2]
+
+    return await asyncio.wait_for(exchange(), timeout + trickle)
+
+
+async def load(address, room_id, options):
+    check_in = date.today() + timedelta(days=30)
+    availability = {'roomId': room_id, 'checkIn': check_in.isoformat(), 'checkOut': (check_in + timedelta(days=2)).isoformat()}
+    calls = [('GET', '/api/rooms', None), ('POST', '/api/rooms/check-availability', availability)]
+
+    async def slow_client():
+        try:
+            status, _ = await request(
+                address, 'POST', '/api/rooms/check-availability', availability,
+                timeout=options['timeout'], trickle=options['slow_seconds'],
+            )
+            return status == 200
+        except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+            return False
+
+    timings, failures = [], 0
+    semaphore = asyncio.Semaphore(options['concurrency'])
+
+    async def fast_client(index):
+        nonlocal failures
+        method, path, body = calls[index % len(calls)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status, _ = await request(address, method, path, body, timeout=options['timeout'])
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+                status = None
+            if status == 200:
+                timings.append((time.perf_counter() - started) * 1000)
+            else:
+                failures += 1
+
+    slow = [asyncio.create_task(slow_client()) for _ in range(options['slow_clients'])]
+    # Let the slow uploads grab their connections first, as they would in production.
+    await asyncio.sleep(0.5)
+    started = time.perf_counter()
+    await asyncio.gather(*(fast_client(index) for index in range(options['requests'])))
+    elapsed = time.perf_counter() - started
+    slow_ok = sum(await asyncio.gather(*slow))
+    return {'timings': timings, 'failed': failures, 'throughput': len(timings) / elapsed, 'slow_ok': slow_ok}
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-17 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatePlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('weekdays', models.PositiveSmallIntegerField(default=127)),
+                ('nightly_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('adjustment_percent', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('priority', models.IntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rate_plans', to='rooms.room')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('adjustment_percent__isnull', True), ('nightly_price__isnull', False)), models.Q(('adjustment_percent__isnull', False), ('nightly_price__isnull', True)), _connector='OR'), name='rateplan_price_or_adjustment'), models.CheckConstraint(condition=models.Q(('start_date__isnull', True), ('end_date__isnull', True), ('end_date__gte', models.F('start_date')), _connector='OR'), name='rateplan_dates_ordered'), models.CheckConstraint(condition=models.Q(('weekdays__gt', 0), ('weekdays__lte', 127)), name='rateplan_weekdays_valid')],
+            },
+        ),
+    ]
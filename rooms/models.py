@@ -15,3 +15,53 @@ class Room(models.Model):
 
     def __str__(self):
         return self.name
+
+
+# Bit ``1 << date.weekday()`` for each day a rate plan applies to (Monday is bit 0).
+ALL_WEEKDAYS = 0b1111111
+
+
+class RatePlan(models.Model):
+    """A nightly price rule: a season, a weekday rule or both.
+
+    A plan covers the nights from ``start_date`` to ``end_date`` (inclusive;
+    either may be open) that fall on one of its ``weekdays``. It either sets
+    ``nightly_price`` or adjusts the room's base ``price`` by
+    ``adjustment_percent``. Where plans overlap, the highest ``priority``
+    wins, then a room's own plan over a hotel-wide one (``room`` unset), then
+    the newest. Nights no plan covers cost the base price.
+    """
+
+    name = models.CharField(max_length=100)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, null=True, blank=True, related_name='rate_plans')
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    weekdays = models.PositiveSmallIntegerField(default=ALL_WEEKDAYS)
+    nightly_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    adjustment_percent = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    priority = models.IntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(nightly_price__isnull=False, adjustment_percent__isnull=True)
+                | models.Q(nightly_price__isnull=True, adjustment_percent__isnull=False),
+                name='rateplan_price_or_adjustment',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(start_date__isnull=True)
+                | models.Q(end_date__isnull=True)
+                | models.Q(end_date__gte=models.F('start_date')),
+                name='rateplan_dates_ordered',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(weekdays__gt=0, weekdays__lte=ALL_WEEKDAYS), name='rateplan_weekdays_valid'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,143 @@
+"""Nightly rates and stay quotes.
+
+Rates are resolved a calendar year at a time into one array per room of
+nightly prices in cents, applying the room's base price and then every
+``RatePlan`` in precedence order. The arrays are cached under the room
+catalog version, which saving a room or a rate plan bumps, and the latest
+year is also kept in process, so a warm quote costs one cache read for the
+version plus a slice and a sum per room.
+"""
+
+from array import array
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from . import cache as catalog_cache
+from .models import RatePlan, Room
+
+MAX_NIGHTS = 366
+
+_CENT = Decimal('0.01')
+# Arrays per (catalog version, year); replaced whole when the version moves on.
+_memo = {'version': None, 'years': {}}
+
+
+def year_rates(year):
+    """``{room_id: array of cents}`` for every night of ``year``, indexed by day of the year."""
+    version = catalog_cache.current_version()
+    if _memo['version'] != version:
+        _memo['version'], _memo['years'] = version, {}
+    rates = _memo['years'].get(year)
+    if rates is None:
+        key = f'rooms:catalog:{version}:rates:{year}'
+        rates = cache.get(key)
+        if rates is None:
+            rates = build_year(year)
+            # Expiring like the other catalog entries, so the arrays of
+            # superseded versions do not stay in the cache for good.
+            cache.set(key, rates, timeout=getattr(settings, 'ROOM_CATALOG_CACHE_TIMEOUT', 300))
+        _memo['years'][year] = rates
+    return rates
+
+
+def build_year(year):
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    days = (last - first).days + 1
+    rates = {room_id: array('q', [_cents(price)]) * days for room_id, price in Room.objects.values_list('pk', 'price')}
+    bases = {room_id: nights[0] for room_id, nights in rates.items()}
+
+    plans = RatePlan.objects.filter(
+        Q(start_date__isnull=True) | Q(start_date__lte=last),
+        Q(end_date__isnull=True) | Q(end_date__gte=first),
+        is_active=True,
+    )
+    # Lowest precedence first, so each plan overwrites the ones it beats.
+    plans = sorted(plans, key=lambda plan: (plan.priority, plan.room_id is not None, plan.created_at, plan.pk))
+    for plan in plans:
+        start = max(plan.start_date or first, first)
+        end = min(plan.end_date or last, last)
+        offsets = [
+            offset
+            for offset in range((start - first).days, (end - first).days + 1)
+            if plan.weekdays & (1 << (first + timedelta(days=offset)).weekday())
+        ]
+        room_ids = [plan.room_id] if plan.room_id is not None else list(rates)
+        for room_id in room_ids:
+            nights = rates.get(room_id)
+            if nights is None:
+                continue
+            price = _plan_cents(plan, bases[room_id])
+            for offset in offsets:
+                nights[offset] = price
+    return rates
+
+
+def nightly_rates(room_ids, check_in, check_out):
+    """``{room_id: [cents, ...]}`` for each night from ``check_in`` to ``check_out``."""
+    rates = {room_id: [] for room_id in room_ids}
+    day = check_in
+    while day < check_out:
+        year_end = min(date(day.year + 1, 1, 1), check_out)
+        table = year_rates(day.year)
+        start = day.timetuple().tm_yday - 1
+        stop = start + (year_end - day).days
+        for room_id in room_ids:
+            nights = table.get(room_id)
+            if nights is not None:
+                rates[room_id].extend(nights[start:stop])
+        day = year_end
+    return {room_id: nights for room_id, nights in rates.items() if nights}
+
+
+def quote(room_id, check_in, check_out):
+    """Price one stay night by night, or ``None`` for an unknown room."""
+    nights = nightly_rates([room_id], check_in, check_out).get(room_id)
+    if nights is None:
+        return None
+    return {
+        **_summary(room_id, check_in, check_out, nights),
+        'nightly': [
+            {'date': check_in + timedelta(days=offset), 'rate': _money(cents)} for offset, cents in enumerate(nights)
+        ],
+    }
+
+
+def quote_all(check_in, check_out, room_ids=None):
+    """Totals for the stay in every active room (or in ``room_ids``), ordered by room id."""
+    if room_ids is None:
+        room_ids = catalog_cache.get_or_build(
+            'rates:active-rooms', lambda: list(Room.objects.filter(is_active=True).order_by('id').values_list('pk', flat=True))
+        )
+    rates = nightly_rates(sorted(room_ids), check_in, check_out)
+    return [_summary(room_id, check_in, check_out, nights) for room_id, nights in rates.items()]
+
+
+def _summary(room_id, check_in, check_out, nights):
+    total = sum(nights)
+    return {
+        'roomId': room_id,
+        'checkIn': check_in,
+        'checkOut': check_out,
+        'nights': len(nights),
+        'total': _money(total),
+        'averageNightly': _money(Decimal(total) / len(nights)),
+    }
+
+
+def _plan_cents(plan, base):
+    if plan.nightly_price is not None:
+        return _cents(plan.nightly_price)
+    adjusted = Decimal(base) * (1 + plan.adjustment_percent / 100)
+    return max(0, int(adjusted.quantize(Decimal('1'), rounding=ROUND_HALF_UP)))
+
+
+def _cents(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _money(cents):
+    return str((Decimal(cents) / 100).quantize(_CENT, rounding=ROUND_HALF_UP))
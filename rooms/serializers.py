@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Room
+from .models import ALL_WEEKDAYS, RatePlan, Room
 
 
 class RoomSerializer(serializers.ModelSerializer):
@@ -21,3 +21,62 @@ class RoomSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
         ]
+
+
+class WeekdaysField(serializers.Field):
+    """``RatePlan.weekdays`` as a list of ISO-style day numbers, Monday = 0."""
+
+    def to_representation(self, value):
+        return [day for day in range(7) if value & (1 << day)]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data or not all(isinstance(day, int) and 0 <= day <= 6 for day in data):
+            raise serializers.ValidationError('Expected a non-empty list of weekdays from 0 (Monday) to 6 (Sunday)')
+        mask = 0
+        for day in data:
+            mask |= 1 << day
+        return mask
+
+
+class RatePlanSerializer(serializers.ModelSerializer):
+    roomId = serializers.PrimaryKeyRelatedField(
+        source='room', queryset=Room.objects.all(), allow_null=True, required=False
+    )
+    startDate = serializers.DateField(source='start_date', allow_null=True, required=False)
+    endDate = serializers.DateField(source='end_date', allow_null=True, required=False)
+    weekdays = WeekdaysField(required=False, default=ALL_WEEKDAYS)
+    nightlyPrice = serializers.DecimalField(
+        source='nightly_price', max_digits=10, decimal_places=2, min_value=0, allow_null=True, required=False
+    )
+    adjustmentPercent = serializers.DecimalField(
+        source='adjustment_percent', max_digits=6, decimal_places=2, min_value=-100, allow_null=True, required=False
+    )
+    isActive = serializers.BooleanField(source='is_active', required=False)
+
+    class Meta:
+        model = RatePlan
+        fields = [
+            'id',
+            'name',
+            'roomId',
+            'startDate',
+            'endDate',
+            'weekdays',
+            'nightlyPrice',
+            'adjustmentPercent',
+            'priority',
+            'isActive',
+            'created_at',
+            'updated_at',
+        ]
+
+    def validate(self, attrs):
+        merged = {
+            field: attrs.get(field, getattr(self.instance, field, None))
+            for field in ('start_date', 'end_date', 'nightly_price', 'adjustment_percent')
+        }
+        if (merged['nightly_price'] is None) == (merged['adjustment_percent'] is None):
+            raise serializers.ValidationError('Set exactly one of nightlyPrice and adjustmentPercent')
+        if merged['start_date'] and merged['end_date'] and merged['end_date'] < merged['start_date']:
+            raise serializers.ValidationError({'endDate': ['Must not be before startDate']})
+        return attrs
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import RatePlan, Room
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=RatePlan)
+@receiver(post_delete, sender=RatePlan)
+def invalidate_room_catalog(sender, **kwargs):
+    # Bump after commit: bumping earlier would let a reader cache the
+    # pre-commit rows under the new version.
+    transaction.on_commit(cache.bump_version)
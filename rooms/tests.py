@@ -1,3 +1,329 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserRole
+from bookings.models import ACTIVE_STATUSES, Booking, BookingStatus
+
+from . import rates
+from .models import RatePlan, Room
+
+
+class RoomCatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Single Suite', price='129.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_warm_catalog_is_served_without_queries(self):
+        self.client.get('/api/rooms')
+        self.client.get(f'/api/rooms/{self.room.pk}')
+
+        with self.assertNumQueries(0):
+            listing = self.client.get('/api/rooms')
+            detail = self.client.get(f'/api/rooms/{self.room.pk}')
+        self.assertEqual(listing.json()[0]['name'], 'Single Suite')
+        self.assertEqual(detail.json()['name'], 'Single Suite')
+
+    def test_admin_edit_is_visible_immediately(self):
+        self.client.get('/api/rooms')
+        self.client.get(f'/api/rooms/{self.room.pk}')
+
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = admin.patch(f'/api/rooms/{self.room.pk}', {'name': 'Renamed Suite'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get('/api/rooms').json()[0]['name'], 'Renamed Suite')
+        self.assertEqual(self.client.get(f'/api/rooms/{self.room.pk}').json()['name'], 'Renamed Suite')
+
+    def test_model_save_and_delete_invalidate(self):
+        self.client.get('/api/rooms')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(name='Executive Suite', price='259.00')
+        self.assertEqual(len(self.client.get('/api/rooms').json()), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.filter(name='Executive Suite').get().delete()
+        self.assertEqual(len(self.client.get('/api/rooms').json()), 1)
+
+    def test_missing_room_is_not_cached(self):
+        self.assertEqual(self.client.get('/api/rooms/999').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(pk=999, name='Late Suite', price='99.00')
+        self.assertEqual(self.client.get('/api/rooms/999').status_code, 200)
+
+
+class RoomSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def room(name, price, occupancy, amenities, **fields):
+            return Room.objects.create(name=name, price=price, max_occupancy=occupancy, amenities=amenities, **fields)
+
+        cls.taken = room('Taken', '100.00', 2, ['Free WiFi', 'Smart TV'])
+        cls.cancelled = room('Cancelled', '200.00', 4, ['Free WiFi'])
+        cls.adjacent = room('Adjacent', '150.00', 2, ['Free WiFi', 'Smart TV'])
+        cls.single = room('Single', '80.00', 1, ['Smart TV'])
+        room('Closed', '90.00', 4, ['Free WiFi'], is_active=False)
+        stays = [
+            (cls.taken, date(2030, 1, 9), date(2030, 1, 11), BookingStatus.CONFIRMED),
+            (cls.cancelled, date(2030, 1, 10), date(2030, 1, 12), BookingStatus.CANCELLED),
+            (cls.adjacent, date(2030, 1, 8), date(2030, 1, 10), BookingStatus.CHECKED_IN),
+            (cls.adjacent, date(2030, 1, 12), date(2030, 1, 14), BookingStatus.PENDING),
+        ]
+        for stay_room, check_in, check_out, status in stays:
+            Booking.objects.create(room=stay_room, check_in=check_in, check_out=check_out, status=status)
+
+    def overlap_scan(self, check_in, check_out, guests=1, min_price=None, max_price=None, amenities=()):
+        # The per-room check against the bookings table that the search replaced.
+        rooms = []
+        for room in Room.objects.filter(is_active=True, max_occupancy__gte=guests).order_by('id'):
+            if min_price is not None and room.price < Decimal(min_price):
+                continue
+            if max_price is not None and room.price > Decimal(max_price):
+                continue
+            if not set(amenities).issubset(room.amenities):
+                continue
+            overlapping = Booking.objects.filter(
+                room=room, status__in=ACTIVE_STATUSES, check_in__lt=check_out, check_out__gt=check_in
+            )
+            if not overlapping.exists():
+                rooms.append(room.pk)
+        return rooms
+
+    def test_search_matches_the_overlap_scan(self):
+        client = APIClient()
+        cases = [
+            {},
+            {'adults': 2},
+            {'adults': 1, 'children': 1, 'minPrice': '120'},
+            {'maxPrice': '150', 'amenities': ['Smart TV']},
+        ]
+        for check_in, check_out in ((date(2030, 1, 10), date(2030, 1, 12)), (date(2030, 1, 1), date(2030, 1, 31))):
+            for params in cases:
+                with self.subTest(check_in=check_in, check_out=check_out, params=params):
+                    with self.assertNumQueries(1):
+                        response = client.get(
+                            '/api/rooms/search', {'checkIn': check_in.isoformat(), 'checkOut': check_out.isoformat(), **params}
+                        )
+                    expected = self.overlap_scan(
+                        check_in, check_out,
+                        guests=params.get('adults', 1) + params.get('children', 0),
+                        min_price=params.get('minPrice'),
+                        max_price=params.get('maxPrice'),
+                        amenities=params.get('amenities', ()),
+                    )
+                    self.assertEqual([room['id'] for room in response.json()['rooms']], expected)
+                    self.assertEqual(response.json()['count'], len(expected))
+
+        found = client.get('/api/rooms/search', {'checkIn': '2030-01-10', 'checkOut': '2030-01-12'}).json()['rooms']
+        self.assertEqual([room['id'] for room in found], [self.cancelled.pk, self.adjacent.pk, self.single.pk])
+
+    def test_validation(self):
+        client = APIClient()
+        cases = [
+            {'checkIn': '2030-01-10'},
+            {'checkIn': 'soon', 'checkOut': '2030-01-12'},
+            {'checkIn': '2030-01-12', 'checkOut': '2030-01-10'},
+            {'checkIn': '2030-01-10', 'checkOut': '2030-01-12', 'adults': 'x'},
+        ]
+        for params in cases:
+            with self.subTest(params=params):
+                self.assertEqual(client.get('/api/rooms/search', params).status_code, 400)
+
+
+class AsyncRoomEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Single Suite', price='129.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        guest = User.objects.create_user('guest@example.com', 'pw')
+        Booking.objects.create(
+            room=cls.room,
+            guest_first_name='Gail',
+            guest_email='guest@example.com',
+            check_in=date(2030, 1, 10),
+            check_out=date(2030, 1, 12),
+            status=BookingStatus.CONFIRMED,
+            created_by=guest,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_availability_is_served_async(self):
+        client = AsyncClient()
+        for url in ('/api/rooms/check-availability', '/api/bookings/check-availability'):
+            with self.subTest(url=url):
+                taken = await client.post(
+                    url, {'roomId': self.room.pk, 'checkIn': '2030-01-11', 'checkOut': '2030-01-13'},
+                    content_type='application/json',
+                )
+                free = await client.post(url, {'room_id': self.room.pk, 'check_in': '2030-01-12', 'check_out': '2030-01-14'})
+                self.assertEqual((taken.status_code, taken.json()), (200, {'available': False}))
+                self.assertEqual((free.status_code, free.json()), (200, {'available': True}))
+
+    @override_settings(DEBUG=True, METRICS_ENABLED=True, REQUEST_PROFILING=True)
+    def test_asgi_middleware_is_not_adapted(self):
+        # With DEBUG on, Django logs every sync-only middleware it wraps for an async chain.
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            handler = ASGIHandler()
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+
+    @override_settings(DEBUG=True)
+    async def test_static_files_are_served_async(self):
+        response = await AsyncClient().get('/static/rest_framework/css/default.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/css; charset="utf-8"')
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertEqual((await AsyncClient().head('/static/rest_framework/css/default.css')).status_code, 200)
+
+    def test_availability_validation(self):
+        client = APIClient()
+        cases = [
+            ({'roomId': self.room.pk}, 400, {'message': 'roomId, checkIn, checkOut are required'}),
+            ({'roomId': 'x', 'checkIn': '2030-01-01', 'checkOut': '2030-01-02'}, 400, {'message': 'roomId must be an integer'}),
+            ({'roomId': 1, 'checkIn': 'soon', 'checkOut': '2030-01-02'}, 400, {'message': 'Dates must be ISO format'}),
+            (
+                {'roomId': 1, 'checkIn': '2030-01-02', 'checkOut': '2030-01-02'},
+                200,
+                {'available': False, 'message': 'Invalid date range'},
+            ),
+        ]
+        for payload, status_code, body in cases:
+            with self.subTest(payload=payload):
+                response = client.post('/api/rooms/availability', payload, format='json')
+                self.assertEqual((response.status_code, response.json()), (status_code, body))
+
+        malformed = client.post('/api/rooms/availability', '{', content_type='application/json')
+        self.assertEqual(malformed.status_code, 400)
+        self.assertIn('JSON parse error', malformed.json()['detail'])
+        self.assertEqual(client.get('/api/rooms/availability').status_code, 405)
+
+    def test_bookings_check_rejects_invalid_ranges(self):
+        client = APIClient()
+        cases = [
+            ({'roomId': self.room.pk, 'checkIn': '2030-01-12', 'checkOut': '2030-01-12'}, {'message': 'Check-out must be after check-in'}),
+            ({'roomId': self.room.pk, 'checkIn': '2030-01-12', 'checkOut': '2030-01-10'}, {'message': 'Check-out must be after check-in'}),
+            ({'roomId': self.room.pk, 'checkIn': '2030-01-12', 'checkOut': 'later'}, {'message': 'Dates must be ISO format'}),
+            ({'checkIn': '2030-01-12', 'checkOut': '2030-01-14'}, {'message': 'roomId, checkIn, checkOut are required'}),
+        ]
+        for payload, body in cases:
+            with self.subTest(payload=payload):
+                response = client.post('/api/bookings/check-availability', payload, format='json')
+                self.assertEqual((response.status_code, response.json()), (400, body))
+
+    def test_listing_is_conditional(self):
+        client = APIClient()
+        listing = client.get('/api/rooms')
+        self.assertEqual(listing['Content-Type'], 'application/json')
+        self.assertEqual([room['name'] for room in listing.json()], ['Single Suite'])
+
+        with self.assertNumQueries(0):
+            again = client.get('/api/rooms', HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_rooms_are_still_created_through_the_viewset(self):
+        client = APIClient()
+        payload = {'name': 'Annex', 'price': '99.00', 'maxOccupancy': 2, 'isActive': True}
+        self.assertEqual(client.post('/api/rooms', payload, format='json').status_code, 401)
+
+        client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            created = client.post('/api/rooms', payload, format='json')
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(len(client.get('/api/rooms').json()), 2)
+        # Other methods get the viewset's answers too.
+        self.assertEqual(client.put('/api/rooms', payload, format='json').status_code, 405)
+        self.assertEqual(client.options('/api/rooms').json()['name'], 'Room List')
+        self.assertEqual(client.head('/api/rooms').status_code, 200)
+
+
+class RateQuoteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(name='Single Suite', price='100.00')
+        cls.other = Room.objects.create(name='Double Suite', price='150.00')
+        cls.admin = User.objects.create_user('admin@example.com', 'pw', role=UserRole.ADMIN)
+        # Weekends (Friday, Saturday) are 20% dearer everywhere...
+        RatePlan.objects.create(name='Weekend', weekdays=0b0110000, adjustment_percent='20.00')
+        # ...except over the holidays, when the single suite costs a flat 180.
+        RatePlan.objects.create(
+            name='Holidays', room=cls.room, start_date=date(2030, 12, 24), end_date=date(2031, 1, 1),
+            nightly_price='180.00', priority=10,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_stay_is_priced_night_by_night(self):
+        # Thursday 19 to Monday 23 December 2030, then across the new year.
+        quote = self.client.get(f'/api/rooms/{self.room.pk}/quote', {'checkIn': '2030-12-19', 'checkOut': '2030-12-23'}).json()
+        self.assertEqual([night['rate'] for night in quote['nightly']], ['100.00', '120.00', '120.00', '100.00'])
+        self.assertEqual((quote['nights'], quote['total'], quote['averageNightly']), (4, '440.00', '110.00'))
+
+        quote = rates.quote(self.room.pk, date(2030, 12, 31), date(2031, 1, 3))
+        self.assertEqual([night['rate'] for night in quote['nightly']], ['180.00', '180.00', '100.00'])
+
+    def test_batch_quotes_every_active_room(self):
+        Room.objects.create(name='Closed', price='10.00', is_active=False)
+        self.client.get('/api/rooms/quotes', {'checkIn': '2030-12-20', 'checkOut': '2030-12-22'})
+        with self.assertNumQueries(0):
+            body = self.client.get('/api/rooms/quotes', {'checkIn': '2030-12-20', 'checkOut': '2030-12-22'}).json()
+        self.assertEqual(
+            [(quote['roomId'], quote['total']) for quote in body['quotes']],
+            [(self.room.pk, '240.00'), (self.other.pk, '360.00')],
+        )
+        selected = self.client.get('/api/rooms/quotes', {'checkIn': '2030-12-20', 'checkOut': '2030-12-22', 'rooms': str(self.other.pk)})
+        self.assertEqual([quote['roomId'] for quote in selected.json()['quotes']], [self.other.pk])
+
+    @override_settings(ROOM_CATALOG_CACHE_TIMEOUT=120)
+    def test_cached_rates_expire_like_the_catalog(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            rates.year_rates(2030)
+        self.assertEqual(cache_set.call_args.kwargs['timeout'], 120)
+
+    def test_rate_edits_invalidate_cached_rates(self):
+        params = {'checkIn': '2030-03-04', 'checkOut': '2030-03-05'}
+        self.assertEqual(self.client.get(f'/api/rooms/{self.room.pk}/quote', params).json()['total'], '100.00')
+
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            created = admin.post(
+                '/api/rooms/rate-plans',
+                {'name': 'Spring', 'startDate': '2030-03-01', 'endDate': '2030-03-31', 'weekdays': [0, 1], 'nightlyPrice': '90.00'},
+                format='json',
+            )
+        self.assertEqual(created.status_code, 201, created.content)
+        self.assertEqual(created.json()['weekdays'], [0, 1])
+        self.assertEqual(self.client.get(f'/api/rooms/{self.room.pk}/quote', params).json()['total'], '90.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.patch(f'/api/rooms/{self.room.pk}', {'price': '110.00'}, format='json')
+        self.assertEqual(self.client.get(f'/api/rooms/{self.room.pk}/quote', {'checkIn': '2030-03-06', 'checkOut': '2030-03-07'}).json()['total'], '110.00')
+
+    def test_validation(self):
+        self.assertEqual(self.client.get(f'/api/rooms/{self.room.pk}/quote', {'checkIn': '2030-01-02', 'checkOut': '2030-01-02'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/rooms/999/quote', {'checkIn': '2030-01-01', 'checkOut': '2030-01-02'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/rooms/quotes', {'checkIn': '2030-01-01'}).status_code, 400)
+
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        both = admin.post('/api/rooms/rate-plans', {'name': 'Bad', 'nightlyPrice': '90.00', 'adjustmentPercent': '5'}, format='json')
+        self.assertEqual(both.status_code, 400)
+        self.assertEqual(APIClient().post('/api/rooms/rate-plans', {'name': 'Anon', 'nightlyPrice': '1'}, format='json').status_code, 401)
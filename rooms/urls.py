@@ -1,14 +1,37 @@
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import DefaultRouter, SimpleRouter
 
-from .views import RoomViewSet, RoomAvailabilityView
+from backend.asyncviews import dispatch_by_method
+
+from .views import (
+    RatePlanViewSet,
+    RoomAvailabilityView,
+    RoomCatalogView,
+    RoomQuotesView,
+    RoomQuoteView,
+    RoomSearchView,
+    RoomViewSet,
+)
 
 
 router = DefaultRouter(trailing_slash=False)
 router.register(r'', RoomViewSet, basename='rooms')
 
+# GET and HEAD of the listing are served async; every other method of the
+# list URL, such as creating a room, by the viewset's own list route.
+room_list = next(pattern.callback for pattern in router.urls if pattern.name == 'rooms-list')
+room_catalog = RoomCatalogView.as_view()
+
+rate_plan_router = SimpleRouter(trailing_slash=False)
+rate_plan_router.register(r'rate-plans', RatePlanViewSet, basename='rate-plans')
+
 urlpatterns = [
     path('check-availability', RoomAvailabilityView.as_view(), name='rooms-check-availability'),
     path('availability', RoomAvailabilityView.as_view(), name='rooms-availability-alias'),
+    path('search', RoomSearchView.as_view(), name='rooms-search'),
+    path('quotes', RoomQuotesView.as_view(), name='rooms-quotes'),
+    path('<int:pk>/quote', RoomQuoteView.as_view(), name='rooms-quote'),
+    path('', include(rate_plan_router.urls)),
+    path('', dispatch_by_method(room_list, GET=room_catalog, HEAD=room_catalog), name='rooms-catalog'),
     path('', include(router.urls)),
 ]
@@ -1,17 +1,25 @@
 from datetime import date
+from decimal import Decimal, InvalidOperation
 
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
 from rest_framework import permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from accounts.permissions import IsReceptionistOrAdmin
-from bookings.models import Booking, BookingStatus
+from accounts.permissions import IsAdmin, IsReceptionistOrAdmin
+from backend.asyncviews import AsyncAPIView
+from backend.conditional import ConditionalGetMixin, response_validators, set_validator_headers
+from bookings import inventory
 
-from .models import Room
-from .serializers import RoomSerializer
+from . import cache as catalog_cache
+from . import rates
+from .models import RatePlan, Room
+from .serializers import RatePlanSerializer, RoomSerializer
 
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Room.objects.all().order_by('id')
     serializer_class = RoomSerializer
 
@@ -20,22 +28,116 @@ class RoomViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [IsReceptionistOrAdmin()]
 
+    def get_validators(self):
+        # Cached per catalog version like the responses, so warm checks skip the database.
+        if self.action == 'list':
+            stats = catalog_cache.get_or_build(
+                'validators:list', lambda: Room.objects.aggregate(count=Count('pk'), updated=Max('updated_at'))
+            )
+            return (stats['count'], stats['updated']), stats['updated']
+        if self.action == 'retrieve':
+            pk = self.kwargs[self.lookup_field]
+            if not pk.isdigit():
+                return None
+            updated = catalog_cache.get_or_build(
+                f'validators:room:{pk}', lambda: Room.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+            )
+            return ((pk, updated), updated) if updated else None
+        return None
 
-class RoomAvailabilityView(APIView):
-    permission_classes = [permissions.AllowAny]
+    def list(self, request, *args, **kwargs):
+        data = catalog_cache.get_or_build(
+            'list', lambda: [dict(row) for row in self.get_serializer(self.get_queryset(), many=True).data]
+        )
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = catalog_cache.get_or_build(
+            f"room:{kwargs[self.lookup_field]}", lambda: dict(self.get_serializer(self.get_object()).data)
+        )
+        return Response(data)
+
+
+async def _catalog_stats():
+    return await Room.objects.aaggregate(count=Count('pk'), updated=Max('updated_at'))
+
+
+async def _catalog_listing():
+    rooms = [room async for room in Room.objects.order_by('id')]
+    return [dict(row) for row in RoomSerializer(rooms, many=True).data]
 
-    def post(self, request):
-        room_id = request.data.get('roomId') or request.data.get('room_id')
-        check_in = request.data.get('checkIn') or request.data.get('check_in')
-        check_out = request.data.get('checkOut') or request.data.get('check_out')
+
+class RoomCatalogView(AsyncAPIView):
+    """``GET /api/rooms``: the public listing, served natively async.
+
+    It shares cache entries and validators with ``RoomViewSet``, so both
+    produce the same body and ETag. ``rooms.urls`` sends every other method
+    on the URL, such as creating a room, to the viewset.
+    """
+
+    async def get(self, request):
+        stats = await catalog_cache.aget_or_build('validators:list', _catalog_stats)
+        etag, timestamp = response_validators(request, (stats['count'], stats['updated']), stats['updated'], 'json')
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = self.respond(await catalog_cache.aget_or_build('list', _catalog_listing))
+        set_validator_headers(response, etag, timestamp)
+        return response
+
+
+class RoomAvailabilityView(AsyncAPIView):
+    async def post(self, request):
+        data = self.parse(request)
+        room_id = data.get('roomId') or data.get('room_id')
+        check_in = data.get('checkIn') or data.get('check_in')
+        check_out = data.get('checkOut') or data.get('check_out')
 
         if not room_id or not check_in or not check_out:
-            return Response({'message': 'roomId, checkIn, checkOut are required'}, status=status.HTTP_400_BAD_REQUEST)
+            return self.respond({'message': 'roomId, checkIn, checkOut are required'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             room_id = int(room_id)
         except (TypeError, ValueError):
-            return Response({'message': 'roomId must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            return self.respond({'message': 'roomId must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            check_in_date = date.fromisoformat(str(check_in)[:10])
+            check_out_date = date.fromisoformat(str(check_out)[:10])
+        except ValueError:
+            return self.respond({'message': 'Dates must be ISO format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if check_out_date <= check_in_date:
+            return self.invalid_range()
+
+        available = await inventory.ais_room_available(room_id, check_in_date, check_out_date)
+
+        return self.respond({'available': available})
+
+    def invalid_range(self):
+        return self.respond({'available': False, 'message': 'Invalid date range'}, status=status.HTTP_200_OK)
+
+
+class RoomSearchView(APIView):
+    """Every active room that can host the party and is free for the whole stay.
+
+    Availability is resolved in the same query as the room filters by
+    anti-joining against the nights already taken, so the cost does not grow
+    with one round trip per room.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return self.search(request.query_params)
+
+    def post(self, request):
+        return self.search(request.data)
+
+    def search(self, params):
+        check_in = params.get('checkIn') or params.get('check_in')
+        check_out = params.get('checkOut') or params.get('check_out')
+        if not check_in or not check_out:
+            return Response({'message': 'checkIn, checkOut are required'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             check_in_date = date.fromisoformat(str(check_in)[:10])
@@ -44,13 +146,105 @@ class RoomAvailabilityView(APIView):
             return Response({'message': 'Dates must be ISO format'}, status=status.HTTP_400_BAD_REQUEST)
 
         if check_out_date <= check_in_date:
-            return Response({'available': False, 'message': 'Invalid date range'}, status=status.HTTP_200_OK)
+            return Response({'message': 'Invalid date range'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            guests = int(params.get('adults') or 1) + int(params.get('children') or 0)
+            min_price = _optional_decimal(params.get('minPrice'))
+            max_price = _optional_decimal(params.get('maxPrice'))
+        except (TypeError, ValueError, InvalidOperation):
+            return Response({'message': 'adults, children and prices must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        amenities = params.getlist('amenities') if hasattr(params, 'getlist') else params.get('amenities')
+        if isinstance(amenities, str):
+            amenities = [amenities]
+        amenities = [a for a in (amenities or []) if a]
+
+        rooms = Room.objects.filter(is_active=True, max_occupancy__gte=guests).order_by('id')
+        if min_price is not None:
+            rooms = rooms.filter(price__gte=min_price)
+        if max_price is not None:
+            rooms = rooms.filter(price__lte=max_price)
+        if amenities and connection.features.supports_json_field_contains:
+            rooms = rooms.filter(amenities__contains=amenities)
+        rooms = inventory.exclude_occupied(rooms, check_in_date, check_out_date)
+
+        rooms = list(rooms)
+        if amenities and not connection.features.supports_json_field_contains:
+            wanted = set(amenities)
+            rooms = [room for room in rooms if wanted.issubset(room.amenities or [])]
+
+        return Response({
+            'checkIn': check_in_date,
+            'checkOut': check_out_date,
+            'count': len(rooms),
+            'rooms': RoomSerializer(rooms, many=True).data,
+        })
+
+
+class RatePlanViewSet(viewsets.ModelViewSet):
+    queryset = RatePlan.objects.all().order_by('-priority', 'id')
+    serializer_class = RatePlanSerializer
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return [IsReceptionistOrAdmin()]
+        return [IsAdmin()]
+
+
+class RoomQuoteView(APIView):
+    """Price a stay in one room night by night, from its rate plans."""
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        stay = _stay(request.query_params)
+        if isinstance(stay, Response):
+            return stay
+        quote = rates.quote(pk, *stay)
+        if quote is None:
+            return Response({'message': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(quote)
+
+
+class RoomQuotesView(APIView):
+    """Stay totals for every active room, or the comma separated ``rooms``, in one call."""
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        stay = _stay(request.query_params)
+        if isinstance(stay, Response):
+            return stay
+        room_ids = None
+        if request.query_params.get('rooms'):
+            try:
+                room_ids = {int(pk) for pk in request.query_params['rooms'].split(',') if pk.strip()}
+            except ValueError:
+                return Response({'message': 'rooms must be comma separated room ids'}, status=status.HTTP_400_BAD_REQUEST)
+        check_in, check_out = stay
+        return Response({'checkIn': check_in, 'checkOut': check_out, 'quotes': rates.quote_all(check_in, check_out, room_ids)})
+
+
+def _stay(params):
+    """``(check_in, check_out)`` from ``params``, or an error ``Response``."""
+    check_in = params.get('checkIn') or params.get('check_in')
+    check_out = params.get('checkOut') or params.get('check_out')
+    if not check_in or not check_out:
+        return Response({'message': 'checkIn, checkOut are required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        check_in_date = date.fromisoformat(str(check_in)[:10])
+        check_out_date = date.fromisoformat(str(check_out)[:10])
+    except ValueError:
+        return Response({'message': 'Dates must be ISO format'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 < (check_out_date - check_in_date).days <= rates.MAX_NIGHTS:
+        return Response(
+            {'message': f'A stay must cover 1 to {rates.MAX_NIGHTS} nights'}, status=status.HTTP_400_BAD_REQUEST
+        )
+    return check_in_date, check_out_date
 
-        overlapping = Booking.objects.filter(
-            room_id=room_id,
-            status__in=(BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN),
-            check_in__lt=check_out_date,
-            check_out__gt=check_in_date,
-        ).exists()
 
-        return Response({'available': not overlapping})
+def _optional_decimal(value):
+    if value in (None, ''):
+        return None
+    return Decimal(str(value))